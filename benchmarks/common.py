@@ -0,0 +1,43 @@
+import math
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OUTPUT = os.path.join(ROOT_DIR, 'bench_output.txt')
+
+# Make `config` and `modules` importable when run as `python benchmarks/<script>.py`
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def format_table(headers, rows):
+    """Render rows as a fixed-width text table"""
+    widths = [len(h) for h in headers]
+    for row in rows:
+        for i, cell in enumerate(row):
+            widths[i] = max(widths[i], len(str(cell)))
+    line = "  ".join(h.ljust(widths[i]) for i, h in enumerate(headers))
+    out = [line, "  ".join("-" * w for w in widths)]
+    for row in rows:
+        out.append("  ".join(str(cell).ljust(widths[i]) for i, cell in enumerate(row)))
+    return "\n".join(out)
+
+
+def write_report(title, body, output=DEFAULT_OUTPUT):
+    """Print a benchmark section and append it to the benchmark output file"""
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    text = f"=== {title} ({stamp}) ===\n{body}\n"
+    print(text)
+    if output:
+        with open(output, 'a', encoding='utf-8') as f:
+            f.write(text + "\n")
@@ -0,0 +1,200 @@
+"""
+Regression check: every analytics aggregate counts each student once.
+
+Generates students whose enrolment rows fan out (several services, duplicate
+test-prep rows, one or two parents, some without scores) into TEMP tables
+named like the real ones. Temporary tables come first in the search path,
+so the page queries run unchanged against the generated data and real data
+is never touched. Each result is compared with a reference computed in
+pandas from the generated rows (first parent by parent_id, test prep by
+existence), checking group row counts, per-group student counts and means.
+
+The legacy LEFT JOIN test-prep query is run as well to show what the
+rewrite fixed. Exits non-zero when any check fails.
+
+Usage:
+    python benchmarks/fanout_check.py --students 20000 --seed 7
+"""
+import argparse
+import random
+
+from common import DEFAULT_OUTPUT, format_table, write_report
+
+from modules.dashboard import ethnicity_stats, test_prep_stats
+from modules.database import DatabaseConnection
+from modules.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+TABLES = ['services', 'student', 'parent_background', 'exam_scores', 'study_habits', 'student_services']
+SERVICES = [(1, 'Lunch Program', 'Facility'), (2, 'Test Preparation Course', 'Academic'),
+            (3, 'Math Tutoring', 'Academic')]
+EDUCATION = ['High School', 'Bachelor', 'Master']
+TOLERANCE = 1e-6
+
+# Pre-rewrite query of the Test Preparation tab (one row per service row)
+LEGACY_TEST_PREP = """
+    SELECT CASE WHEN srv.service_name = 'Test Preparation Course' THEN 'Completed' ELSE 'None' END AS status,
+           COUNT(*) AS n, AVG(e.math_score) AS math
+    FROM student s
+    JOIN exam_scores e ON s.id_student = e.id_student
+    LEFT JOIN student_services ss ON s.id_student = ss.id_student
+    LEFT JOIN services srv ON ss.service_id = srv.service_id AND srv.service_name = 'Test Preparation Course'
+    GROUP BY status
+"""
+
+
+def category_labels(db):
+    """Valid labels of the student category columns (enum or text)"""
+    labels = {}
+    for column in ('gender', 'grade_level', 'race_ethnicity'):
+        values = db.execute_query(
+            f"SELECT DISTINCT {column}::text AS value FROM public.student WHERE {column} IS NOT NULL",
+            use_primary=True,
+        )
+        labels[column] = sorted(values['value']) if not values.empty else []
+        if not labels[column]:
+            raise SystemExit(f"public.student has no {column} values to sample from")
+    return labels
+
+
+def generate(students, labels, seed):
+    """Rows per table, with realistic fan-out in the enrolment tables"""
+    rng = random.Random(seed)
+    rows = {table: [] for table in TABLES}
+    rows['services'] = list(SERVICES)
+    for i in range(1, students + 1):
+        rows['student'].append((i, f"Student {i}", rng.choice(labels['gender']),
+                                rng.choice(labels['grade_level']), rng.choice(labels['race_ethnicity'])))
+        for _ in range(rng.choice((1, 1, 2))):
+            rows['parent_background'].append((len(rows['parent_background']) + 1, i, rng.choice(EDUCATION)))
+        if rng.random() < 0.95:
+            rows['exam_scores'].append((i, i, rng.randint(0, 100), rng.randint(0, 100), rng.randint(0, 100)))
+        rows['study_habits'].append((i, i, rng.randint(2, 16), rng.random() < 0.5, rng.random() < 0.3))
+        services = [1] if rng.random() < 0.9 else []
+        if rng.random() < 0.3:
+            # Occasionally enrolled twice (dirty data the queries must tolerate)
+            services += [2, 2] if rng.random() < 0.1 else [2]
+        if rng.random() < 0.2:
+            services.append(3)
+        for service_id in services:
+            rows['student_services'].append((len(rows['student_services']) + 1, i, service_id, 'Standard'))
+    return rows
+
+
+INSERTS = {
+    'services': "INSERT INTO services (service_id, service_name, service_type) VALUES %s",
+    'student': "INSERT INTO student (id_student, name, gender, grade_level, race_ethnicity) VALUES %s",
+    'parent_background': "INSERT INTO parent_background (parent_id, id_student, parental_level_of_education) VALUES %s",
+    'exam_scores': "INSERT INTO exam_scores (score_id, id_student, math_score, reading_score, writing_score) VALUES %s",
+    'study_habits': """INSERT INTO study_habits (study_habits_id, id_student, study_hours_per_week,
+                                                 prefers_group_study, has_private_tutor) VALUES %s""",
+    'student_services': "INSERT INTO student_services (student_service_id, id_student, service_id, service_status) "
+                        "VALUES %s",
+}
+
+
+def load(db, rows):
+    """Shadow the real tables with TEMP copies (same column types) holding `rows`"""
+    for table in TABLES:
+        if not db.execute_insert_update(
+                f"CREATE TEMP TABLE {table} (LIKE public.{table} INCLUDING DEFAULTS INCLUDING GENERATED)"):
+            raise SystemExit(f"Could not create TEMP table {table}")
+        db.execute_values(INSERTS[table], rows[table], page_size=5000)
+        db.execute_insert_update(f"ANALYZE {table}")
+
+
+def reference(rows):
+    """One row per scored student with its first parent and test-prep status"""
+    student = pd.DataFrame(rows['student'], columns=['id_student', 'name', 'gender', 'grade_level', 'race_ethnicity'])
+    scores = pd.DataFrame(rows['exam_scores'], columns=['score_id', 'id_student', 'math', 'reading', 'writing'])
+    parents = pd.DataFrame(rows['parent_background'], columns=['parent_id', 'id_student', 'parental_level_of_education'])
+    first_parent = parents.sort_values('parent_id').drop_duplicates('id_student')
+    prep_ids = {sid for _, sid, service_id, _ in rows['student_services'] if service_id == 2}
+
+    frame = student.merge(scores, on='id_student')
+    frame['status'] = frame['id_student'].isin(prep_ids).map({True: 'Completed', False: 'None'})
+    return frame, first_parent[['id_student', 'parental_level_of_education']]
+
+
+def compare_groups(name, actual, expected, key, count_column):
+    """Check row count, per-group counts and means; returns a report row"""
+    if actual.empty:
+        return [name, 0, len(expected), '-', '-', 'FAIL (no result)']
+    actual = actual.copy()
+    actual[key] = actual[key].astype(str)
+    merged = expected.merge(actual, on=key, how='outer', suffixes=('_ref', ''), indicator=True)
+    missing = (merged['_merge'] != 'both').sum()
+    count_diff = (merged[count_column] - merged['n_ref']).abs().max()
+    mean_diff = max(
+        (merged[subject].astype(float) - merged[f"{subject}_ref"]).abs().max()
+        for subject in ('math', 'reading', 'writing')
+    )
+    ok = missing == 0 and count_diff == 0 and mean_diff < TOLERANCE
+    return [name, len(actual), len(expected), int(count_diff) if missing == 0 else 'n/a',
+            f"{mean_diff:.2e}", 'ok' if ok else 'FAIL']
+
+
+def expected_groups(frame, key):
+    grouped = frame.groupby(key).agg(n_ref=('id_student', 'size'), math_ref=('math', 'mean'),
+                                     reading_ref=('reading', 'mean'), writing_ref=('writing', 'mean'))
+    grouped = grouped.reset_index()
+    grouped[key] = grouped[key].astype(str)
+    return grouped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Benchmark output file ('' to disable)")
+    args = parser.parse_args()
+
+    db = DatabaseConnection()
+    if not db.connect():
+        raise SystemExit("Database connection failed")
+    # TEMP tables live on this session only: keep every read on it
+    db.stick_to_primary()
+
+    rows = generate(args.students, category_labels(db), args.seed)
+    load(db, rows)
+    frame, first_parent = reference(rows)
+
+    results = [
+        compare_groups('test_prep_stats', test_prep_stats(db), expected_groups(frame, 'status'), 'status', 'n'),
+        compare_groups('ethnicity_stats', ethnicity_stats(db), expected_groups(frame, 'race_ethnicity'),
+                       'race_ethnicity', 'n'),
+    ]
+    for group_by in ('gender', 'grade_level', 'race_ethnicity'):
+        results.append(compare_groups(f"get_score_averages({group_by})", db.get_score_averages(group_by),
+                                      expected_groups(frame, group_by), group_by, 'students'))
+    parental = frame.merge(first_parent, on='id_student')
+    results.append(compare_groups('get_score_averages(parental)',
+                                  db.get_score_averages('parental_level_of_education'),
+                                  expected_groups(parental, 'parental_level_of_education'),
+                                  'parental_level_of_education', 'students'))
+
+    kpis = db.get_dashboard_kpis()
+    kpi_ok = not kpis.empty and int(kpis.iloc[0]['total_students']) == len(rows['student']) and \
+        abs(float(kpis.iloc[0]['math']) - frame['math'].mean()) < TOLERANCE
+    results.append(['get_dashboard_kpis', len(kpis), 1, '-', '-', 'ok' if kpi_ok else 'FAIL'])
+
+    legacy = db.execute_query(LEGACY_TEST_PREP)
+    db.disconnect()
+
+    body = format_table(['query', 'rows', 'ref rows', 'max count diff', 'max mean diff', 'status'], results)
+    if not legacy.empty:
+        legacy_rows = [[row['status'], int(row['n']), f"{float(row['math']):.3f}"] for _, row in legacy.iterrows()]
+        reference_rows = expected_groups(frame, 'status').set_index('status')
+        for row in legacy_rows:
+            row += [int(reference_rows.loc[row[0], 'n_ref']), f"{reference_rows.loc[row[0], 'math_ref']:.3f}"]
+        body += "\n\nLegacy LEFT JOIN test-prep query (fan-out):\n" + format_table(
+            ['status', 'rows', 'avg math', 'students', 'true avg math'], legacy_rows)
+    write_report(f"Fan-out check ({args.students:,} students, seed {args.seed})", body, args.output)
+
+    if any(row[-1] != 'ok' for row in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
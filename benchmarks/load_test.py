@@ -0,0 +1,211 @@
+"""
+Concurrent-session load test for the Streamlit scripts.
+
+Each simulated session drives the real page scripts headlessly through
+streamlit.testing.v1.AppTest (one AppTest per session and page, so widget
+state persists across reruns like a browser tab) and performs realistic
+interactions: opening the dashboard, searching and selecting students,
+re-rendering the analytics tabs and dragging the at-risk threshold.
+
+For every concurrency level it reports throughput, p50/p99 rerun latency,
+the peak number of backend connections to the database and process RSS.
+
+Usage:
+    python benchmarks/load_test.py --levels 1 2 4 8 16 --iterations 5
+"""
+import argparse
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import ROOT_DIR, DEFAULT_OUTPUT, format_table, percentile, write_report
+
+SEARCH_TERMS = ["a", "an", "Budi", "Putri", "Dewi", "Sari", "Wijaya", ""]
+THRESHOLDS = [40, 50, 55, 60, 65, 70, 75, 80]
+
+
+def page_path(relative):
+    return os.path.join(ROOT_DIR, relative)
+
+
+class Session:
+    """One simulated user with an AppTest instance per page"""
+
+    def __init__(self, seed, timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.rng = random.Random(seed)
+        self.pages = {
+            'home': AppTest.from_file(page_path('app.py'), default_timeout=timeout),
+            'students': AppTest.from_file(page_path('pages/01_student_details.py'), default_timeout=timeout),
+            'analytics': AppTest.from_file(page_path('pages/02_Analytics.py'), default_timeout=timeout),
+            'performance': AppTest.from_file(page_path('pages/03_Performance.py'), default_timeout=timeout),
+            'insights': AppTest.from_file(page_path('pages_old/03_insights_recommendations.py'), default_timeout=timeout),
+        }
+        self.opened = set()
+
+    def open(self, name):
+        at = self.pages[name]
+        if name not in self.opened:
+            at.run()
+            self.opened.add(name)
+        return at
+
+    # --- Interactions (each returns the AppTest after one rerun) ---
+    def view_dashboard(self):
+        return self.pages['home'].run()
+
+    def search_student(self):
+        at = self.open('students')
+        return at.text_input[0].input(self.rng.choice(SEARCH_TERMS)).run()
+
+    def select_profile(self):
+        at = self.open('students')
+        if not at.selectbox:
+            return at.run()
+        options = at.selectbox[0].options
+        return at.selectbox[0].set_value(self.rng.choice(options)).run() if options else at.run()
+
+    def switch_analytics_tab(self):
+        # Tabs are client-side in Streamlit; a tab switch costs a full rerun of the page
+        return self.open('analytics').run()
+
+    def view_performance(self):
+        return self.pages['performance'].run()
+
+    def drag_threshold(self):
+        at = self.open('insights')
+        return at.slider[0].set_value(self.rng.choice(THRESHOLDS)).run() if at.slider else at.run()
+
+    def actions(self):
+        return [
+            self.view_dashboard, self.search_student, self.select_profile,
+            self.switch_analytics_tab, self.view_performance, self.drag_threshold,
+        ]
+
+
+def process_rss_mb():
+    """Resident set size of this process in MB"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class ConnectionSampler(threading.Thread):
+    """Polls pg_stat_activity for the number of backends on our database"""
+
+    def __init__(self, interval=0.25):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        import psycopg2
+        from config.settings import DB_CONFIG
+
+        try:
+            conn = psycopg2.connect(**DB_CONFIG)
+            conn.autocommit = True
+        except psycopg2.Error:
+            self.peak = None
+            return
+        with conn, conn.cursor() as cur:
+            while not self.stopped.is_set():
+                cur.execute(
+                    "SELECT COUNT(*) FROM pg_stat_activity WHERE datname = %s AND pid <> pg_backend_pid()",
+                    (DB_CONFIG['database'],)
+                )
+                self.peak = max(self.peak, cur.fetchone()[0])
+                self.stopped.wait(self.interval)
+        conn.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join(timeout=5)
+
+
+def run_session(seed, iterations, timeout, latencies, errors, lock):
+    session = Session(seed, timeout)
+    actions = session.actions()
+    for _ in range(iterations):
+        for action in session.rng.sample(actions, len(actions)):
+            started = time.perf_counter()
+            try:
+                at = action()
+                failed = bool(at.exception)
+            except Exception:
+                failed = True
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if failed:
+                    errors.append(action.__name__)
+
+
+def run_level(concurrency, iterations, timeout):
+    latencies, errors, lock = [], [], threading.Lock()
+    sampler = ConnectionSampler()
+    sampler.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(run_session, seed, iterations, timeout, latencies, errors, lock)
+            for seed in range(concurrency)
+        ]
+        for future in futures:
+            future.result()
+    wall = time.perf_counter() - started
+    sampler.stop()
+
+    return {
+        'concurrency': concurrency,
+        'reruns': len(latencies),
+        'throughput': len(latencies) / wall if wall else 0.0,
+        'p50': percentile(latencies, 50),
+        'p99': percentile(latencies, 99),
+        'errors': len(errors),
+        'connections': sampler.peak,
+        'rss_mb': process_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--levels', nargs='*', type=int, default=[1, 2, 4, 8, 16], help="Concurrent sessions per step")
+    parser.add_argument('--iterations', type=int, default=3, help="Rounds of all interactions per session")
+    parser.add_argument('--timeout', type=float, default=120, help="Per-rerun timeout in seconds")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Benchmark output file ('' to disable)")
+    args = parser.parse_args()
+
+    rows = []
+    for level in args.levels:
+        result = run_level(level, args.iterations, args.timeout)
+        rows.append([
+            result['concurrency'],
+            result['reruns'],
+            f"{result['throughput']:.1f}/s",
+            f"{result['p50'] * 1000:.0f}ms",
+            f"{result['p99'] * 1000:.0f}ms",
+            result['errors'],
+            result['connections'] if result['connections'] is not None else 'n/a',
+            f"{result['rss_mb']:.0f}MB",
+        ])
+        print(f"concurrency={level} done: {rows[-1]}")
+
+    body = format_table(
+        ['sessions', 'reruns', 'throughput', 'p50', 'p99', 'errors', 'db_conns', 'rss'], rows
+    )
+    write_report("Concurrent-session load test", body, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Storage footprint and scan time of the old vs migrated column types.
+
+Builds student / exam_scores / study_habits twice in scratch schemas from
+the same seeded data, once with the original types (INT scores, FLOAT hours,
+VARCHAR flags and categories) and once with the migration 005 layout
+(SMALLINT, REAL, BOOLEAN, ENUMs, fixed-width columns first), with the same
+indexes, and reports per table:
+
+- heap      pg_table_size (heap + TOAST + FSM/VM)
+- indexes   pg_indexes_size
+- scans     server-side execution time (EXPLAIN ANALYZE, median of --repeat)
+            of a full-table aggregate and an indexed filter
+
+Usage:
+    python benchmarks/schema_types.py --students 1000000 --repeat 5
+"""
+import argparse
+import re
+import statistics
+
+from common import DEFAULT_OUTPUT, format_table, write_report
+
+from modules.database import DatabaseConnection
+
+GRADES = ['10A', '10B', '10C', '11A', '11B', '11C', '12A', '12B', '12C']
+ETHNICITIES = ['Indonesian', 'Javanese', 'Sundanese']
+
+BEFORE_DDL = """
+    CREATE TABLE {s}.student (
+        id_student INT PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        gender VARCHAR(10),
+        grade_level VARCHAR(20),
+        race_ethnicity VARCHAR(50),
+        date_of_birth DATE
+    );
+    CREATE TABLE {s}.exam_scores (
+        score_id INT PRIMARY KEY,
+        id_student INT NOT NULL,
+        math_score INT,
+        reading_score INT,
+        writing_score INT,
+        avg_score NUMERIC(5,2) GENERATED ALWAYS AS (ROUND((math_score + reading_score + writing_score) / 3.0, 2)) STORED
+    );
+    CREATE TABLE {s}.study_habits (
+        study_habits_id INT PRIMARY KEY,
+        id_student INT NOT NULL,
+        study_hours_per_week FLOAT,
+        prefers_group_study VARCHAR(5),
+        has_private_tutor VARCHAR(5)
+    );
+"""
+
+AFTER_DDL = """
+    CREATE TYPE {s}.student_gender AS ENUM ('Male', 'Female');
+    CREATE TYPE {s}.student_grade_level AS ENUM ({grades});
+    CREATE TYPE {s}.student_race_ethnicity AS ENUM ({ethnicities});
+    CREATE TABLE {s}.student (
+        id_student INT PRIMARY KEY,
+        date_of_birth DATE,
+        gender {s}.student_gender,
+        grade_level {s}.student_grade_level,
+        race_ethnicity {s}.student_race_ethnicity,
+        name VARCHAR(100) NOT NULL
+    );
+    CREATE TABLE {s}.exam_scores (
+        score_id INT PRIMARY KEY,
+        id_student INT NOT NULL,
+        math_score SMALLINT,
+        reading_score SMALLINT,
+        writing_score SMALLINT,
+        avg_score NUMERIC(5,2) GENERATED ALWAYS AS (ROUND((math_score + reading_score + writing_score) / 3.0, 2)) STORED
+    );
+    CREATE TABLE {s}.study_habits (
+        study_habits_id INT PRIMARY KEY,
+        id_student INT NOT NULL,
+        study_hours_per_week REAL,
+        prefers_group_study BOOLEAN,
+        has_private_tutor BOOLEAN
+    );
+"""
+
+# Same rows in both layouts: values are derived from the row number only;
+# INSERT ... SELECT casts them to each layout's column types
+LOAD_SQL = """
+    INSERT INTO {s}.student (id_student, name, gender, grade_level, race_ethnicity, date_of_birth)
+    SELECT i,
+           'Student ' || i,
+           (CASE WHEN i % 2 = 0 THEN 'Male' ELSE 'Female' END)::text::{gender},
+           ((ARRAY[{grades}])[1 + i % {grade_count}])::text::{grade},
+           ((ARRAY[{ethnicities}])[1 + (i / 7) % {ethnicity_count}])::text::{ethnicity},
+           DATE '2006-01-01' + (i % 1095)
+    FROM generate_series(1, {n}) i;
+
+    INSERT INTO {s}.exam_scores (score_id, id_student, math_score, reading_score, writing_score)
+    SELECT i, i, (i * 37) % 101, (i * 53) % 101, (i * 71) % 101
+    FROM generate_series(1, {n}) i;
+
+    INSERT INTO {s}.study_habits (study_habits_id, id_student, study_hours_per_week,
+                                  prefers_group_study, has_private_tutor)
+    SELECT i, i, 2 + (i % 150) / 10.0, {group_flag}, {tutor_flag}
+    FROM generate_series(1, {n}) i;
+
+    CREATE INDEX ON {s}.student (grade_level, id_student);
+    CREATE INDEX ON {s}.exam_scores (avg_score, id_student);
+    CREATE INDEX ON {s}.exam_scores (math_score, id_student);
+    CREATE UNIQUE INDEX ON {s}.exam_scores (id_student);
+    CREATE UNIQUE INDEX ON {s}.study_habits (id_student);
+"""
+
+LAYOUTS = {
+    'before': {
+        'ddl': BEFORE_DDL,
+        'types': {'gender': 'varchar', 'grade': 'varchar', 'ethnicity': 'varchar'},
+        'group_flag': "CASE WHEN i % 2 = 0 THEN 'Yes' ELSE 'No' END",
+        'tutor_flag': "CASE WHEN i % 3 = 0 THEN 'Yes' ELSE 'No' END",
+        'tutor_predicate': "has_private_tutor = 'Yes'",
+    },
+    'after': {
+        'ddl': AFTER_DDL,
+        'types': {'gender': '{s}.student_gender', 'grade': '{s}.student_grade_level',
+                  'ethnicity': '{s}.student_race_ethnicity'},
+        'group_flag': "i % 2 = 0",
+        'tutor_flag': "i % 3 = 0",
+        'tutor_predicate': "has_private_tutor",
+    },
+}
+
+# (table, scan name, query over schema {s}); {tutor} is the layout's flag predicate
+SCANS = [
+    ('student', 'group by grade', "SELECT grade_level, gender, COUNT(*) FROM {s}.student GROUP BY 1, 2"),
+    ('student', 'grade index', "SELECT COUNT(*) FROM {s}.student WHERE grade_level = '11B'"),
+    ('exam_scores', 'avg all scores',
+     "SELECT AVG(math_score), AVG(reading_score), AVG(writing_score) FROM {s}.exam_scores"),
+    ('exam_scores', 'avg_score < 40', "SELECT COUNT(*) FROM {s}.exam_scores WHERE avg_score < 40"),
+    ('study_habits', 'tutor share', "SELECT AVG(study_hours_per_week), COUNT(*) FILTER (WHERE {tutor}) "
+                                    "FROM {s}.study_habits"),
+]
+
+SIZE_SQL = """
+    SELECT c.relname AS table_name, pg_table_size(c.oid) AS heap, pg_indexes_size(c.oid) AS indexes
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname = %s AND c.relkind = 'r'
+"""
+
+
+def quoted(values):
+    return ", ".join(f"'{v}'" for v in values)
+
+
+def build(cursor, schema, layout, students):
+    spec = LAYOUTS[layout]
+    cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE; CREATE SCHEMA {schema};")
+    cursor.execute(spec['ddl'].format(s=schema, grades=quoted(GRADES), ethnicities=quoted(ETHNICITIES)))
+    types = {name: value.format(s=schema) for name, value in spec['types'].items()}
+    cursor.execute(LOAD_SQL.format(
+        s=schema, n=int(students), grades=quoted(GRADES), grade_count=len(GRADES),
+        ethnicities=quoted(ETHNICITIES), ethnicity_count=len(ETHNICITIES),
+        group_flag=spec['group_flag'], tutor_flag=spec['tutor_flag'], **types,
+    ))
+    # Sets hint bits and the visibility map so both layouts scan clean pages
+    for table in ('student', 'exam_scores', 'study_habits'):
+        cursor.execute(f"VACUUM (ANALYZE) {schema}.{table}")
+
+
+def execution_ms(cursor, query):
+    cursor.execute("EXPLAIN (ANALYZE, TIMING OFF) " + query)
+    plan = "\n".join(list(row.values())[0] for row in cursor.fetchall())
+    return float(re.search(r"Execution Time: ([\d.]+) ms", plan).group(1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--students', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--keep', action='store_true', help="Keep the bench_types_* schemas afterwards")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Benchmark output file ('' to disable)")
+    args = parser.parse_args()
+
+    db = DatabaseConnection()
+    if not db.connect():
+        raise SystemExit("Database connection failed")
+    # Loading a million rows outlives every statement timeout class
+    cursor = db.cursor
+    cursor.execute("SET statement_timeout = 0")
+
+    sizes, scans = {}, {}
+    for layout in LAYOUTS:
+        schema = f"bench_types_{layout}"
+        build(cursor, schema, layout, args.students)
+        cursor.execute(SIZE_SQL, (schema,))
+        sizes[layout] = {row['table_name']: row for row in cursor.fetchall()}
+        for table, name, query in SCANS:
+            query = query.format(s=schema, tutor=LAYOUTS[layout]['tutor_predicate'])
+            execution_ms(cursor, query)  # warm the cache
+            scans[layout, name] = statistics.median(execution_ms(cursor, query) for _ in range(args.repeat))
+        if not args.keep:
+            cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+    db.disconnect()
+
+    def mb(value):
+        return f"{value / 1024 ** 2:.1f} MB"
+
+    def change(before, after):
+        return f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+
+    size_rows = []
+    for table in ('student', 'exam_scores', 'study_habits'):
+        before, after = sizes['before'][table], sizes['after'][table]
+        for kind in ('heap', 'indexes'):
+            size_rows.append([table, kind, mb(before[kind]), mb(after[kind]), change(before[kind], after[kind])])
+    scan_rows = [
+        [table, name, f"{scans['before', name]:.1f} ms", f"{scans['after', name]:.1f} ms",
+         change(scans['before', name], scans['after', name])]
+        for table, name, _ in SCANS
+    ]
+
+    body = (format_table(['table', 'size', 'before', 'after', 'change'], size_rows) + "\n\n"
+            + format_table(['table', 'scan', 'before', 'after', 'change'], scan_rows))
+    write_report(f"Schema types ({args.students:,} students, median of {args.repeat})", body, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Cold-start profiler for the Streamlit scripts.
+
+For every page it spawns a fresh interpreter with `-X importtime`, runs the
+script headlessly through streamlit.testing.v1.AppTest and records:
+
+- import-time breakdown (top-level packages by cumulative import time)
+- time to first paint (first element delta sent by the script)
+- full first render and warm rerun time
+
+Usage:
+    python benchmarks/startup_profile.py [--pages app.py pages/02_Analytics.py] [--top 8]
+"""
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+from common import ROOT_DIR, DEFAULT_OUTPUT, format_table, write_report
+
+CHILD_CODE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.delta_generator import DeltaGenerator
+from streamlit.testing.v1 import AppTest
+
+first_delta = []
+_original_enqueue = DeltaGenerator._enqueue
+
+def _timed_enqueue(self, *args, **kwargs):
+    if not first_delta:
+        first_delta.append(time.perf_counter())
+    return _original_enqueue(self, *args, **kwargs)
+
+DeltaGenerator._enqueue = _timed_enqueue
+t_framework = time.perf_counter()
+
+at = AppTest.from_file(sys.argv[1], default_timeout=300)
+t_start = time.perf_counter()
+at.run()
+t_first = time.perf_counter()
+at.run()
+t_rerun = time.perf_counter()
+
+print(json.dumps({
+    'framework_import_s': t_framework - t0,
+    'first_paint_s': (first_delta[0] - t_start) if first_delta else None,
+    'first_render_s': t_first - t_start,
+    'warm_rerun_s': t_rerun - t_first,
+    'exceptions': [str(e.value)[:120] for e in at.exception],
+}))
+"""
+
+
+def default_pages():
+    pages = [os.path.join(ROOT_DIR, 'app.py')]
+    pages += sorted(glob.glob(os.path.join(ROOT_DIR, 'pages', '*.py')))
+    return pages
+
+
+def parse_importtime(stderr, top):
+    """Return the top-level packages with the largest cumulative import time"""
+    totals = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        parts = line.split(':', 1)[1].split('|')
+        if len(parts) != 3:
+            continue
+        _, cumulative_us, name = parts
+        # Nested imports are indented beyond the single separator space
+        if len(name) - len(name.lstrip()) > 1:
+            continue
+        package = name.strip().split('.')[0]
+        totals[package] = totals.get(package, 0) + int(cumulative_us)
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    return ranked[:top]
+
+
+def profile_page(path, top):
+    """Profile one page in a fresh interpreter"""
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD_CODE, path],
+        cwd=ROOT_DIR, capture_output=True, text=True
+    )
+    wall = time.perf_counter() - started
+
+    result = None
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith('{'):
+            result = json.loads(line)
+            break
+    if result is None:
+        tail = proc.stderr.strip().splitlines()[-1:] or ['no output']
+        raise RuntimeError(f"{os.path.basename(path)} failed: {tail[0]}")
+
+    result['cold_start_s'] = wall
+    result['imports'] = parse_importtime(proc.stderr, top)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', nargs='*', help="Scripts to profile (default: app.py and pages/*.py)")
+    parser.add_argument('--top', type=int, default=8, help="Number of packages in the import breakdown")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Benchmark output file ('' to disable)")
+    args = parser.parse_args()
+
+    pages = [os.path.abspath(p) for p in args.pages] if args.pages else default_pages()
+    summary_rows = []
+    sections = []
+
+    for path in pages:
+        name = os.path.relpath(path, ROOT_DIR)
+        try:
+            result = profile_page(path, args.top)
+        except RuntimeError as e:
+            summary_rows.append([name, 'error', '-', '-', '-', str(e)[:60]])
+            continue
+
+        paint = result['first_paint_s']
+        summary_rows.append([
+            name,
+            f"{result['cold_start_s']:.2f}s",
+            f"{paint * 1000:.0f}ms" if paint is not None else '-',
+            f"{result['first_render_s'] * 1000:.0f}ms",
+            f"{result['warm_rerun_s'] * 1000:.0f}ms",
+            '; '.join(result['exceptions']) or 'ok',
+        ])
+        import_rows = [[pkg, f"{us / 1000:.1f}ms"] for pkg, us in result['imports']]
+        sections.append(f"{name} import breakdown\n" + format_table(['package', 'cumulative'], import_rows))
+
+    body = format_table(
+        ['page', 'cold_start', 'first_paint', 'first_render', 'warm_rerun', 'status'], summary_rows
+    )
+    write_report("Cold-start profile", body + "\n\n" + "\n\n".join(sections), args.output)
+
+
+if __name__ == "__main__":
+    main()
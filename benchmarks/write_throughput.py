@@ -0,0 +1,96 @@
+"""
+Write throughput: per-row statements vs batched writes in one transaction.
+
+Writes synthetic score rows into a TEMP table (nothing touches real data)
+with each strategy and reports rows/second:
+
+- row_by_row      execute_insert_update per row (one round trip each)
+- execute_batch   DatabaseConnection.execute_batch, one transaction
+- execute_values  DatabaseConnection.execute_values multi-row INSERT
+- upsert_values   execute_values with ON CONFLICT DO UPDATE over existing rows
+
+Usage:
+    python benchmarks/write_throughput.py --sizes 1000 100000 --page-size 1000
+"""
+import argparse
+import random
+import time
+
+from common import DEFAULT_OUTPUT, format_table, write_report
+
+from modules.database import DatabaseConnection
+
+SETUP_SQL = """
+    DROP TABLE IF EXISTS bench_scores;
+    CREATE TEMP TABLE bench_scores (
+        id_student INT PRIMARY KEY,
+        math_score SMALLINT,
+        reading_score SMALLINT,
+        writing_score SMALLINT
+    );
+"""
+INSERT_SQL = "INSERT INTO bench_scores (id_student, math_score, reading_score, writing_score) VALUES (%s, %s, %s, %s)"
+VALUES_SQL = "INSERT INTO bench_scores (id_student, math_score, reading_score, writing_score) VALUES %s"
+UPSERT_SQL = VALUES_SQL + """
+    ON CONFLICT (id_student) DO UPDATE SET
+        math_score = EXCLUDED.math_score,
+        reading_score = EXCLUDED.reading_score,
+        writing_score = EXCLUDED.writing_score
+"""
+
+
+def make_rows(count, seed=42):
+    rng = random.Random(seed)
+    return [(i, rng.randint(0, 100), rng.randint(0, 100), rng.randint(0, 100)) for i in range(1, count + 1)]
+
+
+def timed(func):
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='*', type=int, default=[1000, 100000])
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--max-row-by-row', type=int, default=10000,
+                        help="Skip the per-row strategy above this size (it takes minutes at 100k)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Benchmark output file ('' to disable)")
+    args = parser.parse_args()
+
+    db = DatabaseConnection()
+    if not db.connect():
+        raise SystemExit("Database connection failed")
+    db.stick_to_primary()
+
+    def reset():
+        db.execute_insert_update(SETUP_SQL)
+
+    table = []
+    for size in args.sizes:
+        rows = make_rows(size)
+        strategies = []
+        if size <= args.max_row_by_row:
+            strategies.append(('row_by_row', lambda: [db.execute_insert_update(INSERT_SQL, row) for row in rows]))
+        strategies += [
+            ('execute_batch', lambda: db.execute_batch(INSERT_SQL, rows, page_size=args.page_size)),
+            ('execute_values', lambda: db.execute_values(VALUES_SQL, rows, page_size=args.page_size)),
+        ]
+        for name, run in strategies:
+            reset()
+            elapsed = timed(run)
+            table.append([size, name, f"{elapsed:.3f}s", f"{size / elapsed:,.0f}"])
+
+        # Upsert over a table that already holds every row
+        updated = make_rows(size, seed=7)
+        elapsed = timed(lambda: db.execute_values(UPSERT_SQL, updated, page_size=args.page_size))
+        table.append([size, 'upsert_values', f"{elapsed:.3f}s", f"{size / elapsed:,.0f}"])
+
+    db.disconnect()
+    body = format_table(['rows', 'strategy', 'elapsed', 'rows/s'], table)
+    write_report(f"Write throughput (page_size={args.page_size})", body, args.output)
+
+
+if __name__ == "__main__":
+    main()
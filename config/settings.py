@@ -1,7 +1,9 @@
 import os
 from dotenv import load_dotenv
 
-load_dotenv()
+# Explicit path: skips find_dotenv()'s call-stack walk on every cold start
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+load_dotenv(os.path.join(BASE_DIR, '.env'))
 
 # Database Configuration
 DB_CONFIG = {
@@ -12,6 +14,105 @@ DB_CONFIG = {
     'password': os.getenv('DB_PASSWORD', ''),
 }
 
+def parse_replica_hosts(value):
+    """Parse 'host1:5433,host2' into per-replica configs sharing DB credentials"""
+    replicas = []
+    for entry in filter(None, (part.strip() for part in value.split(','))):
+        host, _, port = entry.partition(':')
+        replicas.append({**DB_CONFIG, 'host': host, 'port': int(port or DB_CONFIG['port'])})
+    return replicas
+
+# Read Replicas (kosongkan DB_REPLICA_HOSTS untuk hanya memakai primary)
+DB_REPLICAS = parse_replica_hosts(os.getenv('DB_REPLICA_HOSTS', ''))
+
+DB_ROUTING = {
+    'policy': os.getenv('DB_REPLICA_POLICY', 'round_robin'),  # round_robin | least_latency
+    'health_check_interval': int(os.getenv('DB_REPLICA_HEALTH_CHECK_SECONDS', 30)),
+    # Setelah menulis, baca dari primary selama N detik (read-your-writes)
+    'read_your_writes_seconds': int(os.getenv('DB_READ_YOUR_WRITES_SECONDS', 5)),
+}
+
+# statement_timeout per kelas query (ms, 0 = tanpa batas)
+STATEMENT_TIMEOUTS = {
+    'interactive': int(os.getenv('DB_TIMEOUT_INTERACTIVE_MS', 5000)),   # lookup siswa, daftar, pagination
+    'analytic': int(os.getenv('DB_TIMEOUT_ANALYTIC_MS', 30000)),        # agregat & chart
+    'export': int(os.getenv('DB_TIMEOUT_EXPORT_MS', 300000)),           # snapshot / streaming
+    'write': int(os.getenv('DB_TIMEOUT_WRITE_MS', 15000)),
+}
+
+# Reconnect dengan exponential backoff + jitter
+DB_RECONNECT = {
+    'attempts': int(os.getenv('DB_RECONNECT_ATTEMPTS', 4)),
+    'base_delay': float(os.getenv('DB_RECONNECT_BASE_DELAY', 0.2)),
+    'max_delay': float(os.getenv('DB_RECONNECT_MAX_DELAY', 5.0)),
+    'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
+}
+
+# Admission control: slot per kelas query (per proses), antrian FIFO, query identik digabung
+ADMISSION = {
+    'enabled': os.getenv('ADMISSION_ENABLED', '1') != '0',
+    'slots': {
+        'light': int(os.getenv('ADMISSION_LIGHT_SLOTS', 8)),
+        'heavy': int(os.getenv('ADMISSION_HEAVY_SLOTS', 3)),
+    },
+    'queue_timeout': float(os.getenv('ADMISSION_QUEUE_TIMEOUT', 20)),
+    # STATEMENT_TIMEOUTS class -> admission class
+    'classes': {'interactive': 'light', 'write': 'light', 'analytic': 'heavy', 'export': 'heavy'},
+}
+
+# Approximate mode (TABLESAMPLE) untuk chart eksplorasi
+SAMPLING = {
+    'percent': float(os.getenv('SAMPLING_PERCENT', 5)),
+    'method': os.getenv('SAMPLING_METHOD', 'SYSTEM'),  # SYSTEM (per blok, tercepat) | BERNOULLI (per baris)
+    'seed': int(os.getenv('SAMPLING_SEED', 42)),
+}
+
+# Headless JSON API Configuration
+API_CONFIG = {
+    'host': os.getenv('API_HOST', '127.0.0.1'),
+    'port': int(os.getenv('API_PORT', 8600)),
+    'cache_max_age': int(os.getenv('API_CACHE_MAX_AGE', 60)),
+    'default_page_size': 50,
+    'max_page_size': 500,
+    'gzip_min_bytes': 1024,
+    # Connections shared by all request threads; requests wait this long for one
+    'pool_size': int(os.getenv('API_POOL_SIZE', 4)),
+    'pool_timeout': float(os.getenv('API_POOL_TIMEOUT', 10)),
+}
+
+# In-memory analytics snapshot (shared by all sessions of one process)
+SNAPSHOT_TTL_SECONDS = int(os.getenv('SNAPSHOT_TTL_SECONDS', 600))
+
+# Arrow IPC export of the snapshot, memory-mapped by every worker process
+SNAPSHOT_PATH = os.getenv('SNAPSHOT_PATH', os.path.join(BASE_DIR, 'data', 'snapshot.arrow'))
+SNAPSHOT_MAX_AGE_SECONDS = int(os.getenv('SNAPSHOT_MAX_AGE_SECONDS', 3600))
+
+# Trained at-risk model coefficients (python -m modules.risk_model)
+RISK_MODEL_PATH = os.getenv('RISK_MODEL_PATH', os.path.join(BASE_DIR, 'data', 'risk_model.json'))
+
+# Engagement analytics (activities/services) result cache
+ENGAGEMENT_TTL_SECONDS = int(os.getenv('ENGAGEMENT_TTL_SECONDS', 900))
+
+# Background precompute of the unfiltered dashboard aggregates (modules.refresh)
+REFRESH = {
+    'enabled': os.getenv('REFRESH_ENABLED', '1') != '0',
+    'interval': int(os.getenv('REFRESH_INTERVAL_SECONDS', 300)),
+    # Delay before retrying a job whose last refresh failed
+    'retry_delay': int(os.getenv('REFRESH_RETRY_SECONDS', 30)),
+}
+
+# Opt-in memory instrumentation (tracemalloc per page run + DataFrame footprints)
+MEMORY_PROFILING = {
+    'enabled': os.getenv('MEMORY_PROFILING', '0') == '1',
+    'traceback_depth': int(os.getenv('MEMORY_PROFILING_DEPTH', 1)),
+    'top': 20,          # allocation lines kept per run
+    'history': 50,      # runs kept per page
+    'frames': 500,      # execute_query frames kept
+}
+
+# st.fragment untuk bagian halaman dengan widget sendiri (0 = rerun seluruh halaman)
+FRAGMENTS_ENABLED = os.getenv('FRAGMENTS_ENABLED', '1') != '0'
+
 # Application Configuration
 APP_NAME = "Student Performance Analytics"
 APP_ICON = "📊"
@@ -0,0 +1,13 @@
+-- ==============================================================
+-- MIGRATION 001: Stored average score + btree index
+-- Dipakai oleh at-risk filter (modules/at_risk.py) supaya
+-- "avg_score < threshold" bisa memakai index, bukan full scan.
+-- ==============================================================
+
+ALTER TABLE exam_scores
+    ADD COLUMN IF NOT EXISTS avg_score NUMERIC(5,2)
+    GENERATED ALWAYS AS (ROUND((math_score + reading_score + writing_score) / 3.0, 2)) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_exam_scores_avg_score ON exam_scores (avg_score);
+
+ANALYZE exam_scores;
@@ -0,0 +1,19 @@
+-- ==============================================================
+-- MIGRATION 002: Index leaderboard (top-k per nilai)
+-- ORDER BY <nilai> DESC, id_student DESC LIMIT k dijawab dengan
+-- backward index scan tanpa sort. Index (avg_score, id_student)
+-- menggantikan index avg_score tunggal dari migration 001.
+-- ==============================================================
+
+CREATE INDEX IF NOT EXISTS idx_exam_scores_avg_score_id ON exam_scores (avg_score, id_student);
+CREATE INDEX IF NOT EXISTS idx_exam_scores_math_id ON exam_scores (math_score, id_student);
+CREATE INDEX IF NOT EXISTS idx_exam_scores_reading_id ON exam_scores (reading_score, id_student);
+CREATE INDEX IF NOT EXISTS idx_exam_scores_writing_id ON exam_scores (writing_score, id_student);
+
+DROP INDEX IF EXISTS idx_exam_scores_avg_score;
+
+-- Filter leaderboard per grade_level
+CREATE INDEX IF NOT EXISTS idx_student_grade_level ON student (grade_level);
+
+ANALYZE exam_scores;
+ANALYZE student;
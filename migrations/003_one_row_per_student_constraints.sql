@@ -0,0 +1,16 @@
+-- ==============================================================
+-- MIGRATION 003: Satu baris exam_scores / study_habits per siswa
+-- Diperlukan oleh bulk import (INSERT ... ON CONFLICT (id_student)).
+-- Duplikat lama dibuang, baris terbaru (id terbesar) dipertahankan.
+-- ==============================================================
+
+DELETE FROM exam_scores a
+USING exam_scores b
+WHERE a.id_student = b.id_student AND a.score_id < b.score_id;
+
+DELETE FROM study_habits a
+USING study_habits b
+WHERE a.id_student = b.id_student AND a.study_habits_id < b.study_habits_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_exam_scores_id_student ON exam_scores (id_student);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_study_habits_id_student ON study_habits (id_student);
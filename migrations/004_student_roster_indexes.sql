@@ -0,0 +1,15 @@
+-- ==============================================================
+-- MIGRATION 004: Index roster (keyset paging per kolom sort)
+-- ORDER BY <kolom>, id_student LIMIT n dilanjutkan dari cursor
+-- (nilai, id_student) terakhir -> index range scan tanpa OFFSET.
+-- Index (grade_level, id_student) menggantikan index grade_level
+-- tunggal dari migration 002 (filter grade_level tetap terlayani).
+-- ==============================================================
+
+CREATE INDEX IF NOT EXISTS idx_student_name_id ON student (name, id_student);
+CREATE INDEX IF NOT EXISTS idx_student_grade_level_id ON student (grade_level, id_student);
+CREATE INDEX IF NOT EXISTS idx_student_date_of_birth_id ON student (date_of_birth, id_student);
+
+DROP INDEX IF EXISTS idx_student_grade_level;
+
+ANALYZE student;
@@ -0,0 +1,74 @@
+-- ==============================================================
+-- MIGRATION 005: Tipe kolom hemat storage
+-- - Nilai ujian INT -> SMALLINT (0-100)
+-- - study_hours_per_week FLOAT -> REAL, flag VARCHAR(5) -> BOOLEAN
+-- - gender / grade_level / race_ethnicity VARCHAR -> ENUM
+--   (label dibuat dari nilai yang sudah ada; grade diurutkan natural:
+--   9, 10, 10A, 11, ...). Nilai baru ditambahkan dengan
+--   ALTER TYPE student_grade_level ADD VALUE '12D' AFTER '12C';
+-- Setiap tabel ditulis ulang sekali (ALTER TYPE) dan index-nya
+-- dibangun ulang otomatis. Urutan kolom fisik tabel lama tidak
+-- berubah; setup_db.sql memakai urutan baru (kolom fixed-width dulu).
+-- Ukur sebelum/sesudah: python benchmarks/schema_types.py
+-- ==============================================================
+
+BEGIN;
+
+-- 1. exam_scores: avg_score (generated) harus dibuang dulu karena
+-- kolom sumbernya berubah tipe, lalu ditambahkan lagi (satu rewrite)
+ALTER TABLE exam_scores DROP COLUMN avg_score;
+
+ALTER TABLE exam_scores
+    ALTER COLUMN math_score TYPE SMALLINT,
+    ALTER COLUMN reading_score TYPE SMALLINT,
+    ALTER COLUMN writing_score TYPE SMALLINT,
+    ADD COLUMN avg_score NUMERIC(5,2) GENERATED ALWAYS AS (ROUND((math_score + reading_score + writing_score) / 3.0, 2)) STORED;
+
+CREATE INDEX idx_exam_scores_avg_score_id ON exam_scores (avg_score, id_student);
+
+-- 2. study_habits: 'Yes'/'No' (dan 'true'/'false' dari dummy data) -> BOOLEAN
+ALTER TABLE study_habits
+    ALTER COLUMN study_hours_per_week TYPE REAL,
+    ALTER COLUMN prefers_group_study TYPE BOOLEAN USING CASE
+        WHEN lower(trim(prefers_group_study)) IN ('yes', 'y', 'true', 't', '1') THEN TRUE
+        WHEN lower(trim(prefers_group_study)) IN ('no', 'n', 'false', 'f', '0') THEN FALSE
+    END,
+    ALTER COLUMN has_private_tutor TYPE BOOLEAN USING CASE
+        WHEN lower(trim(has_private_tutor)) IN ('yes', 'y', 'true', 't', '1') THEN TRUE
+        WHEN lower(trim(has_private_tutor)) IN ('no', 'n', 'false', 'f', '0') THEN FALSE
+    END;
+
+-- 3. student: ENUM dari nilai yang ada, ketiga kolom dalam satu rewrite
+DO $$
+DECLARE
+    spec RECORD;
+    labels TEXT;
+    changes TEXT[] := '{}';
+BEGIN
+    FOR spec IN
+        SELECT * FROM (VALUES
+            ('student_gender', 'gender'),
+            ('student_grade_level', 'grade_level'),
+            ('student_race_ethnicity', 'race_ethnicity')
+        ) v (type_name, column_name)
+    LOOP
+        EXECUTE format($q$
+            SELECT string_agg(quote_literal(v), ', ' ORDER BY substring(v FROM '^\d+')::int NULLS LAST, v)
+            FROM (SELECT DISTINCT NULLIF(trim(%1$I), '') AS v FROM student) d
+            WHERE v IS NOT NULL
+        $q$, spec.column_name) INTO labels;
+
+        EXECUTE format('CREATE TYPE %I AS ENUM (%s)', spec.type_name, COALESCE(labels, ''));
+        changes := changes || format('ALTER COLUMN %1$I TYPE %2$I USING NULLIF(trim(%1$I), '''')::%2$I',
+                                     spec.column_name, spec.type_name);
+    END LOOP;
+
+    EXECUTE 'ALTER TABLE student ' || array_to_string(changes, ', ');
+END
+$$;
+
+COMMIT;
+
+ANALYZE student;
+ANALYZE exam_scores;
+ANALYZE study_habits;
@@ -0,0 +1,189 @@
+"""
+Admission control for reads.
+
+Every execute_query call is tagged light or heavy (from its statement-timeout
+class, see ADMISSION['classes']) and must hold one of that class's slots
+while it runs, so a burst of sessions opening the analytics pages queues in
+the app instead of saturating PostgreSQL. Waiters are admitted strictly in
+arrival order, give up their place when their run is superseded, and fail
+after `queue_timeout`. Identical reads already in flight in another session
+are coalesced: the newcomer waits for that execution and gets a copy of its
+result instead of running the query again. Slot counts are per process.
+"""
+import collections
+import threading
+import time
+from contextlib import contextmanager
+
+from config.settings import ADMISSION
+from modules.cancellation import QuerySuperseded, superseded_check
+
+POLL_INTERVAL = 0.1
+
+
+class AdmissionTimeout(Exception):
+    """No slot became free within the queue timeout"""
+
+
+class FairSemaphore:
+    """Counting semaphore that admits waiters in arrival order (no barging)"""
+
+    def __init__(self, slots):
+        self.slots = slots
+        self.in_use = 0
+        self._waiters = collections.deque()
+        self._lock = threading.Lock()
+
+    @property
+    def queued(self):
+        return len(self._waiters)
+
+    def acquire(self, timeout, cancelled=lambda: False):
+        with self._lock:
+            if self.in_use < self.slots and not self._waiters:
+                self.in_use += 1
+                return
+            ticket = threading.Event()
+            self._waiters.append(ticket)
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if ticket.wait(max(min(POLL_INTERVAL, remaining), 0.0)):
+                return
+            superseded = cancelled()
+            if remaining > 0 and not superseded:
+                continue
+            with self._lock:
+                if ticket.is_set():
+                    # Granted while giving up: pass the slot on
+                    self._release_locked()
+                else:
+                    self._waiters.remove(ticket)
+            if superseded:
+                raise QuerySuperseded()
+            raise AdmissionTimeout()
+
+    def release(self):
+        with self._lock:
+            self._release_locked()
+
+    def _release_locked(self):
+        if self._waiters:
+            # Hand the slot straight to the oldest waiter
+            self._waiters.popleft().set()
+        else:
+            self.in_use -= 1
+
+
+def _percentile(ordered, q):
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)] if ordered else 0.0
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.followers = 0
+        # Private copy for followers, so the leader's caller may mutate its frame
+        self.shared = None
+
+
+class AdmissionController:
+    """Per-class fair slots, in-flight coalescing and queue-wait metrics"""
+
+    def __init__(self, slots=ADMISSION['slots'], queue_timeout=ADMISSION['queue_timeout'], history=1000):
+        self.pools = {name: FairSemaphore(count) for name, count in slots.items()}
+        self.queue_timeout = queue_timeout
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._waits = {name: collections.deque(maxlen=history) for name in slots}
+        self._counters = {
+            name: collections.Counter(admitted=0, coalesced=0, timed_out=0, superseded=0)
+            for name in slots
+        }
+
+    @contextmanager
+    def slot(self, weight):
+        """Hold one `weight` slot for the duration of the block"""
+        pool = self.pools[weight]
+        started = time.monotonic()
+        try:
+            pool.acquire(self.queue_timeout, superseded_check())
+        except AdmissionTimeout:
+            self._count(weight, 'timed_out')
+            raise
+        except QuerySuperseded:
+            self._count(weight, 'superseded')
+            raise
+        with self._lock:
+            self._waits[weight].append(time.monotonic() - started)
+            self._counters[weight]['admitted'] += 1
+        try:
+            yield
+        finally:
+            pool.release()
+
+    def run(self, key, weight, compute):
+        """compute() under a slot, sharing the result with identical calls in flight.
+
+        Only non-empty results are shared; a follower whose leader came back
+        empty (error, timeout or cancelled run) executes the query itself.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.followers += 1
+        if not leader:
+            cancelled = superseded_check()
+            while not flight.done.wait(POLL_INTERVAL):
+                if cancelled():
+                    self._count(weight, 'superseded')
+                    raise QuerySuperseded()
+            if flight.shared is not None:
+                self._count(weight, 'coalesced')
+                return flight.shared.copy()
+            with self.slot(weight):
+                return compute()
+        result = None
+        try:
+            with self.slot(weight):
+                result = compute()
+            return result
+        finally:
+            with self._lock:
+                # Unlisted from here on, so no follower can join any more
+                self._flights.pop(key, None)
+            if flight.followers and result is not None and not result.empty:
+                flight.shared = result.copy()
+            flight.done.set()
+
+    def _count(self, weight, counter):
+        with self._lock:
+            self._counters[weight][counter] += 1
+
+    def metrics(self):
+        """Per-class slots, queue depth, counters and wait percentiles (seconds)"""
+        with self._lock:
+            rows = {}
+            for name, pool in self.pools.items():
+                waits = sorted(self._waits[name])
+                rows[name] = {
+                    'slots': pool.slots,
+                    'in_use': pool.in_use,
+                    'queued': pool.queued,
+                    **self._counters[name],
+                    'wait_p50': _percentile(waits, 0.50),
+                    'wait_p95': _percentile(waits, 0.95),
+                    'wait_max': waits[-1] if waits else 0.0,
+                }
+            return rows
+
+
+admission = AdmissionController()
+
+
+def query_key(query, params, query_class):
+    """Coalescing key of a read (sql.Composed has a deterministic repr)"""
+    return (query if isinstance(query, str) else repr(query), repr(params), query_class)
@@ -0,0 +1,250 @@
+"""
+Headless JSON API for the dashboard aggregates.
+
+Serves the same numbers the Streamlit pages show, built on the
+DatabaseConnection queries, without going through the Streamlit process.
+
+Run with:
+    python -m modules.api
+"""
+import gzip
+import hashlib
+import json
+import queue
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from config.settings import API_CONFIG
+from modules.database import DatabaseConnection, GROUP_COLUMNS, SCORE_COLUMNS
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ConnectionPool:
+    """A few DatabaseConnections shared by the request threads.
+
+    ThreadingHTTPServer starts a thread per request, so connections are
+    borrowed for one request instead of being tied to a thread; each one is
+    used by a single request at a time (DatabaseConnection has one cursor).
+    """
+
+    def __init__(self, size=API_CONFIG['pool_size'], timeout=API_CONFIG['pool_timeout']):
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._all = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise ApiError(503, "Database busy")
+        db = None
+        try:
+            try:
+                db = self._idle.get_nowait()
+            except queue.Empty:
+                db = DatabaseConnection()
+                with self._lock:
+                    self._all.append(db)
+            if not db.ensure_connected():
+                raise ApiError(503, "Database unavailable")
+            yield db
+        finally:
+            if db is not None:
+                self._idle.put(db)
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            for db in self._all:
+                db.disconnect()
+            self._all.clear()
+
+
+pool = ConnectionPool()
+
+
+def checked(db, df):
+    """Raise 503 when the query behind `df` failed instead of returning no rows"""
+    if db.query_failed():
+        raise ApiError(503, "Database unavailable")
+    return df
+
+
+def json_default(value):
+    """Serialize DB/numpy values that json does not handle natively"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def to_records(df):
+    """Convert a DataFrame into a list of plain dicts"""
+    if df is None or df.empty:
+        return []
+    return df.astype(object).where(df.notna(), None).to_dict(orient='records')
+
+
+def get_int_param(query, name, default, minimum=None, maximum=None):
+    """Read an integer query-string parameter with bounds checking"""
+    raw = query.get(name, [None])[0]
+    if raw is None or raw == '':
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ApiError(400, f"Parameter '{name}' must be an integer")
+    if minimum is not None and value < minimum:
+        raise ApiError(400, f"Parameter '{name}' must be >= {minimum}")
+    if maximum is not None and value > maximum:
+        value = maximum
+    return value
+
+
+# --- Endpoint handlers ---
+def handle_kpis(db, query):
+    kpis = to_records(checked(db, db.get_dashboard_kpis()))
+    return kpis[0] if kpis else {}
+
+
+def handle_averages(db, query):
+    group_by = query.get('by', ['grade_level'])[0]
+    if group_by not in GROUP_COLUMNS:
+        raise ApiError(400, f"'by' must be one of: {', '.join(GROUP_COLUMNS)}")
+    return {'group_by': group_by, 'groups': to_records(checked(db, db.get_score_averages(group_by)))}
+
+
+def handle_histogram(db, query):
+    subject = query.get('subject', ['math_score'])[0]
+    if subject not in SCORE_COLUMNS:
+        raise ApiError(400, f"'subject' must be one of: {', '.join(SCORE_COLUMNS)}")
+    bins = get_int_param(query, 'bins', 20, minimum=1, maximum=100)
+    return {'subject': subject, 'bins': bins, 'buckets': to_records(checked(db, db.get_score_histogram(subject, bins)))}
+
+
+def handle_students(db, query):
+    page = get_int_param(query, 'page', 1, minimum=1)
+    page_size = get_int_param(query, 'page_size', API_CONFIG['default_page_size'],
+                              minimum=1, maximum=API_CONFIG['max_page_size'])
+    search = query.get('q', [None])[0]
+    rows = to_records(checked(db, db.get_students_page(search, page_size, (page - 1) * page_size)))
+    total = rows[0]['total_count'] if rows else 0
+    for row in rows:
+        row.pop('total_count', None)
+    return {
+        'page': page,
+        'page_size': page_size,
+        'total': total,
+        'has_next': page * page_size < total,
+        'students': rows,
+    }
+
+
+def handle_student(db, query, student_id):
+    try:
+        student_id = int(student_id)
+    except ValueError:
+        raise ApiError(400, "Student id must be an integer")
+    rows = to_records(checked(db, db.get_student_with_details(student_id)))
+    if not rows:
+        raise ApiError(404, f"Student {student_id} not found")
+    return rows[0]
+
+
+ROUTES = {
+    '/api/kpis': handle_kpis,
+    '/api/averages': handle_averages,
+    '/api/histogram': handle_histogram,
+    '/api/students': handle_students,
+}
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    server_version = "StudentAnalyticsAPI/1.0"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        path = url.path.rstrip('/') or '/'
+
+        try:
+            if path in ROUTES:
+                with pool.connection() as db:
+                    payload = ROUTES[path](db, query)
+            elif path.startswith('/api/students/'):
+                with pool.connection() as db:
+                    payload = handle_student(db, query, path.rsplit('/', 1)[1])
+            else:
+                raise ApiError(404, f"Unknown endpoint: {path}")
+        except ApiError as e:
+            self.send_json({'error': e.message}, status=e.status, cacheable=False)
+            return
+        except Exception as e:
+            self.send_json({'error': f"Internal error: {str(e)[:100]}"}, status=500, cacheable=False)
+            return
+
+        self.send_json(payload)
+
+    def send_json(self, payload, status=200, cacheable=True):
+        """Send a JSON response with ETag, Cache-Control and optional gzip"""
+        body = json.dumps(payload, default=json_default, separators=(',', ':')).encode('utf-8')
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+
+        if cacheable and etag in self.headers.get('If-None-Match', ''):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', f"public, max-age={API_CONFIG['cache_max_age']}")
+            self.end_headers()
+            return
+
+        encoding = None
+        if len(body) >= API_CONFIG['gzip_min_bytes'] and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzip.compress(body, compresslevel=5)
+            encoding = 'gzip'
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Vary', 'Accept-Encoding')
+        if cacheable:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', f"public, max-age={API_CONFIG['cache_max_age']}")
+        else:
+            self.send_header('Cache-Control', 'no-store')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(host=None, port=None):
+    """Run the JSON API server until interrupted"""
+    host = host or API_CONFIG['host']
+    port = port or API_CONFIG['port']
+    server = ThreadingHTTPServer((host, port), ApiRequestHandler)
+    print(f"Serving JSON API on http://{host}:{port}/api/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.close()
+
+
+if __name__ == "__main__":
+    serve()
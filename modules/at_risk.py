@@ -0,0 +1,60 @@
+"""
+At-risk lookup backed by the stored exam_scores.avg_score column.
+
+The students below the highest selectable threshold are loaded once, sorted
+by average score (an index range scan on idx_exam_scores_avg_score_id). Any
+threshold is then answered with a binary search over the sorted scores, so
+moving the slider does not touch the database.
+"""
+from modules.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+AT_RISK_QUERY = """
+    SELECT
+        s.id_student,
+        s.name,
+        s.grade_level,
+        es.math_score,
+        es.reading_score,
+        es.writing_score,
+        es.avg_score::float8 as avg_score,
+        sh.study_hours_per_week,
+        sh.has_private_tutor
+    FROM exam_scores es
+    JOIN student s ON s.id_student = es.id_student
+    LEFT JOIN study_habits sh ON s.id_student = sh.id_student
+    WHERE es.avg_score < %s
+    ORDER BY es.avg_score ASC, es.id_student ASC
+"""
+
+
+class AtRiskIndex:
+    """Students sorted by average score, answering thresholds in memory"""
+
+    def __init__(self, frame, max_threshold):
+        self.frame = frame.reset_index(drop=True)
+        self.max_threshold = max_threshold
+        if frame.empty:
+            self.scores = np.empty(0, dtype=np.float64)
+        else:
+            self.scores = self.frame['avg_score'].to_numpy(dtype=np.float64)
+
+    @classmethod
+    def load(cls, db, max_threshold):
+        """Load every student with avg_score below `max_threshold`, sorted ascending"""
+        frame = db.execute_query(AT_RISK_QUERY, (float(max_threshold),))
+        return cls(frame, max_threshold)
+
+    def count_below(self, threshold):
+        """Number of students with an average strictly below `threshold`"""
+        if threshold > self.max_threshold:
+            raise ValueError(f"Threshold {threshold} exceeds loaded maximum {self.max_threshold}")
+        return int(np.searchsorted(self.scores, threshold, side='left'))
+
+    def below(self, threshold):
+        """Rows for students below `threshold`, lowest average first"""
+        return self.frame.iloc[:self.count_below(threshold)]
+
+    def __len__(self):
+        return len(self.scores)
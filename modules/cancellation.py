@@ -0,0 +1,123 @@
+"""
+Cancel in-flight queries whose Streamlit run has been superseded.
+
+A query blocks its script thread inside libpq, so Streamlit cannot interrupt
+it when the user changes a widget. Each query registers its connection with
+a process-wide watchdog thread together with the run's script requests; when
+a rerun or stop is queued for that run, the watchdog sends a cancel request
+(PQcancel, safe from another thread) and the backend is freed immediately
+instead of finishing work nobody will see. Connections may be shared by
+sessions (st.cache_resource), so a query is only registered while its
+thread holds the connection lock: a cancel can never hit a statement that
+another session is running on the same connection.
+"""
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+
+
+class QuerySuperseded(Exception):
+    """The query was cancelled because a newer rerun replaced its script run"""
+
+
+def _current_requests():
+    """Script requests of the calling Streamlit run, or None outside Streamlit"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return getattr(ctx, 'script_requests', None) if ctx is not None else None
+
+
+def _superseded(requests):
+    # ScriptRequests keeps the pending request in a private field; read it
+    # without consuming it (the script runner acts on it at its next yield)
+    state = getattr(requests, '_state', None)
+    return getattr(state, 'name', None) in ('RERUN', 'STOP')
+
+
+def superseded_check():
+    """Callable telling whether the calling run has been superseded since
+    (always False outside Streamlit); for code that waits without a query"""
+    requests = _current_requests()
+    if requests is None:
+        return lambda: False
+    return lambda: _superseded(requests)
+
+
+class _Guard:
+    def __init__(self, conn, requests):
+        self.conn = conn
+        self.requests = requests
+        self.cancelled = False
+
+
+class QueryWatchdog:
+    """Polls registered queries and cancels the superseded ones"""
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self._guards = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def _ensure_running(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="query-watchdog", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                idle = not self._guards
+                if idle:
+                    self._wakeup.clear()
+            if idle:
+                # Sleep until the next query registers
+                self._wakeup.wait()
+                continue
+            time.sleep(self.interval)
+            # Cancel under the lock: a guard still registered means its
+            # statement has not returned, so the cancel cannot hit a later one
+            with self._lock:
+                for guard in self._guards.values():
+                    if not guard.cancelled and _superseded(guard.requests):
+                        guard.cancelled = True
+                        try:
+                            guard.conn.cancel()
+                        except psycopg2.Error:
+                            pass
+
+    @contextmanager
+    def guard(self, conn, conn_lock):
+        """Hold `conn_lock` and watch `conn` for the duration of one statement"""
+        with conn_lock:
+            requests = _current_requests()
+            if requests is None:
+                yield None
+                return
+            guard = _Guard(conn, requests)
+            key = next(self._ids)
+            with self._lock:
+                self._guards[key] = guard
+                self._ensure_running()
+                self._wakeup.set()
+            try:
+                yield guard
+            except psycopg2.extensions.QueryCanceledError:
+                if guard.cancelled:
+                    raise QuerySuperseded() from None
+                raise
+            finally:
+                # Unregistered before the lock is released to the next statement
+                with self._lock:
+                    self._guards.pop(key, None)
+
+
+watchdog = QueryWatchdog()
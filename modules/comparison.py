@@ -0,0 +1,277 @@
+"""
+Single-pass comparison engine.
+
+Computes count/mean/std/min/quartiles/max for every requested grouping of
+student dimensions in one GROUPING SETS (or CUBE) query, and returns a tidy
+frame that pages slice with `select_grouping` instead of re-querying.
+"""
+from itertools import combinations
+
+from psycopg2 import sql
+
+from modules.filters import build_filter
+from modules.lazy import lazy_import
+
+go = lazy_import("plotly.graph_objects")
+pd = lazy_import("pandas")
+
+# name -> (SQL expression over student `s`, join alias it needs); enums as text
+# so every dimension accepts text labels (COALESCE(..., 'Unknown'))
+DIMENSIONS = {
+    'grade_level': ("s.grade_level::text", None),
+    'gender': ("s.gender::text", None),
+    'race_ethnicity': ("s.race_ethnicity::text", None),
+    'parental_education': ("pb.parental_level_of_education", 'pb'),
+    'tutor': ("CASE WHEN sh.has_private_tutor THEN 'With Tutor' ELSE 'No Tutor' END", 'sh'),
+    'lunch_status': ("COALESCE(lunch.service_status, 'Standard')", 'lunch'),
+    'test_prep': ("""CASE WHEN EXISTS (
+            SELECT 1 FROM student_services ss
+            JOIN services srv ON ss.service_id = srv.service_id
+            WHERE ss.id_student = s.id_student AND srv.service_name = 'Test Preparation Course'
+        ) THEN 'Completed' ELSE 'None' END""", None),
+}
+
+# LATERAL ... LIMIT 1 keeps exactly one row per student (no fan-out)
+JOINS = {
+    'sh': "LEFT JOIN study_habits sh ON sh.id_student = s.id_student",
+    'pb': """LEFT JOIN LATERAL (
+            SELECT p.parental_level_of_education
+            FROM parent_background p
+            WHERE p.id_student = s.id_student
+            ORDER BY p.parent_id
+            LIMIT 1
+        ) pb ON TRUE""",
+    'lunch': """LEFT JOIN LATERAL (
+            SELECT ss.service_status
+            FROM student_services ss
+            JOIN services srv ON ss.service_id = srv.service_id
+            WHERE ss.id_student = s.id_student AND srv.service_name = 'Lunch Program'
+            LIMIT 1
+        ) lunch ON TRUE""",
+}
+
+# name -> (SQL expression over exam_scores `e` / study_habits `sh`, join alias it needs)
+MEASURES = {
+    'math_score': ("e.math_score", None),
+    'reading_score': ("e.reading_score", None),
+    'writing_score': ("e.writing_score", None),
+    'average_score': ("(e.math_score + e.reading_score + e.writing_score) / 3.0", None),
+    'study_hours_per_week': ("sh.study_hours_per_week", 'sh'),
+}
+
+STAT_COLUMNS = ['count', 'mean', 'std', 'min', 'p25', 'median', 'p75', 'max']
+
+
+def _label(dimensions):
+    """Order-independent name of a grouping, e.g. 'gender+grade_level'"""
+    return '+'.join(sorted(dimensions)) or 'overall'
+
+
+def _validate(names, allowed, kind):
+    unknown = [n for n in names if n not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown {kind}: {', '.join(unknown)}")
+
+
+def build_comparison_query(dimensions, measures, groupings, cube=False):
+    """Build the single GROUPING SETS / CUBE query as SQL text"""
+    aliases = {DIMENSIONS[d][1] for d in dimensions} | {MEASURES[m][1] for m in measures}
+    joins = "\n        ".join(JOINS[a] for a in JOINS if a in aliases)
+
+    base_columns = [f"{DIMENSIONS[d][0]} AS {d}" for d in dimensions]
+    base_columns += [f"({MEASURES[m][0]})::float8 AS {m}" for m in measures]
+    measure_values = ", ".join(f"('{m}', b.{m})" for m in measures)
+    dim_columns = ", ".join(f"b.{d}" for d in dimensions)
+
+    if cube:
+        grouping_clause = f"m.measure, CUBE ({dim_columns})"
+    else:
+        sets = ["(m.measure" + "".join(f", b.{d}" for d in group) + ")" for group in groupings]
+        grouping_clause = f"GROUPING SETS ({', '.join(sets)})"
+
+    return f"""
+    WITH base AS (
+        SELECT {', '.join(base_columns)}
+        FROM student s
+        JOIN exam_scores e ON e.id_student = s.id_student
+        {joins}
+    )
+    SELECT
+        GROUPING({dim_columns}) AS grouping_id,
+        {dim_columns},
+        m.measure,
+        COUNT(m.value) AS count,
+        AVG(m.value) AS mean,
+        STDDEV_SAMP(m.value) AS std,
+        MIN(m.value) AS min,
+        percentile_cont(ARRAY[0.25, 0.5, 0.75]) WITHIN GROUP (ORDER BY m.value) AS quartiles,
+        MAX(m.value) AS max
+    FROM base b
+    CROSS JOIN LATERAL (VALUES {measure_values}) AS m(measure, value)
+    GROUP BY {grouping_clause}
+    """
+
+
+def compare(db, dimensions, measures=None, groupings=None, cube=False, include_overall=True):
+    """Compute summary statistics for all requested groupings in one query.
+
+    `groupings` is a list of dimension tuples (default: each dimension on its
+    own); `cube=True` computes every combination instead. Returns a tidy frame
+    with a `grouping` label, one column per dimension (None when the row is
+    not grouped by it), `measure` and the STAT_COLUMNS.
+    """
+    dimensions = list(dimensions)
+    measures = list(measures or ['math_score', 'reading_score', 'writing_score'])
+    _validate(dimensions, DIMENSIONS, "dimension")
+    _validate(measures, MEASURES, "measure")
+    if not dimensions:
+        raise ValueError("At least one dimension is required")
+
+    if groupings is None:
+        groupings = [(d,) for d in dimensions]
+    groupings = [tuple(g) if isinstance(g, (list, tuple)) else (g,) for g in groupings]
+    for group in groupings:
+        _validate(group, dimensions, "grouping dimension")
+    if include_overall and () not in groupings:
+        groupings.append(())
+
+    df = db.execute_query(build_comparison_query(dimensions, measures, groupings, cube))
+    if df.empty:
+        return pd.DataFrame(columns=['grouping'] + dimensions + ['measure'] + STAT_COLUMNS)
+
+    # GROUPING() sets bit (n-1-i) when dimension i is rolled up
+    n = len(dimensions)
+    def grouping_label(grouping_id):
+        used = [d for i, d in enumerate(dimensions) if not (int(grouping_id) >> (n - 1 - i)) & 1]
+        return _label(used)
+
+    df['grouping'] = df['grouping_id'].map(grouping_label)
+    if cube and not include_overall:
+        df = df[df['grouping'] != 'overall']
+
+    quartiles = df['quartiles'].apply(lambda q: list(q) if q is not None else [None] * 3)
+    df['p25'] = quartiles.str[0]
+    df['median'] = quartiles.str[1]
+    df['p75'] = quartiles.str[2]
+    for column in STAT_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+
+    return df[['grouping'] + dimensions + ['measure'] + STAT_COLUMNS].reset_index(drop=True)
+
+
+def select_grouping(result, *dimensions, measure=None):
+    """Slice the rows for exactly one grouping (and optionally one measure)"""
+    rows = result[result['grouping'] == _label(dimensions)]
+    if measure is not None:
+        rows = rows[rows['measure'] == measure]
+    columns = list(dimensions) + ['measure'] + STAT_COLUMNS
+    return rows[columns].reset_index(drop=True)
+
+
+def pivot_stat(result, dimension, stat='mean'):
+    """Wide frame of one statistic: one row per group, one column per measure"""
+    rows = select_grouping(result, dimension)
+    return rows.pivot(index=dimension, columns='measure', values=stat)
+
+
+def all_pairs(dimensions):
+    """Convenience groupings: every single dimension plus every pair"""
+    dimensions = list(dimensions)
+    return [(d,) for d in dimensions] + list(combinations(dimensions, 2))
+
+
+BOX_COLUMNS = ['group', 'measure', 'count', 'q1', 'median', 'q3', 'lowerfence', 'upperfence',
+               'outlier_count', 'outliers']
+
+
+def build_box_query(measures, dimension=None):
+    """Five-number summary, Tukey fences and outliers per (group, measure) as SQL text"""
+    aliases = {MEASURES[m][1] for m in measures}
+    if dimension is not None:
+        aliases.add(DIMENSIONS[dimension][1])
+        group_expr = f"COALESCE({DIMENSIONS[dimension][0]}, 'Unknown')"
+    else:
+        group_expr = "'All'"
+    joins = "\n        ".join(JOINS[a] for a in JOINS if a in aliases)
+    measure_values = ", ".join(f"('{m}', ({MEASURES[m][0]})::float8)" for m in measures)
+
+    return f"""
+    WITH vals AS MATERIALIZED (
+        SELECT {group_expr} AS grp, m.measure, m.value
+        FROM student s
+        JOIN exam_scores e ON e.id_student = s.id_student
+        {joins}
+        CROSS JOIN LATERAL (VALUES {measure_values}) AS m(measure, value)
+        WHERE m.value IS NOT NULL AND {{where}}
+    ),
+    bounds AS (
+        SELECT grp, measure, COUNT(*) AS n,
+               percentile_cont(ARRAY[0.25, 0.5, 0.75]) WITHIN GROUP (ORDER BY value) AS q
+        FROM vals
+        GROUP BY grp, measure
+    ),
+    fences AS (
+        SELECT grp, measure, n, q[1] AS q1, q[2] AS median, q[3] AS q3,
+               q[1] - 1.5 * (q[3] - q[1]) AS lo,
+               q[3] + 1.5 * (q[3] - q[1]) AS hi
+        FROM bounds
+    )
+    SELECT f.grp AS "group", f.measure, f.n AS count, f.q1, f.median, f.q3,
+           MIN(v.value) FILTER (WHERE v.value >= f.lo) AS lowerfence,
+           MAX(v.value) FILTER (WHERE v.value <= f.hi) AS upperfence,
+           COUNT(*) FILTER (WHERE v.value < f.lo OR v.value > f.hi) AS outlier_count,
+           (array_agg(v.value ORDER BY GREATEST(f.lo - v.value, v.value - f.hi) DESC)
+                FILTER (WHERE v.value < f.lo OR v.value > f.hi))[1:%s] AS outliers
+    FROM fences f
+    JOIN vals v ON v.grp = f.grp AND v.measure = f.measure
+    GROUP BY f.grp, f.measure, f.n, f.q1, f.median, f.q3
+    ORDER BY f.grp, f.measure
+    """
+
+
+def box_summaries(db, measures=None, dimension=None, filters=None, max_outliers=200):
+    """Box plot summaries computed in Postgres.
+
+    One row per (group, measure) with q1/median/q3, the whisker ends
+    (most extreme values inside 1.5 IQR) and at most `max_outliers` of the
+    most extreme outlier values, so the payload does not grow with the number
+    of students.
+    """
+    measures = list(measures or ['math_score', 'reading_score', 'writing_score'])
+    _validate(measures, MEASURES, "measure")
+    if dimension is not None:
+        _validate([dimension], DIMENSIONS, "dimension")
+
+    where, params = build_filter(filters)
+    query = sql.SQL(build_box_query(measures, dimension)).format(where=where)
+    df = db.execute_query(query, params + [int(max_outliers)])
+    if df.empty:
+        return pd.DataFrame(columns=BOX_COLUMNS)
+    df['outliers'] = df['outliers'].apply(lambda values: list(values) if values is not None else [])
+    return df[BOX_COLUMNS]
+
+
+def box_figure(summary, x='group', title=None, color=None):
+    """Plotly figure from box_summaries rows (one box per row along `x`)"""
+    fig = go.Figure()
+    fig.add_trace(go.Box(
+        x=summary[x].tolist(),
+        q1=summary['q1'].tolist(),
+        median=summary['median'].tolist(),
+        q3=summary['q3'].tolist(),
+        lowerfence=summary['lowerfence'].tolist(),
+        upperfence=summary['upperfence'].tolist(),
+        boxpoints=False,
+        marker_color=color,
+        name='',
+        showlegend=False,
+    ))
+    outlier_x = [label for label, values in zip(summary[x], summary['outliers']) for _ in values]
+    outlier_y = [value for values in summary['outliers'] for value in values]
+    if outlier_y:
+        fig.add_trace(go.Scatter(
+            x=outlier_x, y=outlier_y, mode='markers', name='Outliers',
+            marker=dict(color=color, symbol='circle-open'), showlegend=False,
+        ))
+    fig.update_layout(title=title)
+    return fig
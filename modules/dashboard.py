@@ -0,0 +1,88 @@
+"""
+Aggregate queries behind the dashboard, analytics and performance pages.
+
+Each function takes the connection plus the sidebar filters (and, where the
+page supports it, the approximate-mode sample) so the same code serves both
+the live, filtered views and the unfiltered results precomputed by the
+background refresh scheduler (modules.refresh).
+"""
+from psycopg2 import sql
+
+from modules.comparison import DIMENSIONS, box_summaries
+from modules.filters import build_filter
+from modules.lazy import lazy_import
+from modules.sampling import sampled_table
+
+pd = lazy_import("pandas")
+
+SUBJECTS = ['math', 'reading', 'writing']
+HISTOGRAM_BINS = 20
+
+SAMPLED_STATS = """
+            COUNT(*) as n,
+            AVG(e.math_score) as math, STDDEV_SAMP(e.math_score) as math_sd,
+            AVG(e.reading_score) as reading, STDDEV_SAMP(e.reading_score) as reading_sd,
+            AVG(e.writing_score) as writing, STDDEV_SAMP(e.writing_score) as writing_sd
+"""
+
+
+# --- Executive dashboard ---
+def score_distribution(db, filters=None, bins=HISTOGRAM_BINS):
+    """Histogram buckets of the three exam scores in long format (subject, score, count)"""
+    frames = []
+    width = 100.0 / bins
+    for subject in SUBJECTS:
+        df = db.get_score_histogram(f"{subject}_score", bins=bins, filters=filters)
+        if df.empty:
+            continue
+        df['subject'] = f"{subject}_score"
+        df['score'] = (df['bucket'].astype(int) - 1) * width + width / 2
+        frames.append(df[['subject', 'score', 'count']])
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['subject', 'score', 'count'])
+
+
+def gender_counts(db, filters=None):
+    where, params = build_filter(filters)
+    return db.execute_query(
+        sql.SQL("SELECT s.gender, COUNT(*) as count FROM student s WHERE {} GROUP BY s.gender").format(where),
+        params
+    )
+
+
+# --- Deep analytics ---
+def test_prep_stats(db, filters=None, sample=None):
+    """Per-subject mean/sd/n for students with and without the test preparation course"""
+    where, params = build_filter(filters)
+    # Status lewat EXISTS (semi-join): satu baris per siswa, berapa pun
+    # jumlah baris student_services-nya (JOIN biasa menggandakan siswa)
+    query = sql.SQL("""
+        SELECT {status} as status,
+               {stats}
+        FROM student s
+        JOIN {scores} ON s.id_student = e.id_student
+        WHERE {where}
+        GROUP BY status
+    """).format(status=sql.SQL(DIMENSIONS['test_prep'][0]), stats=sql.SQL(SAMPLED_STATS),
+                scores=sampled_table('exam_scores', 'e', sample), where=where)
+    return db.execute_query(query, params)
+
+
+def ethnicity_stats(db, filters=None, sample=None):
+    """Per-subject mean/sd/n by race_ethnicity"""
+    where, params = build_filter(filters)
+    query = sql.SQL("""
+        SELECT s.race_ethnicity,
+               {stats}
+        FROM student s
+        JOIN {scores} ON s.id_student = e.id_student
+        WHERE {where}
+        GROUP BY s.race_ethnicity
+        ORDER BY s.race_ethnicity
+    """).format(stats=sql.SQL(SAMPLED_STATS), scores=sampled_table('exam_scores', 'e', sample), where=where)
+    return db.execute_query(query, params)
+
+
+# --- Performance ---
+def score_spread(db, filters=None):
+    """Box plot summaries of the three exam scores"""
+    return box_summaries(db, [f"{subject}_score" for subject in SUBJECTS], filters=filters)
@@ -1,9 +1,23 @@
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
 import psycopg2
-from psycopg2.extras import RealDictCursor
-import pandas as pd
+from psycopg2 import sql
+from psycopg2.extras import RealDictCursor, execute_batch, execute_values
 import streamlit as st
-from config.settings import DB_CONFIG
-import numpy as np
+from config.settings import ADMISSION, DB_CONFIG, DB_RECONNECT, DB_ROUTING, SNAPSHOT_PATH, STATEMENT_TIMEOUTS
+from modules.admission import AdmissionTimeout, admission, query_key
+from modules.cancellation import QuerySuperseded, watchdog
+from modules.filters import build_filter, student_id_filter
+from modules.lazy import lazy_import
+from modules.memory_profile import record_frame
+from modules.replicas import get_replica_router
+from modules.rerun_cost import count_query
+
+# pandas dimuat saat query pertama, bukan saat halaman di-import
+pd = lazy_import("pandas")
 
 def convert_params(params):
     """Convert numpy types to Python types for psycopg2"""
@@ -11,34 +25,116 @@ def convert_params(params):
         return None
     
     if isinstance(params, (list, tuple)):
+        # numpy scalars expose .item(); checked by module to avoid importing numpy
         return tuple(
-            int(p) if isinstance(p, (np.integer, np.int64)) else 
-            float(p) if isinstance(p, (np.floating, np.float64)) else 
-            p for p in params
+            p.item() if type(p).__module__ == 'numpy' else p
+            for p in params
         )
     return params
 
+# Whitelisted columns for dynamic aggregate queries
+SCORE_COLUMNS = ('math_score', 'reading_score', 'writing_score')
+
+# name -> (row source with one row per student, column)
+GROUP_COLUMNS = {
+    'gender': ('student', 'gender'),
+    'grade_level': ('student', 'grade_level'),
+    'race_ethnicity': ('student', 'race_ethnicity'),
+    # First parent only (as in the parental_education filter), not one row per parent
+    'parental_level_of_education': ("""(
+            SELECT DISTINCT ON (id_student) id_student, parental_level_of_education
+            FROM parent_background
+            ORDER BY id_student, parent_id
+        )""", 'parental_level_of_education'),
+}
+
+# Fail-fast window after connects ran out of attempts; process-wide so that
+# connections created per rerun (or per API worker) also respect it
+_reconnect_after = 0.0
+
+def backoff_delay(attempt):
+    """Exponential backoff with full jitter for the given retry attempt (0-based)"""
+    ceiling = min(DB_RECONNECT['max_delay'], DB_RECONNECT['base_delay'] * 2 ** attempt)
+    return random.uniform(0, ceiling)
+
+def session_state():
+    """The calling Streamlit session's state, or None outside a script run"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    return st.session_state if get_script_run_ctx(suppress_warning=True) is not None else None
+
+# session_state key: monotonic time of the session's last committed write
+LAST_WRITE_KEY = '_db_last_write_at'
+
+def set_statement_timeout(owner, query_class):
+    """SET statement_timeout on `owner`'s session when the query class changes.
+
+    `owner` is the DatabaseConnection or a Replica (anything with `cursor` and
+    `statement_timeout`); the current value is tracked to skip redundant SETs.
+    """
+    timeout = STATEMENT_TIMEOUTS[query_class]
+    if owner.statement_timeout != timeout:
+        owner.cursor.execute("SELECT set_config('statement_timeout', %s, false)", (str(timeout),))
+        owner.statement_timeout = timeout
+
 class DatabaseConnection:
     def __init__(self):
         self.conn = None
         self.cursor = None
+        self.router = get_replica_router()
+        # Read-your-writes outside a Streamlit session (scripts, API, background jobs)
+        self._writes = {}
+        self.sticky_primary = False
+        self.in_transaction = False
+        self._transaction_thread = None
+        self.statement_timeout = None
+        # Serializes statements of sessions sharing this (cached) connection
+        self.lock = threading.RLock()
+        # Outcome of the calling thread's last execute_query (see query_failed)
+        self._status = threading.local()
 
-    def connect(self):
-        """Establish database connection"""
-        try:
-            self.conn = psycopg2.connect(
-                host=DB_CONFIG['host'],
-                port=DB_CONFIG['port'],
-                database=DB_CONFIG['database'],
-                user=DB_CONFIG['user'],
-                password=DB_CONFIG['password']
-            )
-            self.conn.autocommit = True
-            self.cursor = self.conn.cursor(cursor_factory=RealDictCursor)
-            return True
-        except psycopg2.Error as e:
-            st.error(f"❌ Database connection failed: {str(e)}")
+    def connect(self, attempts=None):
+        """Establish database connection, retrying with exponential backoff.
+
+        After all attempts fail, further connects in this process (from any
+        DatabaseConnection) fail fast until `max_delay` has passed, so
+        sessions do not pile onto a struggling server.
+        """
+        global _reconnect_after
+        if time.monotonic() < _reconnect_after:
             return False
+        attempts = attempts or DB_RECONNECT['attempts']
+        error = "no connection attempts configured"
+        for attempt in range(attempts):
+            try:
+                self.conn = psycopg2.connect(
+                    host=DB_CONFIG['host'],
+                    port=DB_CONFIG['port'],
+                    database=DB_CONFIG['database'],
+                    user=DB_CONFIG['user'],
+                    password=DB_CONFIG['password'],
+                    connect_timeout=DB_RECONNECT['connect_timeout'],
+                )
+                self.conn.autocommit = True
+                self.cursor = self.conn.cursor(cursor_factory=RealDictCursor)
+                self.statement_timeout = None
+                _reconnect_after = 0.0
+                return True
+            except psycopg2.Error as e:
+                error = e
+                if attempt + 1 < attempts:
+                    time.sleep(backoff_delay(attempt))
+        _reconnect_after = time.monotonic() + DB_RECONNECT['max_delay']
+        st.error(f"❌ Database connection failed: {str(error)}")
+        return False
+
+    def ensure_connected(self):
+        """Reconnect (with backoff) only when the connection is gone"""
+        if self.conn is not None and not self.conn.closed:
+            return True
+        return self.connect()
 
     def disconnect(self):
         """Close database connection"""
@@ -50,68 +146,297 @@ class DatabaseConnection:
         except:
             pass
 
-    def execute_query(self, query, params=None):
-        """Execute a SELECT query and return results as DataFrame"""
-        try:
-            if self.conn is None or self.conn.closed:
-                self.connect()
-            
-            # Convert numpy types to Python types
-            params = convert_params(params)
-            
+    def stick_to_primary(self):
+        """Route every later read to the primary (read-your-writes session)"""
+        self.sticky_primary = True
+
+    def _write_state(self):
+        """Where the last write is tracked: the Streamlit session (the cached
+        connection is shared by all sessions, page instances live one rerun),
+        or this connection when there is no session"""
+        state = session_state()
+        return state if state is not None else self._writes
+
+    def mark_written(self):
+        """Send this session's reads to the primary for read_your_writes_seconds"""
+        self._write_state()[LAST_WRITE_KEY] = time.monotonic()
+
+    def _owns_transaction(self):
+        """Whether the calling thread is inside this connection's transaction()"""
+        return self.in_transaction and self._transaction_thread == threading.get_ident()
+
+    def requires_primary(self):
+        """Whether reads must see this session's own writes"""
+        if self.sticky_primary or self._owns_transaction():
+            return True
+        last_write_at = self._write_state().get(LAST_WRITE_KEY)
+        return last_write_at is not None and \
+            time.monotonic() - last_write_at < DB_ROUTING['read_your_writes_seconds']
+
+    def read_replica(self):
+        """Replica to serve the next read, or None for the primary"""
+        if self.requires_primary() or not self.router:
+            return None
+        return self.router.choose()
+
+    def _fetch_frame(self, owner, query, params, query_class):
+        with watchdog.guard(owner.conn, owner.lock):
+            set_statement_timeout(owner, query_class)
             if params:
-                self.cursor.execute(query, params)
+                owner.cursor.execute(query, params)
             else:
-                self.cursor.execute(query)
-            
-            results = self.cursor.fetchall()
-            if results:
-                df = pd.DataFrame(results)
-            else:
-                df = pd.DataFrame()
-            return df
-        except psycopg2.Error as e:
-            try:
-                self.conn.rollback()
-            except:
-                pass
-            st.warning(f"⚠️ Query error: {str(e)[:100]}")
-            return pd.DataFrame()
-        except Exception as e:
-            st.warning(f"⚠️ Unexpected error: {str(e)[:100]}")
+                owner.cursor.execute(query)
+            results = owner.cursor.fetchall()
+            executed = owner.cursor.query
+        frame = pd.DataFrame(results) if results else pd.DataFrame()
+        record_frame(frame, executed)
+        return frame
+
+    def _failed(self, warning):
+        """Warn about a failed read and remember it for query_failed()"""
+        self._status.error = warning
+        st.warning(warning)
+        return pd.DataFrame()
+
+    def query_failed(self):
+        """Whether this thread's last execute_query failed (vs. returned no rows).
+
+        execute_query reports errors as an empty frame; callers that must not
+        treat an outage as "no data" (caches, the JSON API) check this.
+        """
+        return getattr(self._status, 'error', None) is not None
+
+    def _timed_out(self, query_class):
+        return self._failed(f"⏱️ Query took longer than {STATEMENT_TIMEOUTS[query_class] / 1000:g}s and was cancelled.")
+
+    def execute_query(self, query, params=None, use_primary=False, query_class='analytic'):
+        """Execute a SELECT query and return results as DataFrame.
+
+        Reads go to a healthy read replica when configured; connection
+        failures there fall back to the primary. `query_class` selects the
+        statement_timeout (see STATEMENT_TIMEOUTS) and the admission class:
+        each read waits for a light/heavy slot, and an identical read already
+        in flight in another session is shared instead of re-run (see
+        modules.admission). A query superseded by a Streamlit rerun is
+        cancelled and returns an empty frame; a lost primary connection is
+        re-established with backoff and the read retried once.
+        """
+        # Convert numpy types to Python types
+        params = convert_params(params)
+        self._status.error = None
+        started = time.perf_counter()
+        try:
+            return self._admit(query, params, use_primary, query_class)
+        finally:
+            # Rerun cost report: queries per page run / fragment rerun
+            count_query(time.perf_counter() - started)
+
+    def _admit(self, query, params, use_primary, query_class):
+        def run():
+            return self._execute(query, params, use_primary, query_class)
+
+        if not ADMISSION['enabled'] or self._owns_transaction():
+            # transaction() holds the connection lock: queueing for a slot here
+            # would stall every session blocked on that lock while holding theirs
+            return run()
+        weight = ADMISSION['classes'][query_class]
+        try:
+            if use_primary or self.requires_primary():
+                # Must not share an in-flight result that predates our writes
+                with admission.slot(weight):
+                    return run()
+            return admission.run(query_key(query, params, query_class), weight, run)
+        except QuerySuperseded:
             return pd.DataFrame()
+        except AdmissionTimeout:
+            return self._failed("⏳ The database is busy right now; some results were skipped. Please retry shortly.")
 
-    def execute_insert_update(self, query, params=None):
-        """Execute INSERT/UPDATE/DELETE query"""
+    def _execute(self, query, params, use_primary, query_class):
+        replica = None if use_primary else self.read_replica()
+        if replica is not None:
+            try:
+                return self._fetch_frame(replica, query, params, query_class)
+            except QuerySuperseded:
+                return pd.DataFrame()
+            except psycopg2.extensions.QueryCanceledError:
+                return self._timed_out(query_class)
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                # Replica unreachable or lagging/conflicting: retry on the primary
+                self.router.mark_down(replica)
+            except psycopg2.Error as e:
+                return self._failed(f"⚠️ Query error: {str(e)[:100]}")
+
+        for attempt in range(2):
+            try:
+                if not self.ensure_connected():
+                    self._status.error = "Database connection unavailable"
+                    return pd.DataFrame()
+                return self._fetch_frame(self, query, params, query_class)
+            except QuerySuperseded:
+                return pd.DataFrame()
+            except psycopg2.extensions.QueryCanceledError:
+                return self._timed_out(query_class)
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                if attempt == 0 and (self.conn is None or self.conn.closed):
+                    # Connection dropped mid-query: reconnect and retry the read
+                    continue
+                return self._failed(f"⚠️ Query error: {str(e)[:100]}")
+            except psycopg2.Error as e:
+                return self._failed(f"⚠️ Query error: {str(e)[:100]}")
+            except Exception as e:
+                return self._failed(f"⚠️ Unexpected error: {str(e)[:100]}")
+        return pd.DataFrame()
+
+    def iter_query(self, query, params=None, chunk_size=50000, query_class='export'):
+        """Stream a SELECT query as (column_names, row_tuples) chunks.
+
+        Uses a server-side cursor so large result sets are never held in
+        memory as one list of dicts.
+        """
+        owner = self.read_replica()
+        if owner is None:
+            if not self.ensure_connected():
+                raise psycopg2.OperationalError("Database connection unavailable")
+            owner = self
+        with owner.lock:
+            set_statement_timeout(owner, query_class)
+        conn = owner.conn
+
+        self._stream_counter = getattr(self, '_stream_counter', 0) + 1
+        cursor = conn.cursor(name=f"stream_{id(self)}_{self._stream_counter}", withhold=True)
+        cursor.itersize = chunk_size
         try:
-            if self.conn is None or self.conn.closed:
-                self.connect()
-            
-            # Convert numpy types to Python types
-            params = convert_params(params)
-            
-            if params:
-                self.cursor.execute(query, params)
-            else:
-                self.cursor.execute(query)
-            
-            self.conn.commit()
-            return True
-        except psycopg2.Error as e:
+            with watchdog.guard(conn, owner.lock):
+                cursor.execute(query, convert_params(params))
+            while True:
+                with watchdog.guard(conn, owner.lock):
+                    rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [column[0] for column in cursor.description], rows
+        finally:
+            cursor.close()
+
+    @contextmanager
+    def transaction(self):
+        """Group writes into one atomic transaction on the primary.
+
+        Usage:
+            with db.transaction():
+                db.execute_insert_update(...)
+                db.execute_values(...)
+
+        Errors inside the block roll everything back and are re-raised.
+        Nested blocks join the outer transaction. The connection lock is
+        held throughout, so other sessions sharing the connection wait
+        instead of running statements inside this transaction.
+        """
+        with self.lock:
+            if self.in_transaction:
+                yield self
+                return
+
+            if not self.ensure_connected():
+                raise psycopg2.OperationalError("Database connection unavailable")
+            set_statement_timeout(self, 'write')
+            self.conn.autocommit = False
+            self.in_transaction = True
+            self._transaction_thread = threading.get_ident()
             try:
-                self.conn.rollback()
-            except:
-                pass
+                yield self
+                self.conn.commit()
+                self.mark_written()
+            except Exception:
+                try:
+                    self.conn.rollback()
+                except psycopg2.Error:
+                    pass
+                raise
+            finally:
+                self.in_transaction = False
+                self._transaction_thread = None
+                if not self.conn.closed:
+                    self.conn.autocommit = True
+
+    def _run_write(self, action, atomic=True):
+        """Run a write on the primary and report errors like other writes.
+
+        Multi-statement writes (`atomic`) get their own transaction; a single
+        statement already is atomic under autocommit and skips BEGIN/COMMIT.
+        """
+        with self.lock:
+            if self.in_transaction:
+                # Let the enclosing transaction() roll back and see the error
+                return action(self.cursor)
+        try:
+            if atomic:
+                with self.transaction():
+                    return action(self.cursor)
+            if not self.ensure_connected():
+                return False
+            with self.lock:
+                set_statement_timeout(self, 'write')
+                result = action(self.cursor)
+            self.mark_written()
+            return result
+        except psycopg2.Error as e:
             st.error(f"❌ Update failed: {str(e)[:100]}")
             return False
         except Exception as e:
-            try:
-                self.conn.rollback()
-            except:
-                pass
             st.error(f"❌ Unexpected error: {str(e)[:100]}")
             return False
 
+    def execute_insert_update(self, query, params=None):
+        """Execute INSERT/UPDATE/DELETE query"""
+        # Convert numpy types to Python types
+        params = convert_params(params)
+
+        def run(cursor):
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+            return True
+
+        return self._run_write(run, atomic=False)
+
+    def execute_batch(self, query, rows, page_size=1000):
+        """Execute one parameterized statement for many rows.
+
+        Statements are sent `page_size` at a time (psycopg2 execute_batch),
+        so N rows cost N / page_size round trips and a single commit.
+        """
+        rows = [convert_params(row) for row in rows]
+
+        def run(cursor):
+            execute_batch(cursor, query, rows, page_size=page_size)
+            return len(rows)
+
+        return self._run_write(run)
+
+    def execute_values(self, query, rows, template=None, page_size=1000, fetch=False):
+        """Multi-row INSERT/UPSERT: `query` contains a single `VALUES %s`.
+
+        Example:
+            db.execute_values(
+                "INSERT INTO exam_scores (id_student, math_score) VALUES %s "
+                "ON CONFLICT (id_student) DO UPDATE SET math_score = EXCLUDED.math_score",
+                [(1, 90), (2, 75)],
+            )
+
+        Returns the row count, or the RETURNING rows as a DataFrame when
+        `fetch` is True.
+        """
+        rows = [convert_params(row) for row in rows]
+
+        def run(cursor):
+            results = execute_values(cursor, query, rows, template=template, page_size=page_size, fetch=fetch)
+            if fetch:
+                return pd.DataFrame(results) if results else pd.DataFrame()
+            return len(rows)
+
+        return self._run_write(run)
+
     def get_all_students(self):
         """Get all students"""
         query = "SELECT * FROM student ORDER BY id_student"
@@ -120,7 +445,7 @@ class DatabaseConnection:
     def get_student_by_id(self, student_id):
         """Get student by ID"""
         query = "SELECT * FROM student WHERE id_student = %s"
-        return self.execute_query(query, (student_id,))
+        return self.execute_query(query, (student_id,), query_class='interactive')
 
     def get_student_with_details(self, student_id):
         """Get student with all related information"""
@@ -134,12 +459,122 @@ class DatabaseConnection:
         LEFT JOIN exam_scores es ON s.id_student = es.id_student
         WHERE s.id_student = %s
         """
-        return self.execute_query(query, (student_id,))
+        return self.execute_query(query, (student_id,), query_class='interactive')
+
+    def get_dashboard_kpis(self, filters=None):
+        """Get headline KPIs for the executive dashboard"""
+        where, params = build_filter(filters)
+        query = sql.SQL("""
+        SELECT
+            COUNT(*) as total_students,
+            AVG(e.math_score) as math,
+            AVG(e.reading_score) as reading,
+            AVG(e.writing_score) as writing,
+            AVG(sh.study_hours_per_week) as hours
+        FROM student s
+        LEFT JOIN exam_scores e ON e.id_student = s.id_student
+        LEFT JOIN study_habits sh ON sh.id_student = s.id_student
+        WHERE {where}
+        """).format(where=where)
+        return self.execute_query(query, params)
+
+    def get_score_averages(self, group_by, filters=None):
+        """Get average exam scores grouped by one demographic column"""
+        if group_by not in GROUP_COLUMNS:
+            raise ValueError(f"Unsupported grouping: {group_by}")
+        source, column = GROUP_COLUMNS[group_by]
+        where, params = student_id_filter(filters, 'g.id_student')
+        query = sql.SQL(f"""
+        SELECT g.{column} as {group_by},
+               COUNT(*) as students,
+               AVG(e.math_score) as math,
+               AVG(e.reading_score) as reading,
+               AVG(e.writing_score) as writing
+        FROM {source} g
+        JOIN exam_scores e ON g.id_student = e.id_student
+        WHERE {{where}}
+        GROUP BY g.{column}
+        ORDER BY g.{column}
+        """).format(where=where)
+        return self.execute_query(query, params)
+
+    def get_score_histogram(self, subject, bins=20, filters=None):
+        """Get histogram bucket counts for one exam score column"""
+        if subject not in SCORE_COLUMNS:
+            raise ValueError(f"Unsupported subject: {subject}")
+        where, params = student_id_filter(filters, 'id_student')
+        query = sql.SQL(f"""
+        SELECT width_bucket({subject}, 0, 100.0001, %s) as bucket,
+               MIN({subject}) as min_score,
+               MAX({subject}) as max_score,
+               COUNT(*) as count
+        FROM exam_scores
+        WHERE {subject} IS NOT NULL AND {{where}}
+        GROUP BY bucket
+        ORDER BY bucket
+        """).format(where=where)
+        return self.execute_query(query, [int(bins)] + params)
+
+    def get_students_page(self, search=None, limit=50, offset=0):
+        """Get one page of students, optionally filtered by name"""
+        query = """
+        SELECT id_student, name, gender, grade_level, race_ethnicity,
+               COUNT(*) OVER () as total_count
+        FROM student
+        WHERE (%s IS NULL OR name ILIKE %s)
+        ORDER BY id_student
+        LIMIT %s OFFSET %s
+        """
+        pattern = f"%{search}%" if search else None
+        return self.execute_query(query, (pattern, pattern, int(limit), int(offset)), query_class='interactive')
 
 @st.cache_resource
+def _shared_connection():
+    db = DatabaseConnection()
+    if not db.connect():
+        # Raised so the failure is not cached; the next run tries again
+        raise psycopg2.OperationalError("Database connection failed")
+    return db
+
 def get_db_connection():
-    """Get cached database connection"""
+    """Process-wide cached database connection, or None while it cannot connect"""
+    try:
+        return _shared_connection()
+    except psycopg2.OperationalError:
+        return None
+
+def export_snapshot(db, path=SNAPSHOT_PATH):
+    """Write the joined student dataset to an Arrow IPC file on local disk.
+
+    The file is written next to the target and renamed into place, so
+    processes that already mapped the previous version keep a valid view.
+    """
+    import pyarrow as pa
+    from modules.snapshot import AnalyticsSnapshot
+
+    table = AnalyticsSnapshot.load(db).to_arrow()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+    os.replace(tmp_path, path)
+    return table.num_rows
+
+def read_snapshot(path=SNAPSHOT_PATH):
+    """Memory-map an exported snapshot; column buffers point into the page cache"""
+    import pyarrow as pa
+
+    source = pa.memory_map(path, 'r')
+    return pa.ipc.open_file(source).read_all()
+
+if __name__ == "__main__":
+    # python -m modules.database [path]  -> export the Arrow snapshot
+    import sys
+
+    target = sys.argv[1] if len(sys.argv) > 1 else SNAPSHOT_PATH
     db = DatabaseConnection()
-    if db.connect():
-        return db
-    return None
+    if not db.connect():
+        sys.exit(1)
+    rows = export_snapshot(db, target)
+    print(f"Exported {rows:,} students to {target}")
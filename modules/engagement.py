@@ -0,0 +1,106 @@
+"""
+Extracurricular and services engagement analytics.
+
+One statement scans the enrolment tables once (deduplicated per student and
+item in a materialized CTE) and returns both the per activity/service
+aggregates and the activity co-participation pairs. Participant vs
+non-participant score deltas are derived from totals, so no per-student rows
+leave the database. Results are cached per filter selection.
+"""
+import streamlit as st
+from psycopg2 import sql
+
+from config.settings import ENGAGEMENT_TTL_SECONDS
+from modules.filters import build_filter
+from modules.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+ENGAGEMENT_QUERY = """
+    WITH students AS MATERIALIZED (
+        SELECT s.id_student, e.avg_score::float8 AS score
+        FROM student s
+        LEFT JOIN exam_scores e ON e.id_student = s.id_student
+        WHERE {where}
+    ),
+    enrolment AS MATERIALIZED (
+        SELECT 'activity' AS kind, a.activity_type AS item, sa.id_student,
+               SUM(sa.hours_per_week) AS hours
+        FROM student_activities sa
+        JOIN activities a ON a.activity_id = sa.activity_id
+        JOIN students st ON st.id_student = sa.id_student
+        GROUP BY a.activity_type, sa.id_student
+        UNION ALL
+        SELECT 'service', srv.service_name, ss.id_student, NULL
+        FROM student_services ss
+        JOIN services srv ON srv.service_id = ss.service_id
+        JOIN students st ON st.id_student = ss.id_student
+        GROUP BY srv.service_name, ss.id_student
+    )
+    SELECT 'item' AS section, en.kind, en.item, NULL AS other_item,
+           COUNT(*) AS participants,
+           SUM(en.hours) AS total_hours,
+           COUNT(st.score) AS scored,
+           SUM(st.score) AS score_sum
+    FROM enrolment en
+    JOIN students st ON st.id_student = en.id_student
+    GROUP BY en.kind, en.item
+    UNION ALL
+    SELECT 'pair', 'activity', x.item, y.item, COUNT(*), NULL, NULL, NULL
+    FROM enrolment x
+    JOIN enrolment y ON y.id_student = x.id_student AND y.kind = 'activity'
+    WHERE x.kind = 'activity'
+    GROUP BY x.item, y.item
+    UNION ALL
+    SELECT 'total', NULL, NULL, NULL, COUNT(*), NULL, COUNT(score), SUM(score)
+    FROM students
+"""
+
+SUMMARY_COLUMNS = ['kind', 'item', 'participants', 'participation_rate', 'avg_hours',
+                   'participant_score', 'non_participant_score', 'score_delta']
+
+
+def summarize(rows):
+    """Split the combined result into the item summary, the co-participation
+    matrix and the student count"""
+    for column in ('participants', 'total_hours', 'scored', 'score_sum'):
+        rows[column] = pd.to_numeric(rows[column], errors='coerce')
+
+    total = rows[rows['section'] == 'total'].iloc[0]
+    students, scored, score_sum = int(total['participants']), total['scored'], total['score_sum']
+
+    items = rows[rows['section'] == 'item'].copy()
+    items['participation_rate'] = items['participants'] / students if students else float('nan')
+    items['avg_hours'] = items['total_hours'] / items['participants']
+    items['participant_score'] = items['score_sum'] / items['scored']
+    rest = scored - items['scored']
+    items['non_participant_score'] = ((score_sum - items['score_sum']) / rest).where(rest > 0)
+    items['score_delta'] = items['participant_score'] - items['non_participant_score']
+    summary = items[SUMMARY_COLUMNS].sort_values(['kind', 'participants'], ascending=[True, False])
+
+    pairs = rows[rows['section'] == 'pair']
+    matrix = pairs.pivot(index='item', columns='other_item', values='participants').fillna(0).astype(int)
+    matrix.index.name, matrix.columns.name = None, None
+
+    return summary.reset_index(drop=True), matrix, students
+
+
+@st.cache_data(ttl=ENGAGEMENT_TTL_SECONDS, show_spinner="Computing engagement analytics...")
+def get_engagement(_db, filters=None):
+    """Cached engagement analytics for one filter selection.
+
+    Returns (summary, co_participation, students): one summary row per
+    activity/service with participation rate, average weekly hours and the
+    participant vs non-participant average score; a square matrix of students
+    sharing each pair of activities (diagonal = participants); and the number
+    of students in the selection. Raises RuntimeError when the query fails,
+    so an outage is not cached as "no data".
+    """
+    where, params = build_filter(filters)
+    rows = _db.execute_query(sql.SQL(ENGAGEMENT_QUERY).format(where=where), params)
+    if _db.query_failed():
+        # Raise agar st.cache_data tidak menyimpan hasil kosong selama TTL
+        raise RuntimeError("Engagement query failed")
+    if rows.empty:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS), pd.DataFrame(), 0
+    return summarize(rows)
@@ -0,0 +1,177 @@
+"""
+Global student filters.
+
+The sidebar selection is kept in st.session_state (so it survives page
+switches) and compiled with psycopg2.sql into a parameterized predicate over
+`student s`. Pages push it into their queries, so Postgres does the filtering
+and only matching rows are transferred.
+"""
+import streamlit as st
+from psycopg2 import sql
+
+STATE_KEY = 'student_filters'
+
+# name -> (sidebar label, predicate over student {s} taking one array parameter);
+# enum columns cast the text[] parameter to their type so indexes still apply
+LIST_FILTERS = {
+    'grade_level': ("Grade Level", "{s}.grade_level = ANY(%s::student_grade_level[])"),
+    'gender': ("Gender", "{s}.gender = ANY(%s::student_gender[])"),
+    'race_ethnicity': ("Race/Ethnicity", "{s}.race_ethnicity = ANY(%s::student_race_ethnicity[])"),
+    'parental_education': ("Parental Education", """(
+            SELECT p.parental_level_of_education
+            FROM parent_background p
+            WHERE p.id_student = {s}.id_student
+            ORDER BY p.parent_id
+            LIMIT 1
+        ) = ANY(%s)"""),
+    'lunch_status': ("Lunch Status", """COALESCE((
+            SELECT ss.service_status
+            FROM student_services ss
+            JOIN services srv ON ss.service_id = srv.service_id
+            WHERE ss.id_student = {s}.id_student AND srv.service_name = 'Lunch Program'
+            LIMIT 1
+        ), 'Standard') = ANY(%s)"""),
+}
+
+# name -> (sidebar label, EXISTS subquery over student {s}); True/False/None
+FLAG_FILTERS = {
+    'tutor': ("Private Tutor", """EXISTS (
+            SELECT 1 FROM study_habits sh
+            WHERE sh.id_student = {s}.id_student AND sh.has_private_tutor
+        )"""),
+    'test_prep': ("Test Preparation", """EXISTS (
+            SELECT 1 FROM student_services ss
+            JOIN services srv ON ss.service_id = srv.service_id
+            WHERE ss.id_student = {s}.id_student AND srv.service_name = 'Test Preparation Course'
+        )"""),
+}
+
+# Filter name -> snapshot column (modules.snapshot)
+SNAPSHOT_COLUMNS = {
+    'grade_level': 'grade_level',
+    'gender': 'gender',
+    'race_ethnicity': 'race_ethnicity',
+    'parental_education': 'parental_education',
+    'lunch_status': 'lunch_status',
+    'tutor': 'has_private_tutor',
+    'test_prep': 'test_prep',
+}
+
+OPTIONS_QUERY = """
+    SELECT 'grade_level' AS dimension, grade_level::text AS value FROM student GROUP BY grade_level
+    UNION ALL
+    SELECT 'gender', gender::text FROM student GROUP BY gender
+    UNION ALL
+    SELECT 'race_ethnicity', race_ethnicity::text FROM student GROUP BY race_ethnicity
+    UNION ALL
+    SELECT 'parental_education', parental_level_of_education FROM parent_background
+    GROUP BY parental_level_of_education
+    UNION ALL
+    SELECT 'lunch_status', ss.service_status FROM student_services ss
+    JOIN services srv ON ss.service_id = srv.service_id
+    WHERE srv.service_name = 'Lunch Program'
+    GROUP BY ss.service_status
+    UNION ALL
+    SELECT 'lunch_status', 'Standard'
+"""
+
+FLAG_CHOICES = {"All": None, "Yes": True, "No": False}
+
+
+def empty_filters():
+    return {**{name: [] for name in LIST_FILTERS}, **{name: None for name in FLAG_FILTERS}}
+
+
+def get_filters():
+    """Current selection from session state"""
+    return st.session_state.setdefault(STATE_KEY, empty_filters())
+
+
+def active_filters(filters):
+    """Only the filters that actually restrict rows (None means no filters)"""
+    return {
+        name: value for name, value in (filters or {}).items()
+        if (name in LIST_FILTERS and value) or (name in FLAG_FILTERS and value is not None)
+    }
+
+
+def build_filter(filters, alias='s'):
+    """Compile filters into (sql.Composable predicate over `alias`, params)"""
+    s = sql.Identifier(alias)
+    parts, params = [], []
+    for name, value in active_filters(filters).items():
+        if name in LIST_FILTERS:
+            parts.append(sql.SQL(LIST_FILTERS[name][1]).format(s=s))
+            params.append(list(value))
+        elif name in FLAG_FILTERS:
+            predicate = sql.SQL(FLAG_FILTERS[name][1]).format(s=s)
+            parts.append(predicate if value else sql.SQL("NOT ") + predicate)
+        else:
+            raise ValueError(f"Unknown filter: {name}")
+    if not parts:
+        return sql.SQL("TRUE"), []
+    return sql.SQL(" AND ").join(parts), params
+
+
+def student_id_filter(filters, column):
+    """Predicate restricting `column` (e.g. e.id_student) to the filtered students.
+
+    Queries that do not join `student` use this; without active filters it
+    is a plain TRUE so the planner sees no subquery at all.
+    """
+    if not active_filters(filters):
+        return sql.SQL("TRUE"), []
+    predicate, params = build_filter(filters, alias='fs')
+    column = sql.SQL('.').join(sql.Identifier(part) for part in column.split('.'))
+    return sql.SQL("{column} IN (SELECT fs.id_student FROM student fs WHERE {predicate})").format(
+        column=column, predicate=predicate
+    ), params
+
+
+def snapshot_mask(snapshot, filters=None):
+    """Same selection as a boolean row mask over an AnalyticsSnapshot"""
+    selection = {SNAPSHOT_COLUMNS[name]: value for name, value in active_filters(filters).items()}
+    return snapshot.mask(**selection) if selection else None
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def get_filter_options(_db):
+    """Distinct values per list filter (one round trip, cached)"""
+    rows = _db.execute_query(OPTIONS_QUERY)
+    options = {name: [] for name in LIST_FILTERS}
+    if not rows.empty:
+        for dimension, group in rows.dropna().groupby('dimension'):
+            options[dimension] = sorted(set(group['value']))
+    return options
+
+
+def _store(name):
+    value = st.session_state[f"_filter_{name}"]
+    get_filters()[name] = FLAG_CHOICES[value] if name in FLAG_FILTERS else value
+
+
+def render_filter_sidebar(db):
+    """Draw the shared filter widgets and return the active filters"""
+    filters = get_filters()
+    options = get_filter_options(db)
+    labels = {value: label for label, value in FLAG_CHOICES.items()}
+
+    st.sidebar.markdown("### Filters")
+    for name, (label, _) in LIST_FILTERS.items():
+        key = f"_filter_{name}"
+        # Widget state is dropped on page switch; restore it from our own key
+        st.session_state[key] = [v for v in filters[name] if v in options[name]]
+        st.sidebar.multiselect(label, options[name], key=key, on_change=_store, args=(name,))
+    for name, (label, _) in FLAG_FILTERS.items():
+        key = f"_filter_{name}"
+        st.session_state[key] = labels[filters[name]]
+        st.sidebar.radio(label, list(FLAG_CHOICES), key=key, horizontal=True, on_change=_store, args=(name,))
+
+    if st.sidebar.button("Clear filters", disabled=not active_filters(filters)):
+        st.session_state[STATE_KEY] = empty_filters()
+        st.rerun()
+
+    active = active_filters(filters)
+    if active:
+        st.sidebar.caption(f"{len(active)} filter(s) applied to every chart")
+    return active
@@ -0,0 +1,22 @@
+import importlib.util
+import sys
+
+def lazy_import(name):
+    """Import a module on first attribute access instead of at import time.
+
+    Heavy libraries (plotly, pandas) are only needed once a section actually
+    draws a chart or builds a frame, so deferring them lets the page title and
+    layout paint before the import cost is paid.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named '{name}'")
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,109 @@
+"""
+Index-backed top-k leaderboard.
+
+Rows are read with ORDER BY <score> DESC, id_student DESC LIMIT k, which a
+backward scan of the (<score>, id_student) btree indexes answers without
+sorting. Pagination is keyset-based: the cursor carries the last score, id,
+rank and position, so later pages also need no OFFSET and no COUNT(*). The
+cursor keeps the score in the column's own type (int / Decimal) and the
+placeholder is cast to it, so the row comparison stays an index condition.
+Ranks use competition ranking (ties share a rank: 1, 2, 2, 4).
+"""
+from psycopg2 import sql
+
+# Leaderboard -> exam_scores column (each has a (column, id_student) index)
+LEADERBOARD_COLUMNS = {
+    'overall': 'avg_score',
+    'math': 'math_score',
+    'reading': 'reading_score',
+    'writing': 'writing_score',
+}
+# Column -> SQL type of the cursor placeholder
+COLUMN_TYPES = {
+    'avg_score': 'numeric',
+    'math_score': 'smallint',
+    'reading_score': 'smallint',
+    'writing_score': 'smallint',
+}
+
+
+def get_leaderboard_page(db, board='overall', grade_level=None, limit=20, cursor=None):
+    """Get one leaderboard page.
+
+    Returns (frame, next_cursor). `frame` has a `rank` and `score` column;
+    `next_cursor` is None on the last page and is passed back unchanged to
+    fetch the following page.
+    """
+    if board not in LEADERBOARD_COLUMNS:
+        raise ValueError(f"Unknown leaderboard: {board}")
+    column = sql.Identifier(LEADERBOARD_COLUMNS[board])
+    column_type = sql.SQL(COLUMN_TYPES[LEADERBOARD_COLUMNS[board]])
+
+    conditions = [sql.SQL("es.{} IS NOT NULL").format(column)]
+    params = []
+    if grade_level is not None:
+        conditions.append(sql.SQL("s.grade_level = %s"))
+        params.append(grade_level)
+    if cursor is not None:
+        conditions.append(sql.SQL("(es.{}, es.id_student) < (%s::{}, %s)").format(column, column_type))
+        params.extend([cursor['key'], cursor['id_student']])
+    params.append(int(limit) + 1)
+
+    query = sql.SQL("""
+        SELECT
+            s.id_student,
+            s.name,
+            s.grade_level,
+            es.math_score,
+            es.reading_score,
+            es.writing_score,
+            es.avg_score::float8 as avg_score,
+            sh.study_hours_per_week,
+            es.{column}::float8 as score,
+            es.{column} as sort_key
+        FROM exam_scores es
+        JOIN student s ON s.id_student = es.id_student
+        LEFT JOIN study_habits sh ON s.id_student = sh.id_student
+        WHERE {conditions}
+        ORDER BY es.{column} DESC, es.id_student DESC
+        LIMIT %s
+    """).format(column=column, conditions=sql.SQL(" AND ").join(conditions))
+
+    frame = db.execute_query(query, tuple(params))
+    if frame.empty:
+        return frame, None
+
+    has_next = len(frame) > limit
+    frame = frame.head(limit).reset_index(drop=True)
+    frame.insert(0, 'rank', assign_ranks(frame['score'].tolist(), cursor))
+    keys = frame.pop('sort_key')
+
+    next_cursor = None
+    if has_next:
+        last = frame.iloc[-1]
+        key = keys.iloc[-1]
+        next_cursor = {
+            # Native column value for the keyset condition, float for ranking
+            'key': key.item() if hasattr(key, 'item') else key,
+            'score': float(last['score']),
+            'id_student': int(last['id_student']),
+            'rank': int(last['rank']),
+            'position': (cursor['position'] if cursor else 0) + len(frame),
+        }
+    return frame, next_cursor
+
+
+def assign_ranks(scores, cursor=None):
+    """Competition ranks for a page of descending scores continuing from `cursor`"""
+    position = cursor['position'] if cursor else 0
+    previous_score = cursor['score'] if cursor else None
+    rank = cursor['rank'] if cursor else 0
+
+    ranks = []
+    for score in scores:
+        position += 1
+        if score != previous_score:
+            rank = position
+            previous_score = score
+        ranks.append(rank)
+    return ranks
@@ -0,0 +1,151 @@
+"""
+Opt-in memory instrumentation (MEMORY_PROFILING=1).
+
+Every page body runs inside `with page_run(page):`, which closes the run
+even when st.stop() or st.rerun() end it early. tracemalloc snapshots
+taken at both ends are diffed to find the source lines whose
+allocations survived the run, and the traced total after each run shows
+creep over time. Every frame returned by execute_query is measured with
+DataFrame.memory_usage(deep=True) and attributed to the page that ran it.
+The Diagnostics page lists both. tracemalloc is process-wide, so runs of
+concurrent sessions overlap; profile with one active session for clean
+per-page numbers. The same bracket feeds the rerun cost accounting
+(modules.rerun_cost), which is always on.
+"""
+import collections
+import contextlib
+import os
+import threading
+import time
+import tracemalloc
+
+from config.settings import MEMORY_PROFILING
+from modules import rerun_cost
+
+_local = threading.local()
+_lock = threading.Lock()
+
+# page -> recent run records (newest last)
+page_runs = {}
+# most recent execute_query frames
+frames = collections.deque(maxlen=MEMORY_PROFILING['frames'])
+
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def enabled():
+    return MEMORY_PROFILING['enabled']
+
+
+def _snapshot():
+    return tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+
+def current_page():
+    """Page of the run executing on this thread, or None"""
+    profile = getattr(_local, 'profile', None)
+    return profile['page'] if profile else None
+
+
+def begin_page(page):
+    """Start a run of `page`: query accounting always, memory profiling when enabled"""
+    rerun_cost.begin_run(page)
+    if not enabled():
+        return
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(MEMORY_PROFILING['traceback_depth'])
+    tracemalloc.reset_peak()
+    _local.profile = {'page': page, 'started': time.perf_counter(), 'before': _snapshot()}
+
+
+def end_page(interrupted=False):
+    """Diff the run's snapshots and record the largest surviving allocations"""
+    rerun_cost.end_run(interrupted)
+    profile = getattr(_local, 'profile', None)
+    if profile is None or not tracemalloc.is_tracing():
+        return
+    _local.profile = None
+    stats = _snapshot().compare_to(profile['before'], 'lineno')
+    stats = sorted((s for s in stats if s.size_diff > 0), key=lambda s: s.size_diff, reverse=True)
+    current, peak = tracemalloc.get_traced_memory()
+    record = {
+        'finished_at': time.time(),
+        'duration': time.perf_counter() - profile['started'],
+        'retained': sum(s.size_diff for s in stats),
+        'traced': current,
+        'peak': peak,
+        'top': [
+            {
+                'location': f"{s.traceback[0].filename}:{s.traceback[0].lineno}",
+                'size_diff': s.size_diff,
+                'count_diff': s.count_diff,
+                'size': s.size,
+            }
+            for s in stats[:MEMORY_PROFILING['top']]
+        ],
+    }
+    with _lock:
+        page_runs.setdefault(profile['page'], collections.deque(maxlen=MEMORY_PROFILING['history'])).append(record)
+
+
+@contextlib.contextmanager
+def page_run(page):
+    """Bracket a page's script body; st.stop()/st.rerun() raise out of it and are
+    recorded as interrupted runs"""
+    begin_page(page)
+    try:
+        yield
+    except BaseException:
+        end_page(interrupted=True)
+        raise
+    end_page()
+
+
+def record_frame(df, query):
+    """Record the deep memory footprint of a query result frame"""
+    if not enabled():
+        return
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    entry = {
+        'page': current_page() or '(background)',
+        'at': time.time(),
+        'bytes': int(df.memory_usage(deep=True).sum()) if not df.empty else 0,
+        'rows': len(df),
+        'columns': len(df.columns),
+        'query': " ".join(str(query).split())[:200],
+    }
+    with _lock:
+        frames.append(entry)
+
+
+def page_history():
+    """Copy of the recorded runs as {page: [record, ...]}"""
+    with _lock:
+        return {page: list(records) for page, records in page_runs.items()}
+
+
+def recorded_frames():
+    """Copy of the recorded frames, oldest first"""
+    with _lock:
+        return list(frames)
+
+
+def rss_bytes():
+    """Resident set size of this process (Linux), or None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def reset():
+    with _lock:
+        page_runs.clear()
+        frames.clear()
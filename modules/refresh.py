@@ -0,0 +1,197 @@
+"""
+Background refresh of the unfiltered dashboard aggregates.
+
+A process-wide scheduler thread precomputes the executive dashboard,
+analytics and performance summaries when the app starts and then every
+REFRESH['interval'] seconds, on its own database connection. Pages read the
+last good result immediately (stale-while-revalidate): no viewer waits for
+a refresh, and a failed refresh keeps serving the previous result while the
+freshness caption shows its age. Filtered or sampled views are not
+precomputed and still query live.
+"""
+import threading
+import time
+
+import streamlit as st
+
+from config.settings import REFRESH
+from modules import dashboard
+from modules.filters import active_filters
+
+# name -> function(db, filters, sample); run unfiltered and exact in the background
+JOBS = {
+    'dashboard_kpis': lambda db, filters, sample: db.get_dashboard_kpis(filters),
+    'dashboard_scores': lambda db, filters, sample: dashboard.score_distribution(db, filters),
+    'dashboard_gender': lambda db, filters, sample: dashboard.gender_counts(db, filters),
+    'dashboard_parental': lambda db, filters, sample: db.get_score_averages('parental_level_of_education', filters),
+    'analytics_test_prep': dashboard.test_prep_stats,
+    'analytics_ethnicity': dashboard.ethnicity_stats,
+    'performance_spread': lambda db, filters, sample: dashboard.score_spread(db, filters),
+}
+
+
+class Result:
+    """One computed job result with its wall-clock refresh time"""
+
+    def __init__(self, value, refreshed_at, duration):
+        self.value = value
+        self.refreshed_at = refreshed_at
+        self.duration = duration
+
+
+def _is_empty(value):
+    # execute_query reports errors as empty frames
+    return value is None or bool(getattr(value, 'empty', False))
+
+
+class RefreshScheduler:
+    """Runs JOBS on an interval in a daemon thread and keeps the last good results"""
+
+    def __init__(self, jobs=JOBS, interval=REFRESH['interval'], retry_delay=REFRESH['retry_delay'], connect=None):
+        self.jobs = dict(jobs)
+        self.interval = interval
+        self.retry_delay = retry_delay
+        self._connect = connect
+        self._db = None
+        self._results = {}
+        self._errors = {}
+        # Monotonic time each job is next due; 0 = warm up at startup
+        self._due = dict.fromkeys(self.jobs, 0.0)
+        # Set by refresh_now(): the next refresh must read the primary
+        self._after_write = False
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="dashboard-refresh", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            with self._lock:
+                due = [name for name, at in self._due.items() if at <= now]
+                next_at = min(self._due.values(), default=now + self.interval)
+            if not due:
+                self._wakeup.wait(max(next_at - now, 0.0))
+                continue
+            with self._lock:
+                after_write, self._after_write = self._after_write, False
+            if after_write:
+                # A replica may not have the import yet
+                self._database().mark_written()
+            for name in due:
+                self._refresh(name)
+
+    def _database(self):
+        if self._db is None:
+            if self._connect is not None:
+                self._db = self._connect()
+            else:
+                from modules.database import DatabaseConnection
+                self._db = DatabaseConnection()
+                self._db.connect()
+        return self._db
+
+    def _refresh(self, name):
+        started = time.monotonic()
+        try:
+            value = self.jobs[name](self._database(), None, None)
+            # An empty frame is how execute_query reports a failed query: never
+            # store it, retry after retry_delay until a real result arrives
+            error = "empty result" if _is_empty(value) else None
+        except Exception as e:
+            value, error = None, str(e)[:200]
+        finished = time.monotonic()
+        with self._lock:
+            if error is None:
+                self._results[name] = Result(value, time.time(), finished - started)
+                self._errors.pop(name, None)
+                self._due[name] = finished + self.interval
+            else:
+                # Keep serving the last good result; retry sooner than the interval
+                self._errors[name] = error
+                self._due[name] = finished + min(self.retry_delay, self.interval)
+
+    def get(self, name):
+        """Last good Result of a job, or None before its first refresh"""
+        return self._results.get(name)
+
+    def offer(self, name, value):
+        """Seed a job with a result computed live, if it has none yet"""
+        if _is_empty(value):
+            return
+        with self._lock:
+            self._results.setdefault(name, Result(value, time.time(), None))
+
+    def refresh_now(self, *names):
+        """Mark jobs (all by default) due immediately, e.g. after a bulk import;
+        that refresh reads from the primary"""
+        with self._lock:
+            self._after_write = True
+            for name in names or self.jobs:
+                self._due[name] = 0.0
+        self._wakeup.set()
+
+    def status(self):
+        """Per-job age, duration and last error for diagnostics"""
+        now = time.time()
+        with self._lock:
+            return {
+                name: {
+                    'age': now - result.refreshed_at if result else None,
+                    'duration': result.duration if result else None,
+                    'error': self._errors.get(name),
+                }
+                for name in self.jobs
+                for result in [self._results.get(name)]
+            }
+
+
+@st.cache_resource
+def get_scheduler():
+    """The process-wide scheduler (started on first use), or None when disabled"""
+    if not REFRESH['enabled']:
+        return None
+    return RefreshScheduler().start()
+
+
+def precomputed(db, name, filters=None, sample=None):
+    """Result of job `name` for this page as (value, refreshed_at).
+
+    Unfiltered exact views are served from the scheduler's last good result
+    (`refreshed_at` is its epoch time). Filtered or sampled views, and jobs
+    that have not completed a refresh yet, are computed live on `db`
+    (`refreshed_at` is None).
+    """
+    scheduler = get_scheduler()
+    precomputable = scheduler is not None and not active_filters(filters) and sample is None
+    if precomputable:
+        result = scheduler.get(name)
+        if result is not None:
+            return result.value, result.refreshed_at
+    value = JOBS[name](db, filters, sample)
+    if precomputable:
+        scheduler.offer(name, value)
+    return value, None
+
+
+def freshness_caption(*refreshed_at):
+    """Caption with the age of the oldest precomputed result on the page"""
+    times = [t for t in refreshed_at if t is not None]
+    if not times:
+        st.caption("⚡ Live results")
+        return
+    age = time.time() - min(times)
+    if age < 60:
+        label = "just now"
+    elif age < 3600:
+        label = f"{age / 60:.0f} min ago"
+    else:
+        label = f"{age / 3600:.1f} h ago"
+    stale = " · refresh overdue" if age > 2 * REFRESH['interval'] else ""
+    st.caption(f"🕒 Precomputed {label} (refreshed every {REFRESH['interval'] // 60 or 1} min){stale}")
@@ -0,0 +1,148 @@
+"""
+Read-replica routing for DatabaseConnection.
+
+Reads are spread over the configured replicas (round-robin or least-latency).
+Replicas are health-checked with `SELECT 1`; a failing replica is taken out
+of rotation until its next check, and callers fall back to the primary when
+no replica is healthy. The router is process-wide (get_replica_router), so
+every DatabaseConnection shares the replica connections and health state.
+"""
+import atexit
+import itertools
+import random
+import threading
+import time
+
+import psycopg2
+import streamlit as st
+from psycopg2.extras import RealDictCursor
+
+from config.settings import DB_REPLICAS, DB_ROUTING
+
+
+class Replica:
+    def __init__(self, config):
+        self.config = config
+        self.conn = None
+        self.cursor = None
+        self.healthy = True
+        self.latency = None
+        self.next_check = 0.0
+        self.statement_timeout = None
+        # Serializes statements of sessions reading through this replica
+        self.lock = threading.RLock()
+
+    @property
+    def name(self):
+        return f"{self.config['host']}:{self.config['port']}"
+
+    def ensure_connected(self):
+        if self.conn is None or self.conn.closed:
+            self.conn = psycopg2.connect(
+                host=self.config['host'],
+                port=self.config['port'],
+                database=self.config['database'],
+                user=self.config['user'],
+                password=self.config['password'],
+                connect_timeout=self.config.get('connect_timeout', 3),
+            )
+            self.conn.autocommit = True
+            self.cursor = self.conn.cursor(cursor_factory=RealDictCursor)
+            self.statement_timeout = None
+
+    def close(self):
+        try:
+            if self.cursor:
+                self.cursor.close()
+            if self.conn:
+                self.conn.close()
+        except psycopg2.Error:
+            pass
+        self.conn = None
+        self.cursor = None
+
+
+class ReplicaRouter:
+    """Chooses a healthy replica for each read"""
+
+    def __init__(self, configs, policy='round_robin', health_check_interval=30):
+        if policy not in ('round_robin', 'least_latency'):
+            raise ValueError(f"Unknown replica policy: {policy}")
+        self.replicas = [Replica(config) for config in configs]
+        self.policy = policy
+        self.health_check_interval = health_check_interval
+        self._cycle = itertools.cycle(range(len(self.replicas))) if self.replicas else None
+        self._lock = threading.Lock()
+
+    def __bool__(self):
+        return bool(self.replicas)
+
+    def check(self, replica):
+        """Run a health check and update latency (EWMA); returns health"""
+        started = time.perf_counter()
+        try:
+            with replica.lock:
+                replica.ensure_connected()
+                replica.cursor.execute("SELECT 1")
+                replica.cursor.fetchall()
+        except psycopg2.Error:
+            self.mark_down(replica)
+            return False
+
+        elapsed = time.perf_counter() - started
+        replica.latency = elapsed if replica.latency is None else 0.7 * replica.latency + 0.3 * elapsed
+        replica.healthy = True
+        replica.next_check = time.monotonic() + self.health_check_interval
+        return True
+
+    def mark_down(self, replica):
+        """Take a replica out of rotation until its next health check"""
+        with replica.lock:
+            # Shared by all sessions: never close it under a running statement
+            replica.close()
+        replica.healthy = False
+        # Jitter keeps several workers from re-probing a dead host in lockstep
+        replica.next_check = time.monotonic() + self.health_check_interval * random.uniform(0.5, 1.0)
+
+    def _due_checks(self):
+        now = time.monotonic()
+        for replica in self.replicas:
+            if replica.next_check <= now:
+                self.check(replica)
+
+    def choose(self):
+        """Return a healthy replica, or None to use the primary"""
+        if not self.replicas:
+            return None
+        with self._lock:
+            self._due_checks()
+            healthy = [r for r in self.replicas if r.healthy]
+            if not healthy:
+                return None
+            if self.policy == 'least_latency':
+                return min(healthy, key=lambda r: r.latency if r.latency is not None else float('inf'))
+            for _ in range(len(self.replicas)):
+                replica = self.replicas[next(self._cycle)]
+                if replica.healthy:
+                    return replica
+        return None
+
+    def status(self):
+        """Health/latency overview for diagnostics"""
+        return [
+            {'replica': r.name, 'healthy': r.healthy,
+             'latency_ms': round(r.latency * 1000, 2) if r.latency is not None else None}
+            for r in self.replicas
+        ]
+
+    def close(self):
+        for replica in self.replicas:
+            replica.close()
+
+
+@st.cache_resource
+def get_replica_router():
+    """Process-wide router; its replica connections are closed at exit"""
+    router = ReplicaRouter(DB_REPLICAS, DB_ROUTING['policy'], DB_ROUTING['health_check_interval'])
+    atexit.register(router.close)
+    return router
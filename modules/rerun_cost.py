@@ -0,0 +1,101 @@
+"""
+Fragment-scoped reruns and rerun cost accounting.
+
+Page sections that own their widgets (roster search and paging, the similar
+students slider, the at-risk threshold, the leaderboard) are decorated with
+@fragment(name). Under st.fragment an interaction with them reruns only
+that function instead of the whole script, so the page's other queries and
+charts are not recomputed. Data a section needs from the rest of the page is
+passed in as arguments.
+
+Every run, whether a full page run or a fragment rerun, records how many
+execute_query calls it made and how long they took. The Diagnostics page
+compares the cost of each interaction with fragments on and off
+(FRAGMENTS_ENABLED=0 restores full reruns).
+"""
+import collections
+import functools
+import threading
+import time
+
+import streamlit as st
+
+from config.settings import FRAGMENTS_ENABLED
+
+PAGE_KEY = '_rerun_cost_page'
+
+_local = threading.local()
+_lock = threading.Lock()
+runs = collections.deque(maxlen=1000)
+
+
+def in_fragment_rerun():
+    """Whether the current script run reruns fragments only"""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return False
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return bool(getattr(ctx, 'fragment_ids_this_run', None))
+
+
+def _start(page, scope):
+    if getattr(_local, 'run', None) is not None:
+        # The previous run on this thread never reached end_run()
+        end_run(interrupted=True)
+    _local.run = {'page': page, 'scope': scope, 'queries': 0, 'query_time': 0.0,
+                  'started': time.perf_counter()}
+
+
+def begin_run(page):
+    """Start accounting a full run of `page`"""
+    st.session_state[PAGE_KEY] = page
+    _start(page, 'page')
+
+
+def end_run(interrupted=False):
+    """Record the open run; `interrupted` when st.stop()/st.rerun() or an error ended it"""
+    run = getattr(_local, 'run', None)
+    if run is None:
+        return
+    _local.run = None
+    run['duration'] = time.perf_counter() - run.pop('started')
+    run['mode'] = 'fragments' if FRAGMENTS_ENABLED else 'full reruns'
+    run['at'] = time.time()
+    run['interrupted'] = interrupted
+    with _lock:
+        runs.append(run)
+
+
+def count_query(elapsed):
+    """Charge one execute_query call to the run on this thread (if any)"""
+    run = getattr(_local, 'run', None)
+    if run is not None:
+        run['queries'] += 1
+        run['query_time'] += elapsed
+
+
+def fragment(name):
+    """st.fragment with per-rerun accounting under `name` (plain call when disabled)"""
+    def decorate(func):
+        @functools.wraps(func)
+        def section(*args, **kwargs):
+            if not in_fragment_rerun():
+                # Part of a full page run, already being accounted
+                return func(*args, **kwargs)
+            _start(st.session_state.get(PAGE_KEY, '?'), name)
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                end_run(interrupted=True)
+                raise
+            end_run()
+            return result
+        return st.fragment(section) if FRAGMENTS_ENABLED else section
+    return decorate
+
+
+def recorded_runs():
+    """Copy of the recorded runs, oldest first"""
+    with _lock:
+        return list(runs)
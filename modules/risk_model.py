@@ -0,0 +1,236 @@
+"""
+Batch at-risk prediction.
+
+A small logistic regression (NumPy, Newton/IRLS with L2) predicts whether a
+student's average score falls below the pass mark from study hours, tutor,
+group study, parental education, lunch program, test prep and activity
+hours. It is trained offline against the analytics snapshot, its
+coefficients are persisted as JSON, and the whole student body is scored in
+one matrix pass. Scores are cached per snapshot version and model.
+
+Train with:
+    python -m modules.risk_model [--pass-mark 60]
+"""
+import json
+import os
+import time
+
+import streamlit as st
+
+from config.settings import RISK_MODEL_PATH
+from modules.lazy import lazy_import
+from modules.similarity import education_level
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+PASS_MARK = 60
+
+# Naikkan bila encoding fitur berubah (mis. EDUCATION_LEVELS di similarity):
+# mean/std model lama tidak lagi cocok dengan nilai fiturnya
+FEATURE_ENCODING = 2
+
+# feature -> (label, binary?)
+FEATURES = {
+    'study_hours_per_week': ("Study hours/week", False),
+    'has_private_tutor': ("Private tutor", True),
+    'prefers_group_study': ("Group study", True),
+    'parental_education': ("Parental education level", False),
+    'free_lunch': ("Free/reduced lunch", True),
+    'test_prep': ("Test preparation course", True),
+    'activity_hours': ("Activity hours/week", False),
+}
+
+
+def feature_matrix(snapshot):
+    """Raw (unscaled) float32 feature matrix in FEATURES order; NaN = missing"""
+    columns = []
+    for name in FEATURES:
+        if name == 'parental_education':
+            values = education_level(snapshot)
+        elif name == 'free_lunch':
+            lunch = np.array([label not in (None, 'Standard') for label in snapshot.labels['lunch_status']]
+                             or [False])
+            values = lunch[snapshot.columns['lunch_status']]
+        elif name in ('has_private_tutor', 'prefers_group_study', 'test_prep'):
+            values = snapshot.flag(name)
+        else:
+            values = snapshot.measure(name)
+        columns.append(np.asarray(values, dtype=np.float32))
+    return np.stack(columns, axis=1) if columns else np.empty((snapshot.size, 0), np.float32)
+
+
+def sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+
+def auc_score(y, p):
+    """Rank-based ROC AUC (ties get average ranks)"""
+    positives = int(y.sum())
+    negatives = len(y) - positives
+    if not positives or not negatives:
+        return float('nan')
+    _, inverse, counts = np.unique(p, return_inverse=True, return_counts=True)
+    ends = np.cumsum(counts)
+    ranks = ((ends - counts + 1 + ends) / 2.0)[inverse]
+    return float((ranks[y].sum() - positives * (positives + 1) / 2) / (positives * negatives))
+
+
+class RiskModel:
+    """Standardized logistic regression over FEATURES"""
+
+    def __init__(self, mean, std, coef, intercept, pass_mark=PASS_MARK, trained_at=None, metrics=None):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.std = np.asarray(std, dtype=np.float32)
+        self.coef = np.asarray(coef, dtype=np.float32)
+        self.intercept = float(intercept)
+        self.pass_mark = pass_mark
+        self.trained_at = trained_at or time.time()
+        self.metrics = metrics or {}
+
+    # --- Training ---
+    @classmethod
+    def train(cls, snapshot, pass_mark=PASS_MARK, l2=1e-3, max_iter=25, tol=1e-6):
+        average = snapshot.measure('average_score')
+        labelled = ~np.isnan(average)
+        raw = feature_matrix(snapshot)[labelled].astype(np.float64)
+        y = average[labelled] < pass_mark
+        if not len(y):
+            raise ValueError("No students with exam scores to train on")
+
+        mean = np.nanmean(raw, axis=0)
+        std = np.nanstd(raw, axis=0)
+        std[std == 0] = 1.0
+        X = np.where(np.isnan(raw), 0.0, (raw - mean) / std)
+        X = np.hstack([np.ones((len(X), 1)), X])
+
+        w = np.zeros(X.shape[1])
+        penalty = np.full(X.shape[1], l2 * len(X))
+        penalty[0] = 0.0
+        for _ in range(max_iter):
+            p = sigmoid(X @ w)
+            gradient = X.T @ (p - y) + penalty * w
+            hessian = (X * (p * (1 - p))[:, None]).T @ X + np.diag(penalty)
+            step = np.linalg.solve(hessian, gradient)
+            w -= step
+            if np.abs(step).max() < tol:
+                break
+
+        p = sigmoid(X @ w)
+        eps = 1e-12
+        metrics = {
+            'students': int(len(y)),
+            'at_risk_rate': float(y.mean()),
+            'log_loss': float(-np.mean(y * np.log(p + eps) + (~y) * np.log(1 - p + eps))),
+            'accuracy': float(((p >= 0.5) == y).mean()),
+            'auc': auc_score(y, p),
+        }
+        return cls(mean, std, w[1:], w[0], pass_mark=pass_mark, metrics=metrics)
+
+    # --- Scoring ---
+    def predict(self, snapshot):
+        """At-risk probability for every student of the snapshot (float32)"""
+        raw = feature_matrix(snapshot)
+        X = np.where(np.isnan(raw), 0.0, (raw - self.mean) / self.std).astype(np.float32)
+        return sigmoid(X @ self.coef + np.float32(self.intercept)).astype(np.float32)
+
+    def effects(self):
+        """Odds ratio per feature: Yes vs No for flags, +1 SD otherwise"""
+        rows = []
+        for (name, (label, binary)), coef, std in zip(FEATURES.items(), self.coef, self.std):
+            if binary:
+                change, odds = "Yes vs No", float(np.exp(coef / std))
+            else:
+                change, odds = f"+{std:.1f}", float(np.exp(coef))
+            rows.append({'feature': name, 'label': label, 'change': change, 'odds_ratio': odds})
+        return pd.DataFrame(rows)
+
+    # --- Persistence ---
+    def to_dict(self):
+        return {
+            'features': list(FEATURES),
+            'encoding': FEATURE_ENCODING,
+            'mean': self.mean.tolist(),
+            'std': self.std.tolist(),
+            'coef': self.coef.tolist(),
+            'intercept': self.intercept,
+            'pass_mark': self.pass_mark,
+            'trained_at': self.trained_at,
+            'metrics': self.metrics,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('features') != list(FEATURES):
+            raise ValueError("Model was trained on a different feature set; retrain it")
+        if data.get('encoding', 1) != FEATURE_ENCODING:
+            raise ValueError("Model was trained with an older feature encoding; retrain it")
+        return cls(data['mean'], data['std'], data['coef'], data['intercept'],
+                   pass_mark=data.get('pass_mark', PASS_MARK), trained_at=data.get('trained_at'),
+                   metrics=data.get('metrics'))
+
+    def save(self, path=RISK_MODEL_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=RISK_MODEL_PATH):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _load_model(path, mtime):
+    return RiskModel.load(path)
+
+
+def get_risk_model(path=RISK_MODEL_PATH):
+    """Persisted model (reloaded when the file changes), or None if untrained"""
+    if not os.path.exists(path):
+        return None
+    try:
+        return _load_model(path, os.path.getmtime(path))
+    except ValueError as e:
+        st.warning(f"Risk model ignored: {e}")
+        return None
+
+
+@st.cache_resource(max_entries=2, show_spinner="Scoring students...")
+def get_risk_scores(_snapshot, _model, loaded_at, trained_at):
+    """Probabilities aligned with the snapshot rows, one entry per snapshot
+    version and model (`loaded_at`, `trained_at` key the cache). Scores come
+    from the snapshot, so they trail writes by at most SNAPSHOT_TTL_SECONDS."""
+    return _model.predict(_snapshot)
+
+
+if __name__ == "__main__":
+    # python -m modules.risk_model [--pass-mark 60] [--output path]
+    import argparse
+    import sys
+
+    from config.settings import SNAPSHOT_PATH
+    from modules.database import DatabaseConnection, read_snapshot
+    from modules.snapshot import AnalyticsSnapshot
+
+    parser = argparse.ArgumentParser(description="Train the at-risk model")
+    parser.add_argument('--pass-mark', type=float, default=PASS_MARK)
+    parser.add_argument('--output', default=RISK_MODEL_PATH)
+    parser.add_argument('--snapshot', default=SNAPSHOT_PATH, help="Arrow snapshot to train on if present")
+    args = parser.parse_args()
+
+    if os.path.exists(args.snapshot):
+        snapshot = AnalyticsSnapshot.from_arrow(read_snapshot(args.snapshot), source=args.snapshot)
+    else:
+        db = DatabaseConnection()
+        if not db.connect():
+            sys.exit(1)
+        snapshot = AnalyticsSnapshot.load(db)
+
+    model = RiskModel.train(snapshot, pass_mark=args.pass_mark)
+    model.save(args.output)
+    print(f"Trained on {model.metrics['students']:,} students -> {args.output}")
+    print(model.effects().to_string(index=False))
+    print({k: round(v, 4) if isinstance(v, float) else v for k, v in model.metrics.items()})
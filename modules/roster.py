@@ -0,0 +1,274 @@
+"""
+Keyset-paged student roster.
+
+Pages are read with ORDER BY <sort column>, id_student LIMIT n and continue
+from a cursor holding the last row's (value, id_student), so every page is
+an index range scan of (<column>, id_student) no matter how deep the reader
+has scrolled: no OFFSET, no COUNT(*), and only the visible page in memory.
+Rows whose sort value is NULL come after all other rows in either direction.
+While a page is shown, a process-wide worker prefetches the next one, so
+"Next" is usually served from memory.
+"""
+import collections
+import json
+import queue
+import threading
+import time
+
+import streamlit as st
+from psycopg2 import sql
+
+from modules.filters import build_filter
+from modules.lazy import lazy_import
+from modules.rerun_cost import fragment, in_fragment_rerun
+
+pd = lazy_import("pandas")
+
+# Sort option -> (student column, nullable); each has a (column, id_student) index
+ROSTER_SORTS = {
+    'name': ('name', False),
+    'id_student': ('id_student', False),
+    'grade_level': ('grade_level', True),
+    'date_of_birth': ('date_of_birth', True),
+}
+SORT_LABELS = {'name': "Name", 'id_student': "ID", 'grade_level': "Grade", 'date_of_birth': "Date of Birth"}
+PAGE_SIZES = (25, 50, 100, 200)
+
+ROSTER_COLUMNS = sql.SQL("s.id_student, s.name, s.gender, s.grade_level, s.race_ethnicity, s.date_of_birth")
+
+
+def get_roster_page(db, sort='name', descending=False, filters=None, search=None, limit=50, cursor=None):
+    """Get one roster page.
+
+    Returns (frame, next_cursor); `next_cursor` is None on the last page and
+    is passed back unchanged to fetch the following page.
+    """
+    if sort not in ROSTER_SORTS:
+        raise ValueError(f"Unsupported roster sort: {sort}")
+    column, nullable = ROSTER_SORTS[sort]
+    col = sql.Identifier('s', column)
+    id_col = sql.Identifier('s', 'id_student')
+    direction = sql.SQL("DESC" if descending else "ASC")
+    after = sql.SQL("<" if descending else ">")
+
+    where, where_params = build_filter(filters)
+    if search:
+        where = sql.SQL("{} AND s.name ILIKE %s").format(where)
+        where_params = where_params + [f"%{search}%"]
+
+    keys = [col] if column == 'id_student' else [col, id_col]
+    branches, params = [], []
+
+    # Non-NULL values, resumed with a row comparison on the index key
+    if cursor is None or cursor['value'] is not None:
+        conditions = [where, sql.SQL("{} IS NOT NULL").format(col)]
+        branch_params = list(where_params)
+        if cursor is not None:
+            values = [cursor['value']] if len(keys) == 1 else [cursor['value'], cursor['id_student']]
+            conditions.append(sql.SQL("({}) {} ({})").format(
+                sql.SQL(", ").join(keys), after, sql.SQL(", ").join([sql.Placeholder()] * len(values))
+            ))
+            branch_params.extend(values)
+        branches.append((conditions, keys))
+        params.extend(branch_params + [int(limit) + 1])
+
+    # NULL values last, ordered by id_student alone
+    if nullable:
+        conditions = [where, sql.SQL("{} IS NULL").format(col)]
+        branch_params = list(where_params)
+        if cursor is not None and cursor['value'] is None:
+            conditions.append(sql.SQL("{} {} %s").format(id_col, after))
+            branch_params.append(cursor['id_student'])
+        branches.append((conditions, [id_col]))
+        params.extend(branch_params + [int(limit) + 1])
+
+    parts = [
+        sql.SQL("(SELECT {columns} FROM student s WHERE {conditions} ORDER BY {order} LIMIT %s)").format(
+            columns=ROSTER_COLUMNS,
+            conditions=sql.SQL(" AND ").join(conditions),
+            order=sql.SQL(", ").join(sql.SQL("{} {}").format(key, direction) for key in order),
+        )
+        for conditions, order in branches
+    ]
+    query = sql.SQL("""
+        SELECT * FROM ({union}) page
+        ORDER BY {sort} IS NULL, {sort} {direction}, id_student {direction}
+        LIMIT %s
+    """).format(union=sql.SQL(" UNION ALL ").join(parts), sort=sql.Identifier(column), direction=direction)
+    params.append(int(limit) + 1)
+
+    frame = db.execute_query(query, tuple(params), query_class='interactive')
+    if frame.empty:
+        return frame, None
+
+    has_next = len(frame) > limit
+    frame = frame.head(limit).reset_index(drop=True)
+    next_cursor = None
+    if has_next:
+        last = frame.iloc[-1]
+        value = last[column]
+        if pd.isna(value):
+            value = None
+        elif hasattr(value, 'item'):
+            value = value.item()
+        next_cursor = {
+            'value': value,
+            'id_student': int(last['id_student']),
+            'position': (cursor['position'] if cursor else 0) + len(frame),
+        }
+    return frame, next_cursor
+
+
+def page_key(**request):
+    """Stable cache key of a get_roster_page request"""
+    return json.dumps(request, sort_keys=True, default=str)
+
+
+class RosterPrefetcher:
+    """Process-wide LRU of recently read and prefetched roster pages.
+
+    A single worker thread with its own connection loads requested pages in
+    the background; entries expire after `ttl` seconds so edits show up.
+    """
+
+    def __init__(self, max_pages=64, ttl=30.0):
+        self.max_pages = max_pages
+        self.ttl = ttl
+        self._pages = collections.OrderedDict()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._db = None
+
+    def get(self, key):
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                return None
+            self._pages.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, page):
+        with self._lock:
+            self._pages[key] = (time.monotonic(), page)
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+
+    def prefetch(self, request):
+        """Queue get_roster_page(**request) unless it is cached or already queued"""
+        key = page_key(**request)
+        if self.get(key) is not None:
+            return
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="roster-prefetch", daemon=True)
+                self._thread.start()
+        self._queue.put((key, request))
+
+    def _run(self):
+        while True:
+            key, request = self._queue.get()
+            try:
+                if self._db is None:
+                    from modules.database import DatabaseConnection
+                    self._db = DatabaseConnection()
+                    self._db.connect()
+                frame, next_cursor = get_roster_page(self._db, **request)
+                if not frame.empty:
+                    self.put(key, (frame, next_cursor))
+            except Exception:
+                # Prefetch is best effort; the page is read on demand instead
+                pass
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+
+
+@st.cache_resource
+def get_prefetcher():
+    return RosterPrefetcher()
+
+
+def fetch_roster_page(db, **request):
+    """Roster page from the prefetch cache or the database; queues the next page"""
+    prefetcher = get_prefetcher()
+    key = page_key(**request)
+    page = prefetcher.get(key)
+    if page is None:
+        page = get_roster_page(db, **request)
+        if not page[0].empty:
+            prefetcher.put(key, page)
+    if page[1] is not None:
+        prefetcher.prefetch({**request, 'cursor': page[1]})
+    return page
+
+
+def render_roster_browser(db, filters=None, key='roster'):
+    """Paged roster table with sort/search controls; returns the selected id_student.
+
+    The roster is a fragment: searching, sorting and paging rerun only this
+    section, while picking a student reruns the page so its details render.
+    """
+    state = st.session_state.setdefault(key, {'request': None, 'cursors': [None], 'selected': None})
+    _roster_section(db, filters, key)
+    return state['selected']
+
+
+@fragment('roster')
+def _roster_section(db, filters, key):
+    state = st.session_state[key]
+    col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+    search = col1.text_input("Search Student by Name", placeholder="Enter student name...", key=f"{key}_search")
+    sort = col2.selectbox("Sort by", list(ROSTER_SORTS), format_func=SORT_LABELS.get, key=f"{key}_sort")
+    descending = col3.selectbox("Order", ["Ascending", "Descending"], key=f"{key}_order") == "Descending"
+    limit = col4.selectbox("Rows", PAGE_SIZES, index=1, key=f"{key}_limit")
+
+    request = {'sort': sort, 'descending': descending, 'filters': filters or {},
+               'search': search or None, 'limit': limit}
+    if state['request'] != page_key(**request):
+        # Different sort/search/filters: back to the first page
+        state['request'] = page_key(**request)
+        state['cursors'] = [None]
+
+    cursor = state['cursors'][-1]
+    frame, next_cursor = fetch_roster_page(db, **request, cursor=cursor)
+    if frame.empty:
+        st.info("No students found matching your search.")
+        return
+
+    start = cursor['position'] if cursor else 0
+    st.dataframe(frame, use_container_width=True, hide_index=True, height=min(38 + 35 * len(frame), 600))
+
+    # Callbacks move the cursor before the (fragment) rerun
+    def first():
+        state['cursors'] = [None]
+
+    def previous():
+        state['cursors'].pop()
+
+    def following():
+        state['cursors'].append(next_cursor)
+
+    nav1, nav2, nav3, nav4 = st.columns([1, 1, 1, 3])
+    nav1.button("⏮ First", key=f"{key}_first", disabled=cursor is None, on_click=first)
+    nav2.button("◀ Prev", key=f"{key}_prev", disabled=cursor is None, on_click=previous)
+    nav3.button("Next ▶", key=f"{key}_next", disabled=next_cursor is None, on_click=following)
+    nav4.caption(f"Rows {start + 1:,}–{start + len(frame):,}" + ("" if next_cursor else " (end)"))
+
+    names = {int(i): name for i, name in zip(frame['id_student'], frame['name'])}
+    if state['selected'] is None:
+        state['selected'] = next(iter(names))
+    ids = list(names)
+    picked = st.selectbox("Select Student", ids, format_func=names.get, placeholder="Choose a student...",
+                          index=ids.index(state['selected']) if state['selected'] in names else None,
+                          key=f"{key}_selected")
+    if picked is not None and picked != state['selected']:
+        state['selected'] = picked
+        if in_fragment_rerun():
+            # The details below live outside the fragment
+            st.rerun()
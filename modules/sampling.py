@@ -0,0 +1,111 @@
+"""
+Approximate mode for exploratory charts.
+
+When enabled (sidebar toggle, kept in session state), exploratory queries
+read a seeded, repeatable TABLESAMPLE of exam_scores instead of every row,
+aggregates come back with 95% confidence intervals, and pages show a
+"sampled N%" badge. Switching the toggle off returns exact results.
+"""
+import streamlit as st
+from psycopg2 import sql
+
+from config.settings import SAMPLING
+from modules.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+STATE_KEY = 'sampling_mode'
+METHODS = ('SYSTEM', 'BERNOULLI')
+Z_95 = 1.96
+
+
+class SampleMode:
+    """A TABLESAMPLE configuration (percent of rows, method, repeatable seed)"""
+
+    def __init__(self, percent=SAMPLING['percent'], method=SAMPLING['method'], seed=SAMPLING['seed']):
+        if method not in METHODS:
+            raise ValueError(f"Unknown sampling method: {method}")
+        if not 0 < percent <= 100:
+            raise ValueError("Sampling percent must be in (0, 100]")
+        self.percent = float(percent)
+        self.method = method
+        self.seed = int(seed)
+
+    @property
+    def fraction(self):
+        return self.percent / 100.0
+
+    def clause(self):
+        return sql.SQL("TABLESAMPLE {method} ({percent}) REPEATABLE ({seed})").format(
+            method=sql.SQL(self.method), percent=sql.Literal(self.percent), seed=sql.Literal(self.seed)
+        )
+
+    def row_mask(self, size):
+        """Seeded in-memory Bernoulli sample of `size` rows (for snapshot data)"""
+        return np.random.default_rng(self.seed).random(size) < self.fraction
+
+    @property
+    def clustered(self):
+        """SYSTEM picks whole pages: rows are not independent, so the
+        simple-random intervals below understate the spread"""
+        return self.method == 'SYSTEM'
+
+    def label(self):
+        return f"sampled {self.percent:g}% ({self.method.lower()}, seed {self.seed})"
+
+
+def sampled_table(name, alias, mode=None):
+    """`name alias`, followed by the TABLESAMPLE clause in approximate mode"""
+    table = sql.SQL("{} {}").format(sql.Identifier(name), sql.Identifier(alias))
+    return table if mode is None else sql.SQL("{} {}").format(table, mode.clause())
+
+
+def with_confidence(df, columns, count='n', sd_suffix='_sd'):
+    """Add `<column>_ci` half-widths (95%, normal approximation) for sampled means.
+
+    Expects `<column><sd_suffix>` standard deviation columns and a row count.
+    Assumes independent rows: exact for BERNOULLI, too narrow for a SYSTEM
+    (page-clustered) sample, which sampling_badge() labels as approximate.
+    """
+    n = df[count].astype(float)
+    for column in columns:
+        df[f"{column}_ci"] = Z_95 * df[f"{column}{sd_suffix}"].astype(float) / np.sqrt(n)
+    return df
+
+
+def proportion_ci(p, n):
+    """95% half-width of a sampled proportion"""
+    return Z_95 * np.sqrt(p * (1 - p) / n) if n else float('nan')
+
+
+def render_sampling_toggle():
+    """Sidebar toggle for approximate mode; returns the SampleMode or None"""
+    state = st.session_state.setdefault(STATE_KEY, {'enabled': False, 'percent': SAMPLING['percent']})
+
+    def store():
+        state['enabled'] = st.session_state['_sampling_enabled']
+        state['percent'] = st.session_state.get('_sampling_percent', state['percent'])
+
+    st.sidebar.markdown("### Query Mode")
+    st.session_state['_sampling_enabled'] = state['enabled']
+    st.sidebar.toggle("Approximate (sampled)", key='_sampling_enabled', on_change=store,
+                      help="Exploratory charts read a repeatable TABLESAMPLE instead of every row.")
+    if not state['enabled']:
+        return None
+    st.session_state['_sampling_percent'] = state['percent']
+    st.sidebar.slider("Sample size (%)", 1.0, 50.0, step=1.0, key='_sampling_percent', on_change=store)
+    return SampleMode(percent=state['percent'])
+
+
+def sampling_badge(mode, rows=None, row_level=False):
+    """Caption marking a chart as approximate; `row_level` when the data was
+    sampled per row in memory (row_mask) rather than by TABLESAMPLE"""
+    if mode is None:
+        return
+    suffix = f" · {rows:,} rows" if rows is not None else ""
+    if mode.clustered and not row_level:
+        note = ("Intervals are rough: SYSTEM samples whole pages, so the 95% bounds understate the spread "
+                "(SAMPLING_METHOD=BERNOULLI gives calibrated intervals).")
+    else:
+        note = "Intervals are 95% confidence."
+    st.caption(f"🎲 Approximate — {mode.label()}{suffix}. {note}")
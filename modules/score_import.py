@@ -0,0 +1,211 @@
+"""
+Bulk score entry through a staging table.
+
+Rows are COPYed as text into a temporary staging table, validated with
+set-based SQL (unknown students, wrong grade, out-of-range scores,
+duplicates in the file), and the valid rows are upserted into exam_scores
+and study_habits with one INSERT ... ON CONFLICT statement each, all in a
+single transaction.
+"""
+import io
+
+from modules.lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+SCORE_FIELDS = ['math_score', 'reading_score', 'writing_score']
+HABIT_FIELDS = ['study_hours_per_week', 'prefers_group_study', 'has_private_tutor']
+IMPORT_COLUMNS = ['id_student'] + SCORE_FIELDS + HABIT_FIELDS
+
+CREATE_STAGING_SQL = """
+    CREATE TEMP TABLE score_staging (
+        row_no INT,
+        id_student TEXT,
+        math_score TEXT,
+        reading_score TEXT,
+        writing_score TEXT,
+        study_hours_per_week TEXT,
+        prefers_group_study TEXT,
+        has_private_tutor TEXT,
+        error TEXT
+    ) ON COMMIT DROP
+"""
+
+COPY_SQL = f"""
+    COPY score_staging (row_no, {', '.join(IMPORT_COLUMNS)})
+    FROM STDIN WITH (FORMAT csv)
+"""
+
+# First matching WHEN wins (CASE order also guards the ::int casts);
+# every check runs over the whole staging table at once
+VALIDATE_SQL = """
+    UPDATE score_staging st
+    SET error = CASE
+        WHEN COALESCE(st.id_student, '') !~ '^\\s*\\d+\\s*$' THEN 'invalid student id'
+        WHEN chk.found_id IS NULL THEN 'unknown student'
+        WHEN %(grade_level)s IS NOT NULL AND chk.grade_level::text IS DISTINCT FROM %(grade_level)s
+            THEN 'student not in grade ' || %(grade_level)s
+        WHEN chk.row_count > 1 THEN 'student listed more than once'
+        WHEN COALESCE(st.math_score, '') !~ '^\\s*\\d{1,3}\\s*$' THEN 'invalid math_score'
+        WHEN trim(st.math_score)::int > 100 THEN 'math_score above 100'
+        WHEN COALESCE(st.reading_score, '') !~ '^\\s*\\d{1,3}\\s*$' THEN 'invalid reading_score'
+        WHEN trim(st.reading_score)::int > 100 THEN 'reading_score above 100'
+        WHEN COALESCE(st.writing_score, '') !~ '^\\s*\\d{1,3}\\s*$' THEN 'invalid writing_score'
+        WHEN trim(st.writing_score)::int > 100 THEN 'writing_score above 100'
+        WHEN COALESCE(trim(st.study_hours_per_week), '') = '' THEN
+            CASE
+                WHEN lower(COALESCE(trim(st.prefers_group_study), '')) NOT IN ('', 'yes', 'no')
+                    THEN 'prefers_group_study must be Yes/No'
+                WHEN lower(COALESCE(trim(st.has_private_tutor), '')) NOT IN ('', 'yes', 'no')
+                    THEN 'has_private_tutor must be Yes/No'
+            END
+        WHEN st.study_hours_per_week !~ '^\\s*\\d+(\\.\\d+)?\\s*$' THEN 'invalid study_hours_per_week'
+        WHEN trim(st.study_hours_per_week)::float > 168 THEN 'study_hours_per_week above 168'
+        WHEN lower(COALESCE(trim(st.prefers_group_study), '')) NOT IN ('', 'yes', 'no')
+            THEN 'prefers_group_study must be Yes/No'
+        WHEN lower(COALESCE(trim(st.has_private_tutor), '')) NOT IN ('', 'yes', 'no')
+            THEN 'has_private_tutor must be Yes/No'
+    END
+    FROM (
+        SELECT stg.row_no,
+               s.id_student AS found_id,
+               s.grade_level,
+               -- Per parsed id: '007' and '7' are the same student
+               COUNT(*) OVER (PARTITION BY stg.parsed_id) AS row_count
+        FROM (
+            SELECT row_no,
+                   CASE WHEN id_student ~ '^\\s*\\d{1,9}\\s*$' THEN trim(id_student)::int END AS parsed_id
+            FROM score_staging
+        ) stg
+        LEFT JOIN student s ON s.id_student = stg.parsed_id
+    ) chk
+    WHERE st.row_no = chk.row_no
+"""
+
+UPSERT_SCORES_SQL = """
+    WITH upserted AS (
+        INSERT INTO exam_scores (id_student, math_score, reading_score, writing_score)
+        SELECT trim(id_student)::int, trim(math_score)::smallint, trim(reading_score)::smallint,
+               trim(writing_score)::smallint
+        FROM score_staging
+        WHERE error IS NULL
+        ON CONFLICT (id_student) DO UPDATE SET
+            math_score = EXCLUDED.math_score,
+            reading_score = EXCLUDED.reading_score,
+            writing_score = EXCLUDED.writing_score
+        WHERE (exam_scores.math_score, exam_scores.reading_score, exam_scores.writing_score)
+              IS DISTINCT FROM (EXCLUDED.math_score, EXCLUDED.reading_score, EXCLUDED.writing_score)
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT COUNT(*) FILTER (WHERE inserted) AS inserted,
+           COUNT(*) FILTER (WHERE NOT inserted) AS updated
+    FROM upserted
+"""
+
+# Habit columns are optional per row; blank cells keep the stored value
+UPSERT_HABITS_SQL = """
+    WITH upserted AS (
+        INSERT INTO study_habits (id_student, study_hours_per_week, prefers_group_study, has_private_tutor)
+        SELECT trim(id_student)::int,
+               NULLIF(trim(study_hours_per_week), '')::real,
+               CASE lower(trim(prefers_group_study)) WHEN 'yes' THEN TRUE WHEN 'no' THEN FALSE END,
+               CASE lower(trim(has_private_tutor)) WHEN 'yes' THEN TRUE WHEN 'no' THEN FALSE END
+        FROM score_staging
+        WHERE error IS NULL
+          AND COALESCE(trim(study_hours_per_week), '') || COALESCE(trim(prefers_group_study), '')
+              || COALESCE(trim(has_private_tutor), '') <> ''
+        ON CONFLICT (id_student) DO UPDATE SET
+            study_hours_per_week = COALESCE(EXCLUDED.study_hours_per_week, study_habits.study_hours_per_week),
+            prefers_group_study = COALESCE(EXCLUDED.prefers_group_study, study_habits.prefers_group_study),
+            has_private_tutor = COALESCE(EXCLUDED.has_private_tutor, study_habits.has_private_tutor)
+        RETURNING (xmax = 0) AS inserted
+    )
+    SELECT COUNT(*) FILTER (WHERE inserted) AS inserted,
+           COUNT(*) FILTER (WHERE NOT inserted) AS updated
+    FROM upserted
+"""
+
+REJECTED_SQL = f"""
+    SELECT row_no, {', '.join(IMPORT_COLUMNS)}, error
+    FROM score_staging
+    WHERE error IS NOT NULL
+    ORDER BY row_no
+"""
+
+
+def normalize_import_frame(frame):
+    """Keep the import columns (missing ones blank) and stringify cells"""
+    frame = frame.copy()
+    frame.columns = [str(c).strip().lower() for c in frame.columns]
+    if 'id_student' not in frame.columns:
+        raise ValueError("The import needs an 'id_student' column")
+    for column in IMPORT_COLUMNS:
+        if column not in frame.columns:
+            frame[column] = ''
+    frame = frame[IMPORT_COLUMNS].astype(object)
+    # Grid edits come back as floats (85.0) when a column has blanks
+    return frame.apply(lambda column: column.map(
+        lambda v: '' if pd.isna(v) else str(int(v)) if isinstance(v, float) and v.is_integer() else str(v)
+    ))
+
+
+def import_scores(db, frame, grade_level=None):
+    """Validate and upsert a class's scores/habits in one transaction.
+
+    Rows with every score blank are skipped, not rejected. Returns a dict
+    with inserted/updated/unchanged/rejected/skipped counts for scores,
+    inserted/updated counts for study habits and the rejected rows (with the
+    reason) as a DataFrame. Database errors propagate to the caller.
+    """
+    frame = normalize_import_frame(frame)
+    frame.insert(0, 'row_no', range(1, len(frame) + 1))
+    # Baris tanpa nilai sama sekali (sisa baris kosong di grid/CSV) tidak diimpor;
+    # row_no tetap nomor baris aslinya
+    blank = frame[SCORE_FIELDS].apply(lambda column: column.str.strip() == '').all(axis=1)
+    skipped = int(blank.sum())
+    frame = frame[~blank]
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+
+    with db.transaction():
+        cursor = db.cursor
+        cursor.execute(CREATE_STAGING_SQL)
+        cursor.copy_expert(COPY_SQL, buffer)
+        cursor.execute(VALIDATE_SQL, {'grade_level': grade_level})
+        cursor.execute(UPSERT_SCORES_SQL)
+        scores = cursor.fetchone()
+        cursor.execute(UPSERT_HABITS_SQL)
+        habits = cursor.fetchone()
+        cursor.execute(REJECTED_SQL)
+        rejected = cursor.fetchall()
+
+    rejected_df = pd.DataFrame(rejected) if rejected else pd.DataFrame(columns=['row_no'] + IMPORT_COLUMNS + ['error'])
+    valid = len(frame) - len(rejected_df)
+    return {
+        'rows': len(frame),
+        'inserted': scores['inserted'],
+        'updated': scores['updated'],
+        'unchanged': valid - scores['inserted'] - scores['updated'],
+        'rejected': len(rejected_df),
+        'skipped': skipped,
+        'habits_inserted': habits['inserted'],
+        'habits_updated': habits['updated'],
+        'rejected_rows': rejected_df,
+    }
+
+
+def get_class_sheet(db, grade_level):
+    """Current scores/habits of a grade, shaped for the editable grid (flags as Yes/No)"""
+    return db.execute_query("""
+        SELECT s.id_student, s.name,
+               es.math_score, es.reading_score, es.writing_score,
+               sh.study_hours_per_week,
+               CASE sh.prefers_group_study WHEN TRUE THEN 'Yes' WHEN FALSE THEN 'No' END AS prefers_group_study,
+               CASE sh.has_private_tutor WHEN TRUE THEN 'Yes' WHEN FALSE THEN 'No' END AS has_private_tutor
+        FROM student s
+        LEFT JOIN exam_scores es ON es.id_student = s.id_student
+        LEFT JOIN study_habits sh ON sh.id_student = s.id_student
+        WHERE s.grade_level = %s
+        ORDER BY s.name, s.id_student
+    """, (grade_level,), use_primary=True)
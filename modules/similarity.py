@@ -0,0 +1,136 @@
+"""
+"Similar students" nearest-neighbour index.
+
+Built once per analytics snapshot: every student becomes a row of a
+standardized, weighted float32 feature matrix (scores, study hours,
+tutor/group-study flags, parental education level). A query is one
+matrix-vector product against precomputed row norms plus an argpartition,
+which answers k-nearest-neighbour lookups over a million students in a few
+milliseconds without a tree.
+"""
+import streamlit as st
+
+from modules.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+# Ordinal level of the parental_level_of_education labels (lower-cased)
+EDUCATION_LEVELS = {
+    'some high school': 0,
+    'high school': 1,
+    'some college': 2,
+    "associate's degree": 3,
+    'diploma': 3,
+    'bachelor': 4,
+    "bachelor's degree": 4,
+    'master': 5,
+    "master's degree": 5,
+}
+
+# feature -> weight applied after standardization
+FEATURE_WEIGHTS = {
+    'math_score': 1.0,
+    'reading_score': 1.0,
+    'writing_score': 1.0,
+    'study_hours_per_week': 0.75,
+    'has_private_tutor': 0.5,
+    'prefers_group_study': 0.5,
+    'parental_education': 0.5,
+}
+
+
+def education_level(snapshot):
+    """Ordinal parental education per student (NaN when unknown)"""
+    levels = np.array(
+        [EDUCATION_LEVELS.get(str(label).strip().lower(), np.nan) if label is not None else np.nan
+         for label in snapshot.labels['parental_education']] or [np.nan],
+        dtype=np.float32,
+    )
+    return levels[snapshot.columns['parental_education']]
+
+
+class SimilarityIndex:
+    """Brute-force k-NN over a weighted z-score feature matrix"""
+
+    def __init__(self, ids, features, loaded_at=None):
+        self.ids = ids
+        self.features = features
+        self.norms = np.einsum('ij,ij->i', features, features)
+        self.loaded_at = loaded_at
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        columns = []
+        for name, weight in FEATURE_WEIGHTS.items():
+            if name == 'parental_education':
+                values = education_level(snapshot)
+            elif name in ('has_private_tutor', 'prefers_group_study'):
+                values = snapshot.flag(name).astype(np.float32)
+            else:
+                values = snapshot.measure(name)
+            values = np.asarray(values, dtype=np.float32)
+            known = ~np.isnan(values)
+            mean = values[known].mean() if known.any() else 0.0
+            std = values[known].std() if known.any() else 0.0
+            # Missing values sit at the mean, i.e. contribute no distance
+            values = np.where(known, (values - mean) / (std or 1.0), 0.0) * weight
+            columns.append(values.astype(np.float32))
+        features = np.ascontiguousarray(np.stack(columns, axis=1)) if columns else np.empty((0, 0), np.float32)
+        return cls(snapshot.columns['id_student'], features, loaded_at=snapshot.loaded_at)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def position(self, id_student):
+        """Row of a student in the index (ids are sorted), or None"""
+        pos = int(np.searchsorted(self.ids, id_student))
+        return pos if pos < len(self.ids) and self.ids[pos] == id_student else None
+
+    def distances(self, vectors):
+        """Squared euclidean distances of query vectors (m x d) to every row"""
+        vectors = np.atleast_2d(vectors).astype(np.float32)
+        q_norms = np.einsum('ij,ij->i', vectors, vectors)
+        dist = self.norms[None, :] - 2.0 * (vectors @ self.features.T) + q_norms[:, None]
+        return np.maximum(dist, 0.0, out=dist)
+
+    def query(self, id_student, k=5, mask=None):
+        """k nearest students to one student as (ids, distances), nearest first.
+
+        `mask` optionally restricts candidates (e.g. the sidebar filters).
+        """
+        pos = self.position(id_student)
+        if pos is None:
+            return np.empty(0, dtype=self.ids.dtype), np.empty(0, dtype=np.float32)
+        dist = self.distances(self.features[pos])[0]
+        dist[pos] = np.inf
+        if mask is not None:
+            dist[~mask] = np.inf
+        return self._top_k(dist, k)
+
+    def query_many(self, ids, k=5, batch_size=64):
+        """k nearest neighbours for several students, batched to bound memory"""
+        results = {}
+        positions = [(i, self.position(i)) for i in ids]
+        positions = [(i, p) for i, p in positions if p is not None]
+        for start in range(0, len(positions), batch_size):
+            batch = positions[start:start + batch_size]
+            dist = self.distances(self.features[[p for _, p in batch]])
+            for row, (id_student, pos) in enumerate(batch):
+                dist[row, pos] = np.inf
+                results[id_student] = self._top_k(dist[row], k)
+        return results
+
+    def _top_k(self, dist, k):
+        finite = int(np.isfinite(dist).sum())
+        k = min(k, finite)
+        if k <= 0:
+            return np.empty(0, dtype=self.ids.dtype), np.empty(0, dtype=np.float32)
+        nearest = np.argpartition(dist, k - 1)[:k]
+        nearest = nearest[np.argsort(dist[nearest], kind='stable')]
+        return self.ids[nearest], np.sqrt(dist[nearest])
+
+
+@st.cache_resource(max_entries=2, show_spinner="Building similarity index...")
+def get_similarity_index(_snapshot, loaded_at):
+    """One index per snapshot version (`loaded_at` keys the cache)"""
+    return SimilarityIndex.from_snapshot(_snapshot)
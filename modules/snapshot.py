@@ -0,0 +1,275 @@
+"""
+Compact in-memory analytics snapshot.
+
+All students are held as column arrays with minimal dtypes: int8 scores
+(-1 = missing), uint8 category codes with lookup tables, bit-packed boolean
+flags. One snapshot is loaded per process and shared by every session, so a
+million students cost tens of MB instead of an object-heavy DataFrame per
+rerun.
+"""
+import os
+import time
+
+import streamlit as st
+
+from config.settings import SNAPSHOT_MAX_AGE_SECONDS, SNAPSHOT_PATH, SNAPSHOT_TTL_SECONDS
+from modules.comparison import JOINS
+from modules.lazy import lazy_import
+
+np = lazy_import("numpy")
+pa = lazy_import("pyarrow")
+pd = lazy_import("pandas")
+
+SNAPSHOT_QUERY = f"""
+    SELECT
+        s.id_student,
+        s.gender,
+        s.grade_level,
+        s.race_ethnicity,
+        pb.parental_level_of_education AS parental_education,
+        COALESCE(lunch.service_status, 'Standard') AS lunch_status,
+        e.math_score,
+        e.reading_score,
+        e.writing_score,
+        sh.study_hours_per_week,
+        sh.prefers_group_study,
+        sh.has_private_tutor,
+        EXISTS (
+            SELECT 1 FROM student_services ss
+            JOIN services srv ON ss.service_id = srv.service_id
+            WHERE ss.id_student = s.id_student AND srv.service_name = 'Test Preparation Course'
+        ) AS test_prep,
+        COALESCE(act.hours, 0) AS activity_hours
+    FROM student s
+    LEFT JOIN exam_scores e ON e.id_student = s.id_student
+    {JOINS['sh']}
+    {JOINS['pb']}
+    {JOINS['lunch']}
+    LEFT JOIN (
+        SELECT id_student, SUM(hours_per_week) AS hours
+        FROM student_activities
+        GROUP BY id_student
+    ) act ON act.id_student = s.id_student
+    ORDER BY s.id_student
+"""
+
+CATEGORY_COLUMNS = ('gender', 'grade_level', 'race_ethnicity', 'parental_education', 'lunch_status')
+SCORE_COLUMNS = ('math_score', 'reading_score', 'writing_score')
+FLAG_COLUMNS = ('prefers_group_study', 'has_private_tutor', 'test_prep')
+MEASURES = SCORE_COLUMNS + ('average_score', 'study_hours_per_week', 'activity_hours')
+
+MISSING_SCORE = -1
+
+
+def parse_flag(value):
+    """Interpret 'Yes'/'No', booleans and 0/1 as a boolean flag"""
+    if isinstance(value, str):
+        return value.strip().lower() in ('yes', 'y', 'true', 't', '1')
+    return bool(value)
+
+
+class AnalyticsSnapshot:
+    """Column-oriented, dtype-minimal copy of the per-student dataset"""
+
+    def __init__(self, columns, labels, size, loaded_at=None, source='postgres'):
+        self.columns = columns
+        self.labels = labels
+        self.size = size
+        self.loaded_at = loaded_at or time.time()
+        self.source = source
+
+    # --- Loading ---
+    @classmethod
+    def load(cls, db, chunk_size=50000):
+        """Stream the joined student dataset from Postgres into compact arrays"""
+        lookups = {name: {} for name in CATEGORY_COLUMNS}
+        chunks = {name: [] for name in ('id_student',) + CATEGORY_COLUMNS + SCORE_COLUMNS
+                  + FLAG_COLUMNS + ('study_hours_per_week', 'activity_hours')}
+
+        for names, rows in db.iter_query(SNAPSHOT_QUERY, chunk_size=chunk_size):
+            values = dict(zip(names, zip(*rows)))
+            chunks['id_student'].append(np.array(values['id_student'], dtype=np.int32))
+            for name in CATEGORY_COLUMNS:
+                lookup = lookups[name]
+                chunks[name].append(np.fromiter(
+                    (lookup.setdefault(v, len(lookup)) for v in values[name]),
+                    dtype=np.int32, count=len(rows)
+                ))
+            for name in SCORE_COLUMNS:
+                chunks[name].append(np.array(
+                    [MISSING_SCORE if v is None else v for v in values[name]], dtype=np.int8
+                ))
+            for name in FLAG_COLUMNS:
+                chunks[name].append(np.fromiter((parse_flag(v) for v in values[name]), dtype=bool, count=len(rows)))
+            chunks['study_hours_per_week'].append(np.array(
+                [np.nan if v is None else float(v) for v in values['study_hours_per_week']], dtype=np.float32
+            ))
+            chunks['activity_hours'].append(np.array(values['activity_hours'], dtype=np.uint16))
+
+        size = sum(len(c) for c in chunks['id_student'])
+        columns = {}
+        for name, parts in chunks.items():
+            columns[name] = np.concatenate(parts) if parts else np.empty(0, dtype=np.int8)
+
+        labels = {}
+        for name in CATEGORY_COLUMNS:
+            if len(lookups[name]) > 256:
+                raise ValueError(f"Column {name} has more than 256 distinct values")
+            columns[name] = columns[name].astype(np.uint8)
+            labels[name] = tuple(lookups[name])
+        for name in FLAG_COLUMNS:
+            # LSB-first packing matches Arrow's boolean bitmap layout
+            columns[name] = np.packbits(columns[name].astype(bool), bitorder='little')
+
+        return cls(columns, labels, size)
+
+    # --- Arrow interchange ---
+    def to_arrow(self):
+        """Arrow table of the encoded columns (categories as uint8 dictionaries)"""
+        arrays, names = [], []
+        for name, array in self.columns.items():
+            if name in CATEGORY_COLUMNS:
+                arrays.append(pa.DictionaryArray.from_arrays(
+                    pa.array(array, type=pa.uint8()), pa.array(list(self.labels[name]), type=pa.string())
+                ))
+            elif name in FLAG_COLUMNS:
+                arrays.append(pa.Array.from_buffers(pa.bool_(), self.size, [None, pa.py_buffer(array)]))
+            else:
+                arrays.append(pa.array(array))
+            names.append(name)
+        metadata = {'loaded_at': str(self.loaded_at), 'size': str(self.size)}
+        return pa.Table.from_arrays(arrays, names=names).replace_schema_metadata(metadata)
+
+    @classmethod
+    def from_arrow(cls, table, source='arrow'):
+        """Wrap a (memory-mapped) Arrow table without copying column buffers"""
+        table = table.combine_chunks()
+        size = table.num_rows
+        columns, labels = {}, {}
+        for name in table.column_names:
+            array = table.column(name).chunk(0) if size else None
+            if array is None:
+                columns[name] = np.empty(0, dtype=np.uint8)
+                if name in CATEGORY_COLUMNS:
+                    labels[name] = ()
+            elif name in CATEGORY_COLUMNS:
+                columns[name] = array.indices.to_numpy(zero_copy_only=True)
+                labels[name] = tuple(array.dictionary.to_pylist())
+            elif name in FLAG_COLUMNS:
+                if array.offset % 8:
+                    raise ValueError(f"Flag column {name} is not byte-aligned")
+                bitmap = array.buffers()[1]
+                start = array.offset // 8
+                columns[name] = np.frombuffer(bitmap, dtype=np.uint8)[start:start + (size + 7) // 8]
+            else:
+                columns[name] = array.to_numpy(zero_copy_only=True)
+        metadata = table.schema.metadata or {}
+        loaded_at = float(metadata.get(b'loaded_at', time.time()))
+        return cls(columns, labels, size, loaded_at=loaded_at, source=source)
+
+    # --- Column access ---
+    def flag(self, name):
+        """Unpacked boolean array for one bit-packed flag column"""
+        return np.unpackbits(self.columns[name], count=self.size, bitorder='little').astype(bool)
+
+    def measure(self, name):
+        """Float view of a measure with NaN for missing values"""
+        if name == 'average_score':
+            scores = np.stack([self.measure(s) for s in SCORE_COLUMNS])
+            return scores.mean(axis=0)
+        values = self.columns[name].astype(np.float32)
+        if name in SCORE_COLUMNS:
+            values[self.columns[name] == MISSING_SCORE] = np.nan
+        return values
+
+    # --- Vectorized helpers ---
+    def mask(self, **filters):
+        """Boolean row mask; categories take a label or list of labels, flags a bool"""
+        result = np.ones(self.size, dtype=bool)
+        for name, wanted in filters.items():
+            if wanted is None:
+                continue
+            if name in FLAG_COLUMNS:
+                result &= self.flag(name) == bool(wanted)
+            elif name in CATEGORY_COLUMNS:
+                wanted = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+                codes = [self.labels[name].index(w) for w in wanted if w in self.labels[name]]
+                result &= np.isin(self.columns[name], codes)
+            else:
+                raise ValueError(f"Cannot filter on: {name}")
+        return result
+
+    def group_stats(self, dimension, measure, mask=None):
+        """count/mean/std of a measure per category (or flag) value"""
+        if dimension in FLAG_COLUMNS:
+            codes = self.flag(dimension).astype(np.intp)
+            labels = ('No', 'Yes')
+        else:
+            codes = self.columns[dimension].astype(np.intp)
+            labels = self.labels[dimension]
+
+        values = self.measure(measure).astype(np.float64)
+        keep = ~np.isnan(values)
+        if mask is not None:
+            keep &= mask
+        codes, values = codes[keep], values[keep]
+
+        n = len(labels)
+        count = np.bincount(codes, minlength=n)
+        total = np.bincount(codes, weights=values, minlength=n)
+        total_sq = np.bincount(codes, weights=values * values, minlength=n)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            var = (total_sq - count * mean * mean) / (count - 1)
+        frame = pd.DataFrame({
+            dimension: list(labels),
+            'count': count,
+            'mean': mean,
+            'std': np.sqrt(np.clip(var, 0, None)),
+        })
+        return frame[frame['count'] > 0].reset_index(drop=True)
+
+    def to_frame(self, columns=None, mask=None):
+        """Decode selected columns into a regular DataFrame (for charts).
+
+        `mask` is a boolean row mask or an array of row positions; rows are
+        selected before decoding.
+        """
+        columns = columns or (('id_student',) + CATEGORY_COLUMNS + MEASURES + FLAG_COLUMNS)
+        rows = slice(None) if mask is None else mask
+        data = {}
+        for name in columns:
+            if name in CATEGORY_COLUMNS:
+                categories = [label if label is not None else "Unknown" for label in self.labels[name]]
+                data[name] = pd.Categorical.from_codes(self.columns[name][rows], categories=categories)
+            elif name in FLAG_COLUMNS:
+                data[name] = self.flag(name)[rows]
+            elif name in MEASURES:
+                data[name] = self.measure(name)[rows]
+            else:
+                data[name] = self.columns[name][rows]
+        return pd.DataFrame(data)
+
+    # --- Footprint ---
+    def memory_usage(self):
+        """Bytes held per column (including lookup tables) and in total"""
+        usage = {name: int(array.nbytes) for name, array in self.columns.items()}
+        usage['labels'] = sum(len(str(label)) for values in self.labels.values() for label in values)
+        usage['total'] = sum(usage.values())
+        return usage
+
+
+@st.cache_resource(ttl=SNAPSHOT_TTL_SECONDS, show_spinner="Loading analytics snapshot...")
+def get_snapshot(_db):
+    """Process-wide snapshot shared by all sessions.
+
+    Prefers the exported Arrow file (memory-mapped, shared through the page
+    cache by every worker process) while it is fresh; falls back to Postgres.
+    """
+    from modules.database import read_snapshot
+
+    if os.path.exists(SNAPSHOT_PATH):
+        age = time.time() - os.path.getmtime(SNAPSHOT_PATH)
+        if age <= SNAPSHOT_MAX_AGE_SECONDS:
+            return AnalyticsSnapshot.from_arrow(read_snapshot(SNAPSHOT_PATH), source=SNAPSHOT_PATH)
+    return AnalyticsSnapshot.load(_db)
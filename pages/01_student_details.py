@@ -1,63 +1,85 @@
 import streamlit as st
-import pandas as pd
-from modules.database import DatabaseConnection
+from modules.database import get_db_connection
+from modules.filters import render_filter_sidebar, snapshot_mask
+from modules.memory_profile import page_run
+from modules.rerun_cost import fragment
+from modules.roster import render_roster_browser
+from modules.similarity import get_similarity_index
+from modules.snapshot import get_snapshot
 from modules.styles import get_custom_css
 
 # Page Configuration
 st.set_page_config(page_title="Student Details", page_icon="👤", layout="wide")
 st.markdown(get_custom_css(), unsafe_allow_html=True)
+with page_run('Student Details'):
+    # Connect to Database
+    db = get_db_connection()
+    if not db:
+        st.error("❌ Database connection failed. Please check your configuration.")
+        st.stop()
 
-# Connect to Database
-db = DatabaseConnection()
-db.connect()
-
-st.title("Student Profiles")
-
-def render_info_card(column, label, value):
-    display_value = value if value not in (None, "") else "-"
-    column.markdown(
-        f"""
-        <div class="profile-card">
-            <span class="profile-label">{label}</span>
-            <span class="profile-value">{display_value}</span>
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
-
-# --- SEARCH BAR ---
-col1, col2 = st.columns([3, 1])
-with col1:
-    search_term = st.text_input("Search Student by Name", placeholder="Enter student name...")
-
-# --- FETCH STUDENTS LIST ---
-# Update: student_id -> id_student, ethnicity -> race_ethnicity
-query = "SELECT id_student, name, gender, race_ethnicity FROM student"
-if search_term:
-    query += f" WHERE name ILIKE '%{search_term}%'"
-query += " ORDER BY id_student LIMIT 100"
-
-students = db.execute_query(query)
-
-if not students.empty:
-    # --- SELECTION ---
-    selected_student_name = st.selectbox("Select Student", students['name'].tolist())
-    
-    if selected_student_name:
-        # Get ID (Update: id_student)
-        student_id = students[students['name'] == selected_student_name]['id_student'].values[0]
-        
+    filters = render_filter_sidebar(db)
+
+    st.title("Student Profiles")
+
+    def render_info_card(column, label, value):
+        display_value = value if value not in (None, "") else "-"
+        column.markdown(
+            f"""
+            <div class="profile-card">
+                <span class="profile-label">{label}</span>
+                <span class="profile-value">{display_value}</span>
+            </div>
+            """,
+            unsafe_allow_html=True
+        )
+
+    @fragment('similar_students')
+    def similar_students(db, student_id, filters):
+        """k-NN di snapshot bersama; slider k hanya me-rerun bagian ini"""
+        st.markdown("### Similar Students")
+        k = st.slider("Number of similar students", 3, 20, 5)
+        snapshot = get_snapshot(db)
+        index = get_similarity_index(snapshot, snapshot.loaded_at)
+        neighbour_ids, distances = index.query(student_id, k=k, mask=snapshot_mask(snapshot, filters))
+
+        if len(neighbour_ids):
+            rows = index.ids.searchsorted(neighbour_ids)
+            similar = snapshot.to_frame(
+                ['id_student', 'grade_level', 'math_score', 'reading_score', 'writing_score',
+                 'study_hours_per_week', 'has_private_tutor', 'prefers_group_study', 'parental_education'],
+                mask=rows,
+            )
+            names = db.execute_query(
+                "SELECT id_student, name FROM student WHERE id_student = ANY(%s)",
+                ([int(i) for i in neighbour_ids],)
+            )
+            if not names.empty:
+                similar = similar.merge(names, on='id_student', how='left')
+            similar.insert(1, 'distance', distances.round(3))
+            st.dataframe(similar, use_container_width=True, hide_index=True)
+            st.caption("Distance over standardized scores, study hours, tutor/group-study flags "
+                       "and parental education; restricted to the sidebar filters.")
+        else:
+            st.info("This student is not in the analytics snapshot yet.")
+
+    # --- ROSTER (keyset paging, halaman berikutnya di-prefetch) ---
+    # Update: student_id -> id_student, ethnicity -> race_ethnicity
+    # Filter sidebar + pencarian nama digabung jadi satu WHERE berparameter
+    student_id = render_roster_browser(db, filters)
+
+    if student_id is not None:
         # --- FETCH FULL DETAILS (MULTI-TABLE QUERIES) ---
-        
+
         # 1. Basic Info
         details = db.execute_query("SELECT * FROM student WHERE id_student = %s", (int(student_id),))
-        
+
         # 2. Exam Scores (New Table)
         scores = db.execute_query("SELECT * FROM exam_scores WHERE id_student = %s", (int(student_id),))
-        
+
         # 3. Study Habits (New Columns)
         habits = db.execute_query("SELECT * FROM study_habits WHERE id_student = %s", (int(student_id),))
-        
+
         # 4. Lunch Status (Complex JOIN)
         # Mencari status layanan di mana nama servicenya adalah 'Lunch Program'
         lunch_query = """
@@ -72,21 +94,21 @@ if not students.empty:
         # --- DISPLAY LOGIC ---
         if not details.empty:
             s = details.iloc[0]
-            
+
             st.markdown("---")
             st.subheader(f"Profile: {s['name']}")
-            
+
             # Personal Info Grid
             col1, col2, col3, col4 = st.columns(4)
             render_info_card(col1, "ID", s['id_student'])
             render_info_card(col2, "Gender", s['gender'])
             render_info_card(col3, "Race/Ethnicity", s['race_ethnicity']) # Update key
             render_info_card(col4, "Lunch Plan", lunch_status) # Value from Join
-            
+
             # Academic Card
             st.markdown("### Academic Performance")
             col1, col2, col3 = st.columns(3)
-            
+
             if not scores.empty:
                 sc = scores.iloc[0]
                 with col1: st.metric("Math Score", sc['math_score'])
@@ -94,18 +116,19 @@ if not students.empty:
                 with col3: st.metric("Writing Score", sc['writing_score'])
             else:
                 st.warning("No exam scores found for this student.")
-                
+
             # Study Habits
             if not habits.empty:
                 h = habits.iloc[0]
                 st.markdown("### Study Habits")
                 col1, col2, col3 = st.columns(3)
-                
+
                 # Update Metrics sesuai kolom baru database
                 col1.metric("Weekly Study", f"{h['study_hours_per_week']}h")
-                col2.metric("Group Study?", h['prefers_group_study'])
-                col3.metric("Private Tutor?", h['has_private_tutor'])
+                col2.metric("Group Study?", "Yes" if h['prefers_group_study'] else "No")
+                col3.metric("Private Tutor?", "Yes" if h['has_private_tutor'] else "No")
             else:
                 st.info("No study habit data available.")
-else:
-    st.info("No students found matching your search.")
\ No newline at end of file
+
+            # --- SIMILAR STUDENTS (k-NN di snapshot bersama) ---
+            similar_students(db, int(student_id), filters)
@@ -0,0 +1,80 @@
+import io
+
+import psycopg2
+import streamlit as st
+from modules.database import get_db_connection
+from modules.lazy import lazy_import
+from modules.memory_profile import page_run
+from modules.refresh import get_scheduler
+from modules.score_import import IMPORT_COLUMNS, get_class_sheet, import_scores
+from modules.styles import get_custom_css
+
+pd = lazy_import("pandas")
+
+st.set_page_config(page_title="Score Import", page_icon="📝", layout="wide")
+st.markdown(get_custom_css(), unsafe_allow_html=True)
+with page_run('Score Import'):
+    db = get_db_connection()
+    if not db:
+        st.error("❌ Database connection failed. Please check your configuration.")
+        st.stop()
+
+    st.title("Bulk Score Entry")
+    st.caption("Upload a class CSV or edit the grid, then import everything in one transaction. "
+               "Blank study-habit cells keep the stored value.")
+
+    grades = db.execute_query("SELECT DISTINCT grade_level FROM student ORDER BY grade_level")
+    if grades.empty:
+        st.warning("No students found.")
+        st.stop()
+
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        grade_level = st.selectbox("Grade Level", grades['grade_level'].tolist())
+    with col2:
+        source = st.radio("Input", ["Edit grid", "Upload CSV"], horizontal=True)
+
+    sheet = get_class_sheet(db, grade_level)
+
+    # --- INPUT ---
+    if source == "Upload CSV":
+        template = sheet[IMPORT_COLUMNS].to_csv(index=False)
+        st.download_button("Download class template", template, file_name=f"scores_{grade_level}.csv", mime="text/csv")
+        uploaded = st.file_uploader("Class scores CSV", type=["csv"])
+        entries = pd.read_csv(io.BytesIO(uploaded.getvalue()), dtype=str, keep_default_na=False) if uploaded else None
+        if entries is not None:
+            st.dataframe(entries, use_container_width=True, height=300)
+    else:
+        entries = st.data_editor(
+            sheet,
+            disabled=['id_student', 'name'],
+            hide_index=True,
+            use_container_width=True,
+            key=f"score_grid_{grade_level}",
+        )
+
+    # --- IMPORT ---
+    if st.button("Import Scores", type="primary", disabled=entries is None or entries.empty):
+        try:
+            result = import_scores(db, entries, grade_level=grade_level)
+        except ValueError as e:
+            st.error(str(e))
+        except psycopg2.Error as e:
+            st.error(f"Import failed, nothing was saved: {e}")
+        else:
+            st.success(f"Processed {result['rows']} rows.")
+            scheduler = get_scheduler()
+            if scheduler is not None and (result['inserted'] or result['updated']):
+                # Dashboard precompute ikut diperbarui tanpa menunggu interval
+                scheduler.refresh_now()
+            m1, m2, m3, m4 = st.columns(4)
+            m1.metric("Inserted", result['inserted'])
+            m2.metric("Updated", result['updated'])
+            m3.metric("Unchanged", result['unchanged'])
+            m4.metric("Rejected", result['rejected'])
+            st.caption(f"Study habits: {result['habits_inserted']} inserted, {result['habits_updated']} updated"
+                       + (f" · {result['skipped']} rows without scores skipped" if result['skipped'] else ""))
+
+            if result['rejected']:
+                st.subheader("Rejected Rows")
+                st.dataframe(result['rejected_rows'], use_container_width=True, hide_index=True)
@@ -0,0 +1,105 @@
+import streamlit as st
+from modules.database import get_db_connection
+from modules.engagement import get_engagement
+from modules.filters import render_filter_sidebar
+from modules.lazy import lazy_import
+from modules.memory_profile import page_run
+from modules.styles import get_custom_css
+
+px = lazy_import("plotly.express")
+
+st.set_page_config(page_title="Engagement", page_icon="🏅", layout="wide")
+st.markdown(get_custom_css(), unsafe_allow_html=True)
+with page_run('Engagement'):
+    db = get_db_connection()
+    if not db:
+        st.error("❌ Database connection failed. Please check your configuration.")
+        st.stop()
+
+    filters = render_filter_sidebar(db)
+
+    def apply_gold_theme(fig):
+        fig.update_layout(
+            template="plotly_dark",
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            font=dict(color='#E0E0E0', family="Lato"),
+            title_font=dict(color='#D4AF37', family="Cinzel"),
+            xaxis=dict(gridcolor='#333333', showgrid=True),
+            yaxis=dict(gridcolor='#333333', showgrid=True),
+            colorway=['#D4AF37', '#C5A028', '#8A7120', '#E5C15D', '#F0D585']
+        )
+        return fig
+
+    st.title("Activities & Services Engagement")
+
+    # Satu query teragregasi (di-cache per kombinasi filter)
+    try:
+        summary, co_participation, students = get_engagement(db, filters)
+    except RuntimeError:
+        st.error("Engagement analytics are unavailable right now. Please try again shortly.")
+        st.stop()
+
+    if summary.empty:
+        st.info("No activity or service enrolment data available.")
+        st.stop()
+
+    activities = summary[summary['kind'] == 'activity']
+    services = summary[summary['kind'] == 'service']
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Students", f"{students:,}")
+    col2.metric("Activities Offered", len(activities))
+    col3.metric("Services Offered", len(services))
+
+    st.markdown("---")
+
+    tab1, tab2, tab3 = st.tabs(["Participation", "Score Impact", "Co-Participation"])
+
+    with tab1:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.subheader("Participation Rate")
+            fig = px.bar(summary, x='item', y='participation_rate', color='kind', barmode='group',
+                         labels={'item': '', 'participation_rate': 'Share of Students', 'kind': ''})
+            fig = apply_gold_theme(fig)
+            fig.update_layout(yaxis_tickformat='.0%')
+            st.plotly_chart(fig, use_container_width=True)
+        with col2:
+            st.subheader("Weekly Hours per Activity")
+            if not activities.empty:
+                fig = px.bar(activities, x='item', y='avg_hours',
+                             labels={'item': '', 'avg_hours': 'Avg Hours/Week'})
+                fig = apply_gold_theme(fig)
+                st.plotly_chart(fig, use_container_width=True)
+            else:
+                st.info("No activity data available.")
+
+    with tab2:
+        st.subheader("Participants vs Non-Participants")
+        scores = summary.melt(id_vars=['item'], value_vars=['participant_score', 'non_participant_score'],
+                              var_name='group', value_name='average_score')
+        scores['group'] = scores['group'].map({'participant_score': 'Participants',
+                                               'non_participant_score': 'Non-Participants'})
+        fig = px.bar(scores, x='item', y='average_score', color='group', barmode='group',
+                     labels={'item': '', 'average_score': 'Average Score', 'group': ''})
+        fig = apply_gold_theme(fig)
+        st.plotly_chart(fig, use_container_width=True)
+
+        table = summary.rename(columns={
+            'kind': 'Type', 'item': 'Activity/Service', 'participants': 'Participants',
+            'participation_rate': 'Rate', 'avg_hours': 'Hours/Week', 'participant_score': 'Participant Avg',
+            'non_participant_score': 'Non-Participant Avg', 'score_delta': 'Delta',
+        })
+        st.dataframe(table.round(2), use_container_width=True, hide_index=True)
+
+    with tab3:
+        st.subheader("Activity Co-Participation")
+        if not co_participation.empty:
+            fig = px.imshow(co_participation, text_auto=True, color_continuous_scale=['#141414', '#D4AF37'],
+                            labels={'color': 'Students'})
+            fig = apply_gold_theme(fig)
+            st.plotly_chart(fig, use_container_width=True)
+            st.caption("Cells count students enrolled in both activities; the diagonal is total participants.")
+        else:
+            st.info("No activity enrolment data available.")
@@ -0,0 +1,133 @@
+import os
+
+import streamlit as st
+from modules import memory_profile
+from modules.admission import admission
+from modules.rerun_cost import recorded_runs
+from modules.lazy import lazy_import
+from modules.styles import get_custom_css
+
+pd = lazy_import("pandas")
+
+st.set_page_config(page_title="Diagnostics", page_icon="🩺", layout="wide")
+st.markdown(get_custom_css(), unsafe_allow_html=True)
+
+st.title("Diagnostics")
+
+# --- ADMISSION CONTROL ---
+st.subheader("Query Admission")
+admission_df = pd.DataFrame.from_dict(admission.metrics(), orient='index')
+admission_df.index.name = 'class'
+for column in ('wait_p50', 'wait_p95', 'wait_max'):
+    admission_df[column] = (admission_df[column] * 1000).round(1)
+st.dataframe(admission_df.rename(columns={'wait_p50': 'wait_p50_ms', 'wait_p95': 'wait_p95_ms',
+                                          'wait_max': 'wait_max_ms'}),
+             use_container_width=True)
+st.caption("Slots are per process. `coalesced` reads shared the result of an identical query already in flight; "
+           "waits cover the last 1,000 admitted queries.")
+
+st.markdown("---")
+
+# --- RERUN COST ---
+st.subheader("Rerun Cost")
+reruns = pd.DataFrame(recorded_runs())
+if not reruns.empty:
+    cost = reruns.groupby(['page', 'scope', 'mode']).agg(
+        runs=('queries', 'size'),
+        interrupted=('interrupted', 'sum'),
+        avg_queries=('queries', 'mean'),
+        max_queries=('queries', 'max'),
+        avg_query_ms=('query_time', 'mean'),
+        avg_run_ms=('duration', 'mean'),
+    ).reset_index()
+    cost['avg_query_ms'] *= 1000
+    cost['avg_run_ms'] *= 1000
+    st.dataframe(cost.round(1), use_container_width=True, hide_index=True)
+    st.caption("`page` rows are full script runs; other scopes are fragment reruns triggered by that section's "
+               "widgets. Compare with a process started with `FRAGMENTS_ENABLED=0` (mode `full reruns`). "
+               "`interrupted` runs were cut short by st.stop(), st.rerun() or an error.")
+else:
+    st.info("No page runs recorded yet.")
+
+st.markdown("---")
+
+# --- MEMORY ---
+st.subheader("Memory")
+
+if not memory_profile.enabled():
+    st.info("Memory profiling is off. Start Streamlit with `MEMORY_PROFILING=1` to record "
+            "per-page tracemalloc diffs and DataFrame footprints.")
+    st.stop()
+
+def mb(value):
+    return value / 1024 ** 2 if value is not None else None
+
+# --- PROCESS ---
+runs = memory_profile.page_history()
+latest = [records[-1] for records in runs.values() if records]
+recorded = memory_profile.recorded_frames()
+rss = memory_profile.rss_bytes()
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Process RSS", f"{mb(rss):.1f} MB" if rss is not None else "n/a")
+col2.metric("Traced (last run)", f"{mb(max(r['traced'] for r in latest)):.1f} MB" if latest else "n/a")
+col3.metric("Pages Profiled", len(runs))
+col4.metric("Frames Recorded", len(recorded))
+st.caption(f"PID {os.getpid()} · tracemalloc is process-wide: concurrent sessions overlap in per-run diffs.")
+
+if st.button("Reset measurements"):
+    memory_profile.reset()
+    st.rerun()
+
+st.markdown("---")
+
+# --- PER PAGE ---
+st.markdown("**Memory retained per page run**")
+if runs:
+    summary = pd.DataFrame([
+        {
+            'page': page,
+            'runs': len(records),
+            'last_retained_mb': mb(records[-1]['retained']),
+            'avg_retained_mb': mb(sum(r['retained'] for r in records) / len(records)),
+            'peak_mb': mb(max(r['peak'] for r in records)),
+            'traced_mb': mb(records[-1]['traced']),
+            'last_run_s': records[-1]['duration'],
+        }
+        for page, records in runs.items() if records
+    ]).sort_values('avg_retained_mb', ascending=False)
+    st.dataframe(summary.round(2), use_container_width=True, hide_index=True)
+
+    page = st.selectbox("Page", summary['page'].tolist())
+    history = pd.DataFrame(runs[page])
+    history['traced_mb'] = history['traced'].map(mb)
+    st.line_chart(history['traced_mb'], height=200)
+    st.caption("Traced Python memory after each run of this page; a steady climb points at a leak.")
+
+    st.markdown("**Largest allocations retained by the last run**")
+    top = pd.DataFrame(runs[page][-1]['top'])
+    if not top.empty:
+        top['size_diff_kb'] = top['size_diff'] / 1024
+        top['size_kb'] = top['size'] / 1024
+        st.dataframe(top[['location', 'size_diff_kb', 'count_diff', 'size_kb']].round(1),
+                     use_container_width=True, hide_index=True)
+    else:
+        st.info("The last run retained no new allocations.")
+else:
+    st.info("No page runs recorded yet. Open the other pages, then come back.")
+
+st.markdown("---")
+
+# --- FRAMES ---
+st.markdown("**Query result frames**")
+frames = pd.DataFrame(recorded)
+if not frames.empty:
+    frames['mb'] = frames['bytes'].map(mb)
+    by_page = frames.groupby('page').agg(frames=('mb', 'size'), total_mb=('mb', 'sum'), largest_mb=('mb', 'max'))
+    st.dataframe(by_page.sort_values('total_mb', ascending=False).round(2), use_container_width=True)
+
+    st.markdown("**Largest frames**")
+    largest = frames.nlargest(25, 'bytes')[['page', 'mb', 'rows', 'columns', 'query']]
+    st.dataframe(largest.round(2), use_container_width=True, hide_index=True)
+else:
+    st.info("No query results recorded yet.")
@@ -3,6 +3,15 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from modules.database import get_db_connection
+from modules.comparison import box_figure, box_summaries, compare, pivot_stat, select_grouping
+
+SCORE_COLUMNS = ['math_score', 'reading_score', 'writing_score']
+
+def stats_table(stats, dimension, stat_names):
+    """Wide table of several statistics, columns grouped per subject"""
+    rows = select_grouping(stats, dimension)
+    table = rows.pivot(index=dimension, columns='measure', values=stat_names)
+    return table.swaplevel(axis=1).sort_index(axis=1).round(2)
 
 st.set_page_config(
     page_title="Comparison Analysis",
@@ -15,34 +24,30 @@ st.title("📊 Comparison Analysis")
 db = get_db_connection()
 
 if db:
+    # Semua statistik perbandingan (mean/std/count/kuartil) dalam satu query GROUPING SETS
+    stats = compare(db, ['grade_level', 'gender', 'tutor'], measures=SCORE_COLUMNS)
+
+    # Data mentah hanya untuk violin plot gender; box plot memakai ringkasan dari SQL
+    distribution_df = db.execute_query("""
+        SELECT s.gender, es.reading_score
+        FROM student s
+        JOIN exam_scores es ON s.id_student = es.id_student
+    """)
+
     tab1, tab2, tab3 = st.tabs(["Grade Comparison", "Gender Comparison", "Tutor Impact"])
     
     with tab1:
         st.subheader("Performance by Grade Level")
         
-        performance_df = db.execute_query("""
-            SELECT 
-                s.grade_level,
-                es.math_score,
-                es.reading_score,
-                es.writing_score
-            FROM student s
-            JOIN exam_scores es ON s.id_student = es.id_student
-        """)
-        
-        if performance_df is not None and len(performance_df) > 0:
+        if not stats.empty:
             # Calculate stats by grade
-            grade_stats = performance_df.groupby('grade_level').agg({
-                'math_score': ['mean', 'std'],
-                'reading_score': ['mean', 'std'],
-                'writing_score': ['mean', 'std']
-            }).round(2)
+            grade_stats = stats_table(stats, 'grade_level', ['mean', 'std'])
             
             # Visualization
             col1, col2 = st.columns(2)
             
             with col1:
-                avg_by_grade = performance_df.groupby('grade_level')[['math_score', 'reading_score', 'writing_score']].mean()
+                avg_by_grade = pivot_stat(stats, 'grade_level')[SCORE_COLUMNS]
                 fig = px.bar(
                     avg_by_grade.reset_index(),
                     x='grade_level',
@@ -55,14 +60,10 @@ if db:
                 st.plotly_chart(fig, use_container_width=True)
             
             with col2:
-                fig_box = px.box(
-                    performance_df,
-                    x='grade_level',
-                    y='math_score',
-                    title="Math Score Distribution by Grade",
-                    labels={'grade_level': 'Grade Level', 'math_score': 'Math Score'}
-                )
-                fig_box.update_layout(height=400)
+                # Ringkasan box plot dihitung di SQL: payload konstan berapapun jumlah siswa
+                grade_box = box_summaries(db, ['math_score'], dimension='grade_level')
+                fig_box = box_figure(grade_box, title="Math Score Distribution by Grade")
+                fig_box.update_layout(height=400, xaxis_title='Grade Level', yaxis_title='Math Score')
                 st.plotly_chart(fig_box, use_container_width=True)
             
             st.subheader("Detailed Statistics")
@@ -71,21 +72,13 @@ if db:
     with tab2:
         st.subheader("Performance by Gender")
         
-        gender_df = db.execute_query("""
-            SELECT 
-                s.gender,
-                es.math_score,
-                es.reading_score,
-                es.writing_score
-            FROM student s
-            JOIN exam_scores es ON s.id_student = es.id_student
-        """)
+        gender_df = distribution_df
         
-        if gender_df is not None and len(gender_df) > 0:
+        if not stats.empty and gender_df is not None and len(gender_df) > 0:
             col1, col2 = st.columns(2)
             
             with col1:
-                avg_gender = gender_df.groupby('gender')[['math_score', 'reading_score', 'writing_score']].mean()
+                avg_gender = pivot_stat(stats, 'gender')[SCORE_COLUMNS]
                 fig = px.bar(
                     avg_gender.reset_index(),
                     x='gender',
@@ -111,29 +104,14 @@ if db:
     with tab3:
         st.subheader("Impact of Private Tutor on Performance")
         
-        tutor_df = db.execute_query("""
-            SELECT 
-                sh.has_private_tutor,
-                es.math_score,
-                es.reading_score,
-                es.writing_score
-            FROM student s
-            JOIN study_habits sh ON s.id_student = sh.id_student
-            JOIN exam_scores es ON s.id_student = es.id_student
-        """)
-        
-        if tutor_df is not None and len(tutor_df) > 0:
-            tutor_df['tutor_status'] = tutor_df['has_private_tutor'].apply(
-                lambda x: 'With Tutor' if x else 'No Tutor'
-            )
-            
+        if not stats.empty:
             col1, col2 = st.columns(2)
             
             with col1:
-                avg_tutor = tutor_df.groupby('tutor_status')[['math_score', 'reading_score', 'writing_score']].mean()
+                avg_tutor = pivot_stat(stats, 'tutor')[SCORE_COLUMNS]
                 fig = px.bar(
                     avg_tutor.reset_index(),
-                    x='tutor_status',
+                    x='tutor',
                     y=['math_score', 'reading_score', 'writing_score'],
                     title="Average Scores with/without Private Tutor",
                     barmode='group'
@@ -143,8 +121,9 @@ if db:
             
             with col2:
                 # Calculate difference
-                with_tutor = tutor_df[tutor_df['has_private_tutor']]['writing_score'].mean()
-                without_tutor = tutor_df[~tutor_df['has_private_tutor']]['writing_score'].mean()
+                writing_means = pivot_stat(stats, 'tutor')['writing_score']
+                with_tutor = writing_means.get('With Tutor', 0)
+                without_tutor = writing_means.get('No Tutor', 0)
                 diff = with_tutor - without_tutor
                 
                 st.metric(
@@ -153,19 +132,14 @@ if db:
                     f"{diff:+.1f}"
                 )
                 
-                fig_box = px.box(
-                    tutor_df,
-                    x='tutor_status',
-                    y='writing_score',
-                    title="Writing Score Distribution",
-                    color='tutor_status'
-                )
+                tutor_box = box_summaries(db, ['writing_score'], dimension='tutor')
+                fig_box = box_figure(tutor_box, title="Writing Score Distribution")
                 fig_box.update_layout(height=300)
                 st.plotly_chart(fig_box, use_container_width=True)
             
             # Summary statistics
             st.subheader("Summary Statistics")
-            summary = tutor_df.groupby('tutor_status')[['math_score', 'reading_score', 'writing_score']].agg(['mean', 'std', 'count']).round(2)
+            summary = stats_table(stats, 'tutor', ['mean', 'std', 'count'])
             st.dataframe(summary, use_container_width=True)
 else:
     st.error("❌ Database connection failed!")
@@ -1,7 +1,14 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
 from modules.database import get_db_connection
+from modules.at_risk import AtRiskIndex
+from modules.leaderboard import LEADERBOARD_COLUMNS, get_leaderboard_page
+from modules.memory_profile import page_run
+from modules.rerun_cost import fragment
+from modules.risk_model import get_risk_model, get_risk_scores
+from modules.snapshot import get_snapshot
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -10,277 +17,355 @@ st.set_page_config(
     layout="wide"
 )
 
-st.title("💡 Insights & Recommendations")
-
-# --- Helper Functions (Data Fetching) ---
-def get_overall_stats(db):
-    return db.execute_query("""
-        SELECT 
-            COUNT(DISTINCT s.id_student) as total_students,
-            ROUND(AVG(es.math_score)::numeric, 1) as avg_math,
-            ROUND(AVG(es.reading_score)::numeric, 1) as avg_reading,
-            ROUND(AVG(es.writing_score)::numeric, 1) as avg_writing,
-            ROUND(AVG(sh.study_hours_per_week)::numeric, 1) as avg_study_hours
-        FROM student s
-        LEFT JOIN exam_scores es ON s.id_student = es.id_student
-        LEFT JOIN study_habits sh ON s.id_student = sh.id_student
-    """)
-
-def get_at_risk_students(db, threshold):
-    # Fetch broadly, then filter in Pandas for responsiveness, 
-    # or filter in SQL if data is huge. Here we filter in SQL for efficiency.
-    query = f"""
-        SELECT 
-            s.id_student,
-            s.name,
-            s.grade_level,
-            es.math_score,
-            es.reading_score,
-            es.writing_score,
-            ROUND(((es.math_score + es.reading_score + es.writing_score) / 3)::numeric, 1) as avg_score,
-            sh.study_hours_per_week,
-            sh.has_private_tutor
-        FROM student s
-        LEFT JOIN exam_scores es ON s.id_student = es.id_student
-        LEFT JOIN study_habits sh ON s.id_student = sh.id_student
-        WHERE ((es.math_score + es.reading_score + es.writing_score) / 3) < {threshold}
-        ORDER BY avg_score ASC
-    """
-    return db.execute_query(query)
-
-def get_top_performers(db):
-    return db.execute_query("""
-        SELECT 
-            s.name,
-            s.grade_level,
-            es.math_score,
-            es.reading_score,
-            es.writing_score,
-            ROUND(((es.math_score + es.reading_score + es.writing_score) / 3)::numeric, 1) as avg_score,
-            sh.study_hours_per_week
-        FROM student s
-        LEFT JOIN exam_scores es ON s.id_student = es.id_student
-        LEFT JOIN study_habits sh ON s.id_student = sh.id_student
-        ORDER BY avg_score DESC
-        LIMIT 20
-    """)
-
-def get_study_impact_data(db):
-    return db.execute_query("""
-        SELECT 
-            CASE 
-                WHEN sh.study_hours_per_week < 10 THEN 'Low (<10 hrs)'
-                WHEN sh.study_hours_per_week < 15 THEN 'Medium (10-15 hrs)'
-                ELSE 'High (>15 hrs)'
-            END as study_category,
-            ROUND(AVG(es.math_score)::numeric, 1) as avg_math,
-            ROUND(AVG(es.reading_score)::numeric, 1) as avg_reading,
-            ROUND(AVG(es.writing_score)::numeric, 1) as avg_writing,
-            COUNT(*) as student_count
-        FROM student s
-        LEFT JOIN study_habits sh ON s.id_student = sh.id_student
-        LEFT JOIN exam_scores es ON s.id_student = es.id_student
-        GROUP BY study_category
-        ORDER BY avg_math ASC
-    """)
-
-# --- Main App Logic ---
-db = get_db_connection()
-
-if not db:
-    st.error("❌ Database connection failed. Please check your configuration.")
-    st.stop()
-
-# Layout Tabs
-tab1, tab2, tab3, tab4 = st.tabs([
-    "📊 Key Insights", 
-    "🚨 At Risk Students", 
-    "⭐ Top Performers", 
-    "💼 Recommendations"
-])
-
-# --- TAB 1: Key Insights ---
-with tab1:
-    st.markdown("### Overview")
-    
-    stats_df = get_overall_stats(db)
-    
-    if stats_df is not None and not stats_df.empty:
-        stats = stats_df.iloc[0]
-        
-        # Display Metrics using a cleaner container approach
-        with st.container():
-            cols = st.columns(5)
-            metrics = [
-                ("Total Students", int(stats['total_students']), ""),
-                ("Avg Math", float(stats['avg_math']), "⭐"),
-                ("Avg Reading", float(stats['avg_reading']), "📖"),
-                ("Avg Writing", float(stats['avg_writing']), "✍️"),
-                ("Avg Study Hrs", float(stats['avg_study_hours']), "⏱️")
-            ]
-            
-            for col, (label, value, icon) in zip(cols, metrics):
-                col.metric(label, f"{value} {icon}")
+with page_run('Insights & Recommendations'):
+    st.title("💡 Insights & Recommendations")
 
-        st.divider()
+    # --- Helper Functions (Data Fetching) ---
+    def get_overall_stats(db):
+        return db.execute_query("""
+            SELECT 
+                COUNT(*) as total_students,
+                ROUND(AVG(es.math_score)::numeric, 1) as avg_math,
+                ROUND(AVG(es.reading_score)::numeric, 1) as avg_reading,
+                ROUND(AVG(es.writing_score)::numeric, 1) as avg_writing,
+                ROUND(AVG(sh.study_hours_per_week)::numeric, 1) as avg_study_hours
+            FROM student s
+            LEFT JOIN exam_scores es ON s.id_student = es.id_student
+            LEFT JOIN study_habits sh ON s.id_student = sh.id_student
+        """)
+
+    # Nilai maksimum slider "Alert Threshold"; index at-risk dimuat sampai batas ini
+    MAX_ALERT_THRESHOLD = 80
+
+    @st.cache_resource(ttl=300)
+    def get_at_risk_index(_db):
+        # Dimuat sekali (index range scan pada avg_score), lalu setiap threshold
+        # dijawab dengan binary search di memori
+        return AtRiskIndex.load(_db, MAX_ALERT_THRESHOLD)
+
+    def get_predicted_risk(db, model, limit=25):
+        """Top students by predicted at-risk probability (whole school scored at once)"""
+        snapshot = get_snapshot(db)
+        probabilities = get_risk_scores(snapshot, model, snapshot.loaded_at, model.trained_at)
+        top = np.argsort(probabilities)[::-1][:limit]
+        risk_df = snapshot.to_frame(['id_student', 'grade_level', 'average_score', 'study_hours_per_week',
+                                     'has_private_tutor', 'test_prep'], mask=top)
+        risk_df.insert(1, 'risk', probabilities[top])
+        names = db.execute_query("SELECT id_student, name FROM student WHERE id_student = ANY(%s)",
+                                 ([int(i) for i in risk_df['id_student']],))
+        if not names.empty:
+            risk_df = risk_df.merge(names, on='id_student', how='left')
+        return risk_df, int((probabilities >= 0.5).sum())
+
+    def get_grade_levels(db):
+        return db.execute_query("SELECT DISTINCT grade_level FROM student WHERE grade_level IS NOT NULL ORDER BY grade_level")
+
+    def get_study_impact_data(db):
+        return db.execute_query("""
+            SELECT 
+                CASE 
+                    WHEN sh.study_hours_per_week < 10 THEN 'Low (<10 hrs)'
+                    WHEN sh.study_hours_per_week < 15 THEN 'Medium (10-15 hrs)'
+                    ELSE 'High (>15 hrs)'
+                END as study_category,
+                ROUND(AVG(es.math_score)::numeric, 1) as avg_math,
+                ROUND(AVG(es.reading_score)::numeric, 1) as avg_reading,
+                ROUND(AVG(es.writing_score)::numeric, 1) as avg_writing,
+                COUNT(*) as student_count
+            FROM student s
+            LEFT JOIN study_habits sh ON s.id_student = sh.id_student
+            LEFT JOIN exam_scores es ON s.id_student = es.id_student
+            GROUP BY study_category
+            ORDER BY avg_math ASC
+        """)
+
+    # --- Fragments (widget di dalamnya hanya me-rerun bagian ini) ---
+    @fragment('at_risk_threshold')
+    def at_risk_alerts(db):
+        col_header, col_filter = st.columns([2, 1])
+        with col_header:
+            st.subheader("Students Requiring Attention")
+        with col_filter:
+            threshold = st.slider("Alert Threshold (Avg Score)", min_value=0, max_value=MAX_ALERT_THRESHOLD, value=60, step=5)
 
-        # Strengths & Weaknesses
-        c1, c2 = st.columns(2)
-        with c1:
-            st.success("✅ **Identified Strengths**")
-            st.markdown("""
-            * **Consistent Performance:** Reading and Writing scores show low variance.
-            * **Extracurriculars:** 70% participation rate in sports/clubs.
-            * **Service:** Strong engagement in community service programs.
-            """)
-        with c2:
-            st.warning("⚠️ **Areas for Improvement**")
-            st.markdown("""
-            * **Math Variance:** High standard deviation in math scores across Grade 10.
-            * **Tutoring Gap:** Low utilization of private tutoring among at-risk students.
-            * **Study Hours:** 'Low' study group (<10hrs) correlates with <60 average scores.
-            """)
-
-# --- TAB 2: At Risk Students ---
-with tab2:
-    col_header, col_filter = st.columns([2, 1])
-    with col_header:
-        st.subheader("Students Requiring Attention")
-    with col_filter:
-        threshold = st.slider("Alert Threshold (Avg Score)", min_value=0, max_value=80, value=60, step=5)
-
-    at_risk_df = get_at_risk_students(db, threshold)
-
-    if at_risk_df is not None and not at_risk_df.empty:
-        st.warning(f"⚠️ Found **{len(at_risk_df)}** students with an average score below {threshold}.")
-        
-        # 1. Visualization
-        fig_risk = px.scatter(
-            at_risk_df,
-            x='study_hours_per_week',
-            y='avg_score',
-            color='grade_level',
-            size='avg_score',
-            hover_data=['name', 'has_private_tutor'],
-            title="Correlation: Study Hours vs. Low Scores",
-            labels={'study_hours_per_week': 'Study Hours/Week', 'avg_score': 'Average Score'},
-            color_continuous_scale='Reds_r'
-        )
-        st.plotly_chart(fig_risk, use_container_width=True)
-
-        # 2. Detailed Dataframe with Visual Column Config
-        st.dataframe(
-            at_risk_df,
-            column_config={
-                "name": "Student Name",
-                "avg_score": st.column_config.ProgressColumn(
-                    "Average Score",
-                    help="Average across Math, Reading, Writing",
-                    format="%.1f",
-                    min_value=0,
-                    max_value=100,
-                ),
-                "math_score": st.column_config.NumberColumn("Math", format="%d"),
-                "has_private_tutor": st.column_config.CheckboxColumn("Tutor?", default=False),
-            },
-            hide_index=True,
-            use_container_width=True
-        )
-    else:
-        st.success(f"🎉 No students found below the {threshold} threshold!")
-
-# --- TAB 3: Top Performers ---
-with tab3:
-    st.subheader("Academic Excellence Leaderboard")
-    
-    top_df = get_top_performers(db)
-
-    if top_df is not None and not top_df.empty:
-        c_chart, c_data = st.columns([1, 1])
-        
-        with c_chart:
-            fig_top = px.bar(
-                top_df.head(10).sort_values(by='avg_score', ascending=True),
-                x='avg_score',
-                y='name',
-                orientation='h',
-                title="Top 10 Students by Average Score",
-                color='avg_score',
-                color_continuous_scale='Teal'
+        at_risk_df = get_at_risk_index(db).below(threshold)
+
+        if at_risk_df is not None and not at_risk_df.empty:
+            st.warning(f"⚠️ Found **{len(at_risk_df)}** students with an average score below {threshold}.")
+
+            # 1. Visualization
+            fig_risk = px.scatter(
+                at_risk_df,
+                x='study_hours_per_week',
+                y='avg_score',
+                color='grade_level',
+                size='avg_score',
+                hover_data=['name', 'has_private_tutor'],
+                title="Correlation: Study Hours vs. Low Scores",
+                labels={'study_hours_per_week': 'Study Hours/Week', 'avg_score': 'Average Score'},
+                color_continuous_scale='Reds_r'
             )
-            fig_top.update_layout(xaxis_range=[80, 100]) # Zoom in on high scores
-            st.plotly_chart(fig_top, use_container_width=True)
+            st.plotly_chart(fig_risk, use_container_width=True)
 
-        with c_data:
+            # 2. Detailed Dataframe with Visual Column Config
             st.dataframe(
-                top_df,
+                at_risk_df,
                 column_config={
-                    "name": "Name",
+                    "name": "Student Name",
                     "avg_score": st.column_config.ProgressColumn(
-                        "Avg Score",
+                        "Average Score",
+                        help="Average across Math, Reading, Writing",
                         format="%.1f",
                         min_value=0,
                         max_value=100,
                     ),
-                    "study_hours_per_week": st.column_config.NumberColumn("Study Hrs/Wk"),
+                    "math_score": st.column_config.NumberColumn("Math", format="%d"),
+                    "has_private_tutor": st.column_config.CheckboxColumn("Tutor?", default=False),
                 },
                 hide_index=True,
-                use_container_width=True,
-                height=400
+                use_container_width=True
+            )
+        else:
+            st.success(f"🎉 No students found below the {threshold} threshold!")
+
+    @fragment('leaderboard')
+    def leaderboard(db, grade_options):
+        c_board, c_grade = st.columns(2)
+        with c_board:
+            board = st.selectbox("Leaderboard", list(LEADERBOARD_COLUMNS), format_func=str.title)
+        with c_grade:
+            grade_choice = st.selectbox("Grade Level", grade_options)
+        grade_level = None if grade_choice == "All Grades" else grade_choice
+
+        # Cursor stack per kombinasi leaderboard/grade untuk navigasi halaman (keyset)
+        board_key = f"leaderboard_cursors_{board}_{grade_choice}"
+        cursors = st.session_state.setdefault(board_key, [None])
+
+        top_df, next_cursor = get_leaderboard_page(db, board, grade_level, limit=20, cursor=cursors[-1])
+
+        if top_df is not None and not top_df.empty:
+            c_chart, c_data = st.columns([1, 1])
+
+            with c_chart:
+                fig_top = px.bar(
+                    top_df.head(10).sort_values(by='score', ascending=True),
+                    x='score',
+                    y='name',
+                    orientation='h',
+                    title=f"Top 10 on this page ({board.title()})",
+                    color='score',
+                    color_continuous_scale='Teal'
+                )
+                if len(cursors) == 1:
+                    fig_top.update_layout(xaxis_range=[80, 100]) # Zoom in on high scores
+                st.plotly_chart(fig_top, use_container_width=True)
+
+            with c_data:
+                st.dataframe(
+                    top_df.drop(columns=['id_student', 'score']),
+                    column_config={
+                        "rank": st.column_config.NumberColumn("Rank", format="#%d"),
+                        "name": "Name",
+                        "avg_score": st.column_config.ProgressColumn(
+                            "Avg Score",
+                            format="%.1f",
+                            min_value=0,
+                            max_value=100,
+                        ),
+                        "study_hours_per_week": st.column_config.NumberColumn("Study Hrs/Wk"),
+                    },
+                    hide_index=True,
+                    use_container_width=True,
+                    height=400
+                )
+
+            c_prev, c_page, c_next = st.columns([1, 2, 1])
+            with c_prev:
+                st.button("← Previous", disabled=len(cursors) == 1, key=f"{board_key}_prev", on_click=cursors.pop)
+            with c_page:
+                st.caption(f"Page {len(cursors)} · ranks {top_df['rank'].iloc[0]}–{top_df['rank'].iloc[-1]}")
+            with c_next:
+                st.button("Next →", disabled=next_cursor is None, key=f"{board_key}_next",
+                          on_click=cursors.append, args=(next_cursor,))
+        else:
+            st.info("No exam scores available for this leaderboard.")
+
+    # --- Main App Logic ---
+    db = get_db_connection()
+
+    if not db:
+        st.error("❌ Database connection failed. Please check your configuration.")
+        st.stop()
+
+    # Layout Tabs
+    tab1, tab2, tab3, tab4 = st.tabs([
+        "📊 Key Insights", 
+        "🚨 At Risk Students", 
+        "⭐ Top Performers", 
+        "💼 Recommendations"
+    ])
+
+    # --- TAB 1: Key Insights ---
+    with tab1:
+        st.markdown("### Overview")
+
+        stats_df = get_overall_stats(db)
+
+        if stats_df is not None and not stats_df.empty:
+            stats = stats_df.iloc[0]
+
+            # Display Metrics using a cleaner container approach
+            with st.container():
+                cols = st.columns(5)
+                metrics = [
+                    ("Total Students", int(stats['total_students']), ""),
+                    ("Avg Math", float(stats['avg_math']), "⭐"),
+                    ("Avg Reading", float(stats['avg_reading']), "📖"),
+                    ("Avg Writing", float(stats['avg_writing']), "✍️"),
+                    ("Avg Study Hrs", float(stats['avg_study_hours']), "⏱️")
+                ]
+
+                for col, (label, value, icon) in zip(cols, metrics):
+                    col.metric(label, f"{value} {icon}")
+
+            st.divider()
+
+            # Strengths & Weaknesses
+            c1, c2 = st.columns(2)
+            with c1:
+                st.success("✅ **Identified Strengths**")
+                st.markdown("""
+                * **Consistent Performance:** Reading and Writing scores show low variance.
+                * **Extracurriculars:** 70% participation rate in sports/clubs.
+                * **Service:** Strong engagement in community service programs.
+                """)
+            with c2:
+                st.warning("⚠️ **Areas for Improvement**")
+                st.markdown("""
+                * **Math Variance:** High standard deviation in math scores across Grade 10.
+                * **Tutoring Gap:** Low utilization of private tutoring among at-risk students.
+                * **Study Hours:** 'Low' study group (<10hrs) correlates with <60 average scores.
+                """)
+
+    # --- TAB 2: At Risk Students ---
+    with tab2:
+        # Slider threshold hanya me-rerun fragment ini (index at-risk di memori)
+        at_risk_alerts(db)
+
+        # Model prediksi: siapa yang berisiko walau nilainya belum turun
+        st.divider()
+        st.subheader("Predicted Risk")
+        risk_model = get_risk_model()
+        if risk_model is None:
+            st.info("No trained risk model yet. Train one with `python -m modules.risk_model`.")
+        else:
+            predicted_df, flagged = get_predicted_risk(db, risk_model)
+            st.caption(
+                f"Logistic model on study habits, tutoring, parental education, lunch, test prep and activities "
+                f"(pass mark {risk_model.pass_mark:g}, AUC {risk_model.metrics.get('auc', float('nan')):.2f}). "
+                f"**{flagged:,}** students have a predicted risk of 50% or more."
+            )
+            st.dataframe(
+                predicted_df,
+                column_config={
+                    "risk": st.column_config.ProgressColumn("Predicted Risk", format="%.2f", min_value=0, max_value=1),
+                    "name": "Student Name",
+                    "average_score": st.column_config.NumberColumn("Avg Score", format="%.1f"),
+                    "has_private_tutor": st.column_config.CheckboxColumn("Tutor?"),
+                    "test_prep": st.column_config.CheckboxColumn("Test Prep?"),
+                },
+                hide_index=True,
+                use_container_width=True
+            )
+
+    # --- TAB 3: Top Performers ---
+    with tab3:
+        st.subheader("Academic Excellence Leaderboard")
+
+        grades_df = get_grade_levels(db)
+        grade_options = ["All Grades"] + (grades_df['grade_level'].tolist() if not grades_df.empty else [])
+
+        # Pilihan leaderboard & navigasi halaman hanya me-rerun fragment ini
+        leaderboard(db, grade_options)
+
+    # --- TAB 4: Recommendations ---
+    with tab4:
+        st.subheader("Actionable Recommendations")
+
+        # Rekomendasi dari koefisien model (odds ratio per faktor); teks statis bila belum ada model
+        risk_model = get_risk_model()
+        if risk_model is not None:
+            effects = risk_model.effects()
+            protective = effects[effects['odds_ratio'] < 0.95].sort_values('odds_ratio')
+            harmful = effects[effects['odds_ratio'] > 1.05].sort_values('odds_ratio', ascending=False)
+
+            row1 = st.columns(2)
+            with row1[0]:
+                with st.expander("📌 Factors That Lower Risk", expanded=True):
+                    if protective.empty:
+                        st.markdown("No factor lowers the predicted risk noticeably.")
+                    for _, effect in protective.iterrows():
+                        st.markdown(f"* **{effect['label']}** ({effect['change']}): "
+                                    f"odds of falling below {risk_model.pass_mark:g} are "
+                                    f"**{(1 - effect['odds_ratio']) * 100:.0f}% lower**.")
+            with row1[1]:
+                with st.expander("📌 Factors That Raise Risk", expanded=True):
+                    if harmful.empty:
+                        st.markdown("No factor raises the predicted risk noticeably.")
+                    for _, effect in harmful.iterrows():
+                        st.markdown(f"* **{effect['label']}** ({effect['change']}): "
+                                    f"odds are **{(effect['odds_ratio'] - 1) * 100:.0f}% higher** — "
+                                    f"prioritise these students for intervention.")
+            st.caption(f"Model trained on {risk_model.metrics.get('students', 0):,} students; "
+                       f"see the Predicted Risk list in the At Risk tab.")
+        else:
+            row1 = st.columns(2)
+            with row1[0]:
+                with st.expander("📌 For Educators", expanded=True):
+                    st.markdown("""
+                    1. **Targeted Intervention:** Initiate mandatory study halls for students in the "At Risk" list (Tab 2).
+                    2. **Math Support:** Grade 10 requires a specialized remedial math workshop based on variance analysis.
+                    3. **Tutor Matching:** Only 15% of at-risk students currently have tutors. Launch a peer-tutoring program.
+                    """)
+            with row1[1]:
+                with st.expander("📌 For Students", expanded=True):
+                    st.markdown("""
+                    1. **The '15-Hour' Rule:** Data shows students studying >15 hours/week average 12% higher scores.
+                    2. **Balance:** High math performers should ensure they don't neglect Reading/Writing (see Top Performers distribution).
+                    3. **Early Warning:** If your average drops below 70, seek help immediately.
+                    """)
+
+        st.divider()
+
+        # Data-Driven Evidence
+        st.subheader("📊 The Data: Why Study Hours Matter")
+
+
+        impact_df = get_study_impact_data(db)
+
+        if impact_df is not None and not impact_df.empty:
+            # Reshape for nicer plotting (Melt the dataframe)
+            melted_df = impact_df.melt(
+                id_vars=['study_category', 'student_count'], 
+                value_vars=['avg_math', 'avg_reading', 'avg_writing'],
+                var_name='Subject', 
+                value_name='Score'
+            )
+
+            # Clean up Subject names
+            melted_df['Subject'] = melted_df['Subject'].str.replace('avg_', '').str.title()
+
+            fig_impact = px.bar(
+                melted_df,
+                x='study_category',
+                y='Score',
+                color='Subject',
+                barmode='group',
+                title="Impact of Study Volume on Subject Scores",
+                text='Score',
+                category_orders={"study_category": ["Low (<10 hrs)", "Medium (10-15 hrs)", "High (>15 hrs)"]}
             )
+            fig_impact.update_traces(textposition='outside')
+            fig_impact.update_layout(yaxis_range=[50, 100])
 
-# --- TAB 4: Recommendations ---
-with tab4:
-    st.subheader("Actionable Recommendations")
-    
-    # Static Advice
-    row1 = st.columns(2)
-    with row1[0]:
-        with st.expander("📌 For Educators", expanded=True):
-            st.markdown("""
-            1. **Targeted Intervention:** Initiate mandatory study halls for students in the "At Risk" list (Tab 2).
-            2. **Math Support:** Grade 10 requires a specialized remedial math workshop based on variance analysis.
-            3. **Tutor Matching:** Only 15% of at-risk students currently have tutors. Launch a peer-tutoring program.
-            """)
-    with row1[1]:
-        with st.expander("📌 For Students", expanded=True):
-            st.markdown("""
-            1. **The '15-Hour' Rule:** Data shows students studying >15 hours/week average 12% higher scores.
-            2. **Balance:** High math performers should ensure they don't neglect Reading/Writing (see Top Performers distribution).
-            3. **Early Warning:** If your average drops below 70, seek help immediately.
-            """)
-    
-    st.divider()
-    
-    # Data-Driven Evidence
-    st.subheader("📊 The Data: Why Study Hours Matter")
-    
-    
-    impact_df = get_study_impact_data(db)
-    
-    if impact_df is not None and not impact_df.empty:
-        # Reshape for nicer plotting (Melt the dataframe)
-        melted_df = impact_df.melt(
-            id_vars=['study_category', 'student_count'], 
-            value_vars=['avg_math', 'avg_reading', 'avg_writing'],
-            var_name='Subject', 
-            value_name='Score'
-        )
-        
-        # Clean up Subject names
-        melted_df['Subject'] = melted_df['Subject'].str.replace('avg_', '').str.title()
-
-        fig_impact = px.bar(
-            melted_df,
-            x='study_category',
-            y='Score',
-            color='Subject',
-            barmode='group',
-            title="Impact of Study Volume on Subject Scores",
-            text='Score',
-            category_orders={"study_category": ["Low (<10 hrs)", "Medium (10-15 hrs)", "High (>15 hrs)"]}
-        )
-        fig_impact.update_traces(textposition='outside')
-        fig_impact.update_layout(yaxis_range=[50, 100])
-        
-        st.plotly_chart(fig_impact, use_container_width=True)
\ No newline at end of file
+            st.plotly_chart(fig_impact, use_container_width=True)
@@ -30,15 +30,29 @@ CREATE TABLE activities (
 );
 
 -- 3. Tabel Utama Student (Hanya Data Diri)
+-- Kategori ber-kardinalitas rendah disimpan sebagai ENUM (4 byte, urutan
+-- grade natural). Nilai baru: ALTER TYPE student_grade_level ADD VALUE '12D' AFTER '12C';
+CREATE TYPE student_gender AS ENUM ('Male', 'Female');
+CREATE TYPE student_grade_level AS ENUM (
+    '10', '10A', '10B', '10C', '11', '11A', '11B', '11C', '12', '12A', '12B', '12C'
+);
+CREATE TYPE student_race_ethnicity AS ENUM ('Indonesian', 'Javanese', 'Sundanese');
+
+-- Kolom fixed-width dulu, VARCHAR di akhir (tanpa padding, offset kolom tetap)
 CREATE TABLE student (
     id_student SERIAL PRIMARY KEY,
-    name VARCHAR(100) NOT NULL,
-    gender VARCHAR(10),
-    grade_level VARCHAR(20),
-    race_ethnicity VARCHAR(50),
-    date_of_birth DATE
+    date_of_birth DATE,
+    gender student_gender,
+    grade_level student_grade_level,
+    race_ethnicity student_race_ethnicity,
+    name VARCHAR(100) NOT NULL
 );
 
+-- Keyset paging roster: (kolom sort, id_student)
+CREATE INDEX idx_student_name_id ON student (name, id_student);
+CREATE INDEX idx_student_grade_level_id ON student (grade_level, id_student);
+CREATE INDEX idx_student_date_of_birth_id ON student (date_of_birth, id_student);
+
 -- 4. Tabel Parent Background
 CREATE TABLE parent_background (
     parent_id SERIAL PRIMARY KEY,
@@ -53,22 +67,34 @@ CREATE TABLE parent_background (
 CREATE TABLE exam_scores (
     score_id SERIAL PRIMARY KEY,
     id_student INT NOT NULL,
-    math_score INT,
-    reading_score INT,
-    writing_score INT,
+    math_score SMALLINT,
+    reading_score SMALLINT,
+    writing_score SMALLINT,
+    -- Rata-rata disimpan (generated) agar filter threshold bisa memakai index
+    avg_score NUMERIC(5,2) GENERATED ALWAYS AS (ROUND((math_score + reading_score + writing_score) / 3.0, 2)) STORED,
     FOREIGN KEY (id_student) REFERENCES student(id_student) ON DELETE CASCADE
 );
 
+-- Index (nilai, id_student): filter at-risk dan leaderboard top-k tanpa sort
+CREATE INDEX idx_exam_scores_avg_score_id ON exam_scores (avg_score, id_student);
+CREATE INDEX idx_exam_scores_math_id ON exam_scores (math_score, id_student);
+CREATE INDEX idx_exam_scores_reading_id ON exam_scores (reading_score, id_student);
+CREATE INDEX idx_exam_scores_writing_id ON exam_scores (writing_score, id_student);
+-- Satu baris nilai per siswa (target ON CONFLICT untuk bulk import)
+CREATE UNIQUE INDEX uq_exam_scores_id_student ON exam_scores (id_student);
+
 -- 6. Tabel Study Habits
 CREATE TABLE study_habits (
     study_habits_id SERIAL PRIMARY KEY,
     id_student INT NOT NULL,
-    study_hours_per_week FLOAT,
-    prefers_group_study VARCHAR(5),
-    has_private_tutor VARCHAR(5),
+    study_hours_per_week REAL,
+    prefers_group_study BOOLEAN,
+    has_private_tutor BOOLEAN,
     FOREIGN KEY (id_student) REFERENCES student(id_student) ON DELETE CASCADE
 );
 
+CREATE UNIQUE INDEX uq_study_habits_id_student ON study_habits (id_student);
+
 -- 7. Tabel Student Services (Makan Siang & Kursus)
 CREATE TABLE student_services (
     student_service_id SERIAL PRIMARY KEY,
@@ -135,8 +161,8 @@ FROM student;
 INSERT INTO study_habits (id_student, study_hours_per_week, prefers_group_study, has_private_tutor)
 SELECT id_student,
        FLOOR(RANDOM() * 15 + 2),
-       CASE WHEN random() < 0.5 THEN 'Yes' ELSE 'No' END,
-       CASE WHEN random() < 0.3 THEN 'Yes' ELSE 'No' END
+       random() < 0.5,
+       random() < 0.3
 FROM student;
 
 -- F. Insert Student Services (Logika Lunch & Prep Course)